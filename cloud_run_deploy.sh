@@ -124,6 +124,7 @@ gcloud run deploy "$SERVICE_NAME" \
     --timeout 300 \
     --min-instances 0 \
     --max-instances 5 \
+    --session-affinity \
     --set-secrets OPENAI_API_KEY=${SECRET_NAME}:latest \
     --set-secrets HF_TOKEN=${HF_SECRET}:latest \
     --set-env-vars GCS_BUCKET=$GCS_BUCKET
@@ -1,5 +1,21 @@
 #!/bin/bash
+# Optional out-of-process reranker service (see ragthrones/agents/reranker_server.py);
+# the server connects to it over RERANKER_SOCKET instead of loading the model itself.
+if [ "${START_RERANKER_SERVICE:-0}" = "1" ]; then
+    # Same default as reranker_server.py: a private per-user directory
+    export RERANKER_SOCKET="${RERANKER_SOCKET:-${XDG_RUNTIME_DIR:-/tmp/cosine-reranker-$(id -u)}/cosine-reranker.sock}"
+    python -m ragthrones.agents.reranker_server &
+    # Wait for the model to load so the server finds the socket on first use
+    for _ in $(seq 1 120); do
+        [ -S "$RERANKER_SOCKET" ] && break
+        sleep 1
+    done
+fi
+
+# One worker: background NSS results (/api/nss/{id}), single-flight,
+# the warm cache and admission limits all live in process memory.
+# Scale with Cloud Run instances, not uvicorn workers.
 exec uvicorn ragthrones.app.main:app \
     --host 0.0.0.0 \
     --port ${PORT} \
-    --workers 1
\ No newline at end of file
+    --workers 1
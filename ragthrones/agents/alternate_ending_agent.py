@@ -12,8 +12,10 @@ This agent:
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Any
-from ragthrones.llm.llm_client import llm_chat
+from typing import Any, Callable, Dict, List, Optional
+from ragthrones.llm.llm_client import achat_complete, astream_chat_complete, chat_complete
+from ragthrones.retrieval.evidence_packer import pack_for_agent
+from ragthrones.retrieval.chunk_metadata import evidence_tag
 import pandas as pd
 
 
@@ -55,28 +57,30 @@ class AlternateEndingResult:
     variants: str
 
 
-def alternate_ending_agent(question: str, df: pd.DataFrame) -> AlternateEndingResult:
-    """
-    Generate an alternate S8 ending using only S1–7 data.
-    """
-
+def _alternate_ending_messages(df: pd.DataFrame) -> list:
     if df is None or len(df) == 0:
         evidence_text = "No usable evidence from Seasons 1–7."
     else:
-        # HARD FILTER: REMOVE SEASON 8 CHUNKS
-        filtered = df[df["season"].astype(str) != "8"]
+        # HARD FILTER: REMOVE SEASON 8 CHUNKS (precomputed flag when available)
+        if "is_post_s7" in df.columns:
+            filtered = df[~df["is_post_s7"].astype(bool)]
+        else:
+            filtered = df[df["season"].astype(str) != "8"]
         if len(filtered) == 0:
             evidence_text = "No usable evidence after filtering out Season 8."
         else:
+            # Token budget (EVIDENCE_TOKENS_ALTERNATE_ENDING), rerank order
+            packed = pack_for_agent(filtered, "alternate_ending")
             evidence_text = "\n".join(
-                f"[S{r.season}E{r.episode}] {r.text}"
-                for _, r in filtered.iterrows()
+                f"[{evidence_tag(r)}] {r.text}"
+                for _, r in packed.iterrows()
             )
 
     prompt = ALT_ENDING_PROMPT + "\n\nEVIDENCE:\n" + evidence_text
+    return [{"role": "user", "content": prompt}]
 
-    response = llm_chat(prompt)
 
+def _alternate_ending_result(response: str) -> AlternateEndingResult:
     # We let the model output a combined block;
     # UI will display it directly as HTML.
 
@@ -84,4 +88,30 @@ def alternate_ending_agent(question: str, df: pd.DataFrame) -> AlternateEndingRe
         scene=response,
         justification="(included in model output)",
         variants="(included in model output)",
-    )
\ No newline at end of file
+    )
+
+
+def alternate_ending_agent(question: str, df: pd.DataFrame) -> AlternateEndingResult:
+    """
+    Generate an alternate S8 ending using only S1–7 data.
+    """
+
+    response = chat_complete(_alternate_ending_messages(df), agent="alternate_ending")
+    return _alternate_ending_result(response)
+
+
+async def aalternate_ending_agent(
+    question: str,
+    df: pd.DataFrame,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> AlternateEndingResult:
+    """
+    Async version of alternate_ending_agent (AsyncOpenAI).
+    With on_delta, the scene is streamed to it as it is generated.
+    """
+    messages = _alternate_ending_messages(df)
+    if on_delta is not None:
+        response = await astream_chat_complete(messages, on_delta, agent="alternate_ending")
+    else:
+        response = await achat_complete(messages, agent="alternate_ending")
+    return _alternate_ending_result(response)
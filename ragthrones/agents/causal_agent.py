@@ -15,7 +15,7 @@ import json
 import re
 from dataclasses import dataclass, field
 
-from ragthrones.llm.llm_client import get_llm_client, GEN_MODEL
+from ragthrones.llm.llm_client import achat_complete, chat_complete
 
 
 # ============================================================
@@ -63,39 +63,18 @@ class CausalResult:
 # Main Agent Function
 # ============================================================
 
-def causal_agent(question: str, evidence_lines: list) -> CausalResult:
-    """
-    Run causal extraction over the top reranked evidence.
-    """
-
-    client = get_llm_client()
-
+def _causal_messages(question: str, evidence_lines: list) -> list:
     payload = {
         "question": question,
         "evidence": evidence_lines
     }
+    return [
+        {"role": "system", "content": CAUSAL_PROMPT},
+        {"role": "user", "content": json.dumps(payload)}
+    ]
 
-    # ------ LLM CALL (correct OpenAI API format) ------
-    try:
-        response = client.chat.completions.create(
-            model=GEN_MODEL,
-            temperature=0.0,
-            messages=[
-                {"role": "system", "content": CAUSAL_PROMPT},
-                {"role": "user", "content": json.dumps(payload)}
-            ]
-        )
-
-        #raw = response.choices[0].message["content"].strip()
-        raw = response.choices[0].message.content.strip()
-
-    except Exception as e:
-        return CausalResult(
-            causes=[],
-            effects=[],
-            causal_links=[f"ERROR: {str(e)}"]
-        )
 
+def _parse_causal(raw: str) -> CausalResult:
     # ------ Robust JSON Parsing ------
     try:
         data = json.loads(raw)
@@ -115,4 +94,39 @@ def causal_agent(question: str, evidence_lines: list) -> CausalResult:
         causes=data.get("causes", []),
         effects=data.get("effects", []),
         causal_links=data.get("causal_links", [])
-    )
\ No newline at end of file
+    )
+
+
+def _causal_error(e: Exception) -> CausalResult:
+    return CausalResult(
+        causes=[],
+        effects=[],
+        causal_links=[f"ERROR: {str(e)}"]
+    )
+
+
+def causal_agent(question: str, evidence_lines: list) -> CausalResult:
+    """
+    Run causal extraction over the top reranked evidence.
+    """
+
+    # ------ LLM CALL (shared pooled client) ------
+    try:
+        raw = chat_complete(_causal_messages(question, evidence_lines), agent="causal")
+    except Exception as e:
+        return _causal_error(e)
+
+    return _parse_causal(raw)
+
+
+async def acausal_agent(question: str, evidence_lines: list) -> CausalResult:
+    """
+    Async version of causal_agent (AsyncOpenAI).
+    """
+
+    try:
+        raw = await achat_complete(_causal_messages(question, evidence_lines), agent="causal")
+    except Exception as e:
+        return _causal_error(e)
+
+    return _parse_causal(raw)
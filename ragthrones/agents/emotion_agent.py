@@ -15,7 +15,7 @@ import json
 import re
 from dataclasses import dataclass, field
 
-from ragthrones.llm.llm_client import get_llm_client, GEN_MODEL
+from ragthrones.llm.llm_client import achat_complete, chat_complete
 
 
 # ============================================================
@@ -69,39 +69,18 @@ class EmotionResult:
 # Main Agent Function
 # ============================================================
 
-def emotion_agent(question: str, evidence_lines: list) -> EmotionResult:
-    """
-    Run emotional/affect extraction over evidence.
-    """
-
-    client = get_llm_client()
-
+def _emotion_messages(question: str, evidence_lines: list) -> list:
     payload = {
         "question": question,
         "evidence": evidence_lines
     }
+    return [
+        {"role": "system", "content": EMOTION_PROMPT},
+        {"role": "user", "content": json.dumps(payload)}
+    ]
 
-    # ---- Call LLM (correct OpenAI API format) ----
-    try:
-        response = client.chat.completions.create(
-            model=GEN_MODEL,
-            temperature=0.0,
-            messages=[
-                {"role": "system", "content": EMOTION_PROMPT},
-                {"role": "user", "content": json.dumps(payload)}
-            ]
-        )
-
-        #raw = response.choices[0].message["content"].strip()
-        raw = response.choices[0].message.content.strip()
-
-    except Exception as e:
-        return EmotionResult(
-            character_entities=[f"ERROR: {str(e)}"],
-            emotional_state=[],
-            sentiment=""
-        )
 
+def _parse_emotion(raw: str) -> EmotionResult:
     # ---- JSON parsing with fallback ----
     try:
         data = json.loads(raw)
@@ -121,4 +100,39 @@ def emotion_agent(question: str, evidence_lines: list) -> EmotionResult:
         character_entities=data.get("character_entities", []),
         emotional_state=data.get("emotional_state", []),
         sentiment=data.get("sentiment", "")
-    )
\ No newline at end of file
+    )
+
+
+def _emotion_error(e: Exception) -> EmotionResult:
+    return EmotionResult(
+        character_entities=[f"ERROR: {str(e)}"],
+        emotional_state=[],
+        sentiment=""
+    )
+
+
+def emotion_agent(question: str, evidence_lines: list) -> EmotionResult:
+    """
+    Run emotional/affect extraction over evidence.
+    """
+
+    # ---- Call LLM (shared pooled client) ----
+    try:
+        raw = chat_complete(_emotion_messages(question, evidence_lines), agent="emotion")
+    except Exception as e:
+        return _emotion_error(e)
+
+    return _parse_emotion(raw)
+
+
+async def aemotion_agent(question: str, evidence_lines: list) -> EmotionResult:
+    """
+    Async version of emotion_agent (AsyncOpenAI).
+    """
+
+    try:
+        raw = await achat_complete(_emotion_messages(question, evidence_lines), agent="emotion")
+    except Exception as e:
+        return _emotion_error(e)
+
+    return _parse_emotion(raw)
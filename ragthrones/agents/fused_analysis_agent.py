@@ -0,0 +1,156 @@
+"""
+Fused Analysis Agent
+--------------------
+Runs narrative, causal and emotion analysis in ONE LLM call.
+
+The three analysis agents receive the same question and the same
+evidence lines; this agent sends that payload once and asks for all
+three result blocks in a single strict-JSON response, so the input
+tokens are paid once instead of three times.
+
+Returns the same NarrativeResult / CausalResult / EmotionResult
+dataclasses as the standalone agents, so downstream state and UI
+code does not change.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+
+from ragthrones.llm.llm_client import achat_complete, chat_complete
+from ragthrones.agents.narrative_agent import NarrativeResult
+from ragthrones.agents.causal_agent import CausalResult
+from ragthrones.agents.emotion_agent import EmotionResult
+
+
+# ============================================================
+# Prompt
+# ============================================================
+
+FUSED_ANALYSIS_PROMPT = """
+You are the combined Analysis Agent for a Game of Thrones RAG system.
+You perform THREE analyses over the SAME evidence, using ONLY that evidence.
+
+1. NARRATIVE CONSISTENCY
+   - core factual claims, character relationships and motivations,
+     cause → effect chains, timeline alignment or contradictions,
+     and a 1-3 sentence merged, contradiction-free summary.
+
+2. CAUSALITY
+   - discrete, atomic CAUSES (antecedent conditions)
+   - discrete, atomic EFFECTS (outcomes / consequences)
+   - explicit links written as "<cause> → <effect>"
+   - no interpretation, speculation, or emotional analysis.
+
+3. EMOTION
+   - characters paired with the emotion or mental state the evidence implies
+   - the emotional states present (anger, fear, grief, determination, ...)
+   - overall sentiment of the evidence: "positive" | "negative" | "conflicted" | ""
+   - do NOT invent events, motives, or unstated emotions.
+
+INPUT FORMAT:
+{
+  "question": "...",
+  "evidence": ["[S6E10] ...", "[S1E2] ...", ...]
+}
+
+OUTPUT STRICT JSON ONLY (no prose, no Markdown):
+{
+  "narrative": {
+    "facts": [...],
+    "causal_links": [...],
+    "character_entities": [...],
+    "narrative_summary": "..."
+  },
+  "causal": {
+    "causes": [...],
+    "effects": [...],
+    "causal_links": ["cause → effect", ...]
+  },
+  "emotion": {
+    "character_entities": ["Jon Snow - emotion or mental state", ...],
+    "emotional_state": [...],
+    "sentiment": "positive" | "negative" | "conflicted" | ""
+  }
+}
+"""
+
+
+# ============================================================
+# Result Dataclass
+# ============================================================
+
+@dataclass
+class FusedAnalysisResult:
+    narrative: NarrativeResult = field(
+        default_factory=lambda: NarrativeResult([], [], [], "")
+    )
+    causal: CausalResult = field(default_factory=CausalResult)
+    emotion: EmotionResult = field(default_factory=EmotionResult)
+
+
+# ============================================================
+# Main Agent Function
+# ============================================================
+
+def _fused_messages(question: str, evidence_lines: list) -> list:
+    payload = {
+        "question": question,
+        "evidence": evidence_lines
+    }
+    return [
+        {"role": "system", "content": FUSED_ANALYSIS_PROMPT},
+        {"role": "user", "content": json.dumps(payload)}
+    ]
+
+
+def _parse_fused(raw: str) -> FusedAnalysisResult:
+    # ---- Robust JSON parsing ----
+    try:
+        data = json.loads(raw)
+    except Exception:
+        match = re.search(r"\{.*\}", raw, re.S)
+        if not match:
+            raise ValueError(f"Fused Analysis Agent returned unparseable JSON:\n{raw}")
+        data = json.loads(match.group(0))
+
+    n = data.get("narrative") or {}
+    c = data.get("causal") or {}
+    e = data.get("emotion") or {}
+
+    return FusedAnalysisResult(
+        narrative=NarrativeResult(
+            facts=n.get("facts", []),
+            causal_links=n.get("causal_links", []),
+            character_entities=n.get("character_entities", []),
+            narrative_summary=n.get("narrative_summary", "")
+        ),
+        causal=CausalResult(
+            causes=c.get("causes", []),
+            effects=c.get("effects", []),
+            causal_links=c.get("causal_links", [])
+        ),
+        emotion=EmotionResult(
+            character_entities=e.get("character_entities", []),
+            emotional_state=e.get("emotional_state", []),
+            sentiment=e.get("sentiment", "")
+        ),
+    )
+
+
+def fused_analysis_agent(question: str, evidence_lines: list) -> FusedAnalysisResult:
+    """
+    Run narrative + causal + emotion analysis in one structured LLM call.
+    Raises ValueError if the response cannot be parsed as JSON, so the
+    caller can fall back to the standalone agents.
+    """
+
+    raw = chat_complete(_fused_messages(question, evidence_lines), agent="analysis")
+    return _parse_fused(raw)
+
+
+async def afused_analysis_agent(question: str, evidence_lines: list) -> FusedAnalysisResult:
+    """Async version of fused_analysis_agent (AsyncOpenAI)."""
+
+    raw = await achat_complete(_fused_messages(question, evidence_lines), agent="analysis")
+    return _parse_fused(raw)
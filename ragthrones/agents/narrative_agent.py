@@ -2,20 +2,11 @@
 # Agent 4 — NARRATIVE CONSISTENCY AGENT
 # ==========================
 
-import os
 import json, re
 from dataclasses import dataclass
 
-from dotenv import load_dotenv
-load_dotenv()
-
-from langchain.chat_models import init_chat_model
-
-# Load model name
-GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
-
-# Initialize LLM client (LangChain interface)
-client = init_chat_model(GEN_MODEL, temperature=0)
+# Shared pooled OpenAI client (model/temperature from AGENT_CONFIG)
+from ragthrones.llm.llm_client import achat_complete, chat_complete
 
 NARRATIVE_PROMPT = """
 You are the Narrative Consistency Agent for a Game of Thrones RAG system.
@@ -54,26 +45,18 @@ class NarrativeResult:
     character_entities: list
     narrative_summary: str
 
-def narrative_agent(question: str, evidence_list: list) -> NarrativeResult:
-    """
-    Calls the LLM to merge overlapping evidence into a causal and
-    temporally consistent narrative summary.
-    """
-
+def _narrative_messages(question: str, evidence_list: list) -> list:
     payload = {
         "question": question,
         "evidence": evidence_list
     }
-
-    # ---- LangChain invoke() instead of raw OpenAI client ----
-    out = client.invoke([
+    return [
         {"role": "system", "content": NARRATIVE_PROMPT},
         {"role": "user", "content": json.dumps(payload)}
-    ])
+    ]
 
-    # out.content holds the LLM string
-    raw = out.content.strip()
 
+def _parse_narrative(raw: str) -> NarrativeResult:
     # ---- Robust JSON parsing ----
     try:
         data = json.loads(raw)
@@ -89,4 +72,21 @@ def narrative_agent(question: str, evidence_list: list) -> NarrativeResult:
         causal_links=data.get("causal_links", []),
         character_entities=data.get("character_entities", []),
         narrative_summary=data.get("narrative_summary", "")
-    )
\ No newline at end of file
+    )
+
+
+def narrative_agent(question: str, evidence_list: list) -> NarrativeResult:
+    """
+    Calls the LLM to merge overlapping evidence into a causal and
+    temporally consistent narrative summary.
+    """
+
+    raw = chat_complete(_narrative_messages(question, evidence_list), agent="narrative")
+    return _parse_narrative(raw)
+
+
+async def anarrative_agent(question: str, evidence_list: list) -> NarrativeResult:
+    """Async version of narrative_agent (AsyncOpenAI)."""
+
+    raw = await achat_complete(_narrative_messages(question, evidence_list), agent="narrative")
+    return _parse_narrative(raw)
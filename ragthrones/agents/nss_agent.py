@@ -1,8 +1,22 @@
+import os
+import re
 import json
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
-from ragthrones.llm.llm_client import get_llm_client
+import pandas as pd
+
+from ragthrones.llm.llm_client import achat_complete, chat_complete
+from ragthrones.shared.tokens import count_tokens
+from ragthrones.retrieval.chunk_metadata import evidence_tag
+from ragthrones.retrieval.retrieval_result import as_frame
+
+
+# Token budget for the evidence block of the NSS payload
+NSS_EVIDENCE_TOKENS = int(os.getenv("NSS_EVIDENCE_TOKENS", "3000"))
+
+# JSON keys / quoting per evidence item, on top of its text
+_ITEM_OVERHEAD_TOKENS = 12
 
 
 NSS_SYSTEM_PROMPT = """
@@ -135,52 +149,111 @@ RUBRIC = {
     "creative_plausibility": 4
 }
 
-def scoring_agent(state):
-    from ragthrones.llm.llm_client import get_llm_client
-
-    client = get_llm_client()  # returns an OpenAI client, not LangChain
-
+def compact_evidence(
+    evidence_df: pd.DataFrame,
+    budget_tokens: int = NSS_EVIDENCE_TOKENS,
+) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    Reduce evidence rows to what the judge needs ({tag, speaker, text}),
+    drop duplicate texts, and pack rows in their current (rerank) order
+    until the token budget is used.
+
+    Returns (items, stats) where stats has rows_in / rows_out / tokens_out.
+    """
+    items: List[Dict[str, str]] = []
+    seen = set()
+    used = 0
+
+    rows = evidence_df.to_dict(orient="records") if evidence_df is not None else []
+    for row in rows:
+        text = re.sub(r"\s+", " ", str(row.get("text", "") or "")).strip()
+        key = text.lower()
+        if not text or key in seen:
+            continue
+
+        n_tok = row.get("n_tokens")  # precomputed in the artifacts
+        cost = (int(n_tok) if pd.notna(n_tok) else count_tokens(text)) + _ITEM_OVERHEAD_TOKENS
+        if used + cost > budget_tokens:
+            # Keep scanning: a shorter, lower-ranked row may still fit
+            continue
+
+        seen.add(key)
+        item = {"tag": evidence_tag(row), "text": text}
+        speaker = row.get("speaker")
+        if isinstance(speaker, str) and speaker.strip():
+            item["speaker"] = speaker.strip()
+        items.append(item)
+        used += cost
+
+    return items, {"rows_in": len(rows), "rows_out": len(items), "tokens_out": used}
+
+
+def _nss_messages(state) -> list:
     # 1. Answer
     answer = getattr(state, "answer", "") or ""
 
-    # 2. Evidence
+    # 2. Evidence (rerank order)
     if getattr(state, "reranked", None) is not None and not state.reranked.empty:
-        evidence_df = state.reranked
+        evidence_df = as_frame(state.reranked)
     elif getattr(state, "retrieved", None) is not None and not state.retrieved.empty:
-        evidence_df = state.retrieved
+        evidence_df = as_frame(state.retrieved)
     else:
         evidence_df = None
 
-    evidence_records = (
-        evidence_df.to_dict(orient="records")
-        if evidence_df is not None else []
-    )
+    evidence_items, stats = compact_evidence(evidence_df)
 
     payload = {
         "answer": answer,
-        "evidence": evidence_records
+        "evidence": evidence_items
     }
-
-    messages = [
+    user_content = json.dumps(payload, ensure_ascii=False)
+
+    # 3. Token accounting: all evidence rows vs compact payload.
+    # "before" comes from the precomputed n_tokens column (chunk text
+    # only) rather than re-serializing and tokenizing every row.
+    logs = getattr(state, "logs", None)
+    if isinstance(logs, dict):
+        if evidence_df is not None and "n_tokens" in evidence_df.columns:
+            evidence_tokens = int(evidence_df["n_tokens"].fillna(0).sum())
+        else:
+            evidence_tokens = None
+        logs["nss_payload"] = {
+            **stats,
+            "budget_tokens": NSS_EVIDENCE_TOKENS,
+            "tokens_before": None if evidence_tokens is None else evidence_tokens + count_tokens(answer),
+            "tokens_after": count_tokens(user_content),
+        }
+
+    return [
         {"role": "system",    "content": NSS_SYSTEM_PROMPT},
-        {"role": "user",      "content": json.dumps(payload)}
+        {"role": "user",      "content": user_content}
     ]
 
-    # 3. Correct OpenAI v1 call
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        temperature=0,
-    )
 
-    # 4. Parse JSON
-   # 4. Parse JSON safely
+def _parse_nss(content: str) -> Dict[str, Any]:
+    # Parse JSON safely
     try:
-        content = response.choices[0].message.content
-        result = json.loads(content)
+        return json.loads(content)
     except Exception as e:
-        result = {"error": "Invalid JSON", "details": str(e)}
+        return {"error": "Invalid JSON", "details": str(e)}
+
+
+def scoring_agent(state):
+    messages = _nss_messages(state)
+
+    # 3. Shared pooled client (model/temperature from AGENT_CONFIG["nss"])
+    content = chat_complete(messages, agent="nss")
+
+    # 4. Parse JSON safely / 5. Save to state
+    state.nss_score = _parse_nss(content)
+    return state
+
+
+async def ascoring_agent(state):
+    """Async version of scoring_agent (AsyncOpenAI)."""
+    messages = _nss_messages(state)
+
+    content = await achat_complete(messages, agent="nss")
 
-    # 5. Save to state
-    state.nss_score = result
-    return state
\ No newline at end of file
+    state.nss_score = _parse_nss(content)
+    return state
@@ -0,0 +1,209 @@
+"""
+Batch NSS Scoring Agent
+-----------------------
+Scores many (answer, evidence) pairs with few LLM calls, for eval runs.
+
+- Several items are packed into one request, so the long
+  NSS_SYSTEM_PROMPT is paid once per batch instead of once per answer.
+- Batches run concurrently (bounded by NSS_BATCH_CONCURRENCY).
+- Every per-item result is validated; only items that are missing or
+  malformed are re-scored, one at a time, with the single-item scorer.
+
+Config:
+- NSS_BATCH_SIZE              items per request (default 5)
+- NSS_BATCH_CONCURRENCY       batches in flight (default 4)
+- NSS_BATCH_EVIDENCE_TOKENS   evidence budget per item (default 1500)
+"""
+
+import os
+import re
+import json
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from ragthrones.llm.llm_client import achat_complete
+from ragthrones.agents.nss_agent import (
+    NSS_SYSTEM_PROMPT,
+    RUBRIC,
+    ascoring_agent,
+    compact_evidence,
+)
+from ragthrones.shared.concurrency import run_sync
+from ragthrones.retrieval.retrieval_result import as_frame
+
+
+NSS_BATCH_SIZE = int(os.getenv("NSS_BATCH_SIZE", "5"))
+NSS_BATCH_CONCURRENCY = int(os.getenv("NSS_BATCH_CONCURRENCY", "4"))
+NSS_BATCH_EVIDENCE_TOKENS = int(os.getenv("NSS_BATCH_EVIDENCE_TOKENS", "1500"))
+
+
+# ============================================================
+# Prompt
+# ============================================================
+
+NSS_BATCH_INSTRUCTIONS = """
+===========================
+BATCH MODE
+===========================
+
+You will receive SEVERAL items to score independently:
+
+{
+  "items": [
+    {"id": "<id>", "answer": "...", "evidence": [{"tag": "...", "speaker": "...", "text": "..."}, ...]},
+    ...
+  ]
+}
+
+Score each item ONLY against its own evidence, using the rubric above.
+Return ONLY JSON with one result per item, in any order:
+
+{
+  "results": [
+    {
+      "id": "<id>",
+      "scores": { "<category>": {"score": <int>, "weight": <int>, "weighted": <int>, "explanation": "..."}, ... },
+      "total_weighted_score": <int>
+    },
+    ...
+  ]
+}
+"""
+
+NSS_BATCH_SYSTEM_PROMPT = NSS_SYSTEM_PROMPT + NSS_BATCH_INSTRUCTIONS
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _evidence_df(state):
+    for name in ("reranked", "retrieved"):
+        df = getattr(state, name, None)
+        if df is not None and not df.empty:
+            return as_frame(df)
+    return None
+
+
+def _batch_messages(batch: List[Dict[str, Any]]) -> list:
+    return [
+        {"role": "system", "content": NSS_BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps({"items": batch}, ensure_ascii=False)},
+    ]
+
+
+def _parse_batch(content: str) -> Dict[str, Dict[str, Any]]:
+    """Return {id: result} for every result block that parses."""
+    try:
+        data = json.loads(content)
+    except Exception:
+        match = re.search(r"\{.*\}", content, re.S)
+        if not match:
+            return {}
+        try:
+            data = json.loads(match.group(0))
+        except Exception:
+            return {}
+
+    results = data.get("results", []) if isinstance(data, dict) else []
+    return {
+        str(r.get("id")): r
+        for r in results
+        if isinstance(r, dict) and r.get("id") is not None
+    }
+
+
+def is_valid_nss(result: Optional[Dict[str, Any]]) -> bool:
+    """A usable NSS result has numeric scores for the rubric and a total."""
+    if not isinstance(result, dict) or "error" in result:
+        return False
+
+    scores = result.get("scores")
+    if not isinstance(scores, dict) or not scores:
+        return False
+
+    for name, cat in scores.items():
+        if name not in RUBRIC or not isinstance(cat, dict):
+            return False
+        if not isinstance(cat.get("score"), (int, float)):
+            return False
+
+    return isinstance(result.get("total_weighted_score"), (int, float))
+
+
+async def _score_batch(batch: List[Dict[str, Any]], sem: asyncio.Semaphore) -> Dict[str, Dict[str, Any]]:
+    async with sem:
+        try:
+            content = await achat_complete(_batch_messages(batch), agent="nss")
+        except Exception as e:
+            print(f"[WARN] NSS batch of {len(batch)} failed: {e}")
+            return {}
+    return _parse_batch(content)
+
+
+async def _rescore_one(state, sem: asyncio.Semaphore) -> Dict[str, Any]:
+    async with sem:
+        try:
+            return (await ascoring_agent(state)).nss_score
+        except Exception as e:
+            return {"error": "NSS scoring failed", "details": str(e)}
+
+
+# ============================================================
+# Main Agent Function
+# ============================================================
+
+async def ascore_batch(
+    states: List[Any],
+    batch_size: int = NSS_BATCH_SIZE,
+    max_concurrency: int = NSS_BATCH_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    NSS-score a list of finished states (anything with .answer and
+    .reranked / .retrieved). Sets state.nss_score on each and returns
+    the scores in input order.
+    """
+    if not states:
+        return []
+
+    items = []
+    for i, state in enumerate(states):
+        evidence, _ = compact_evidence(_evidence_df(state), NSS_BATCH_EVIDENCE_TOKENS)
+        items.append({
+            "id": str(i),
+            "answer": getattr(state, "answer", "") or "",
+            "evidence": evidence,
+        })
+
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+    batches = [items[i:i + batch_size] for i in range(0, len(items), max(1, batch_size))]
+
+    parsed: Dict[str, Dict[str, Any]] = {}
+    for out in await asyncio.gather(*(_score_batch(b, sem) for b in batches)):
+        parsed.update(out)
+
+    # Re-score only the items the batch calls did not return cleanly
+    failed = [i for i in range(len(states)) if not is_valid_nss(parsed.get(str(i)))]
+    if failed:
+        print(f"[INFO] NSS batch: re-scoring {len(failed)}/{len(states)} items individually")
+        retried = await asyncio.gather(*(_rescore_one(states[i], sem) for i in failed))
+        for i, result in zip(failed, retried):
+            parsed[str(i)] = result
+
+    scores = []
+    for i, state in enumerate(states):
+        result = dict(parsed.get(str(i)) or {})
+        result.pop("id", None)
+        state.nss_score = result
+        scores.append(result)
+
+    return scores
+
+
+def score_batch(
+    states: List[Any],
+    batch_size: int = NSS_BATCH_SIZE,
+    max_concurrency: int = NSS_BATCH_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """Sync wrapper around ascore_batch (eval scripts)."""
+    return run_sync(ascore_batch(states, batch_size, max_concurrency))
@@ -14,12 +14,10 @@ import json
 from dataclasses import dataclass
 from typing import List, Dict, Any
 
-from langchain.chat_models import init_chat_model
-
-from langchain_core.messages import SystemMessage, HumanMessage
-
 import spacy
 
+from ragthrones.llm.llm_client import achat_complete, chat_complete
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -34,13 +32,6 @@ except Exception:
         "spaCy model 'en_core_web_sm' not installed. Run: python -m spacy download en_core_web_sm"
     )
 
-# -------------------------------------------------------
-# LLM for decomposition
-# -------------------------------------------------------
-GEN_MODEL = "gpt-4o-mini"
-QueryDecomposerLLM = init_chat_model(GEN_MODEL, temperature=0.0)
-
-
 # -------------------------------------------------------
 # ParsedQuery dataclass
 # -------------------------------------------------------
@@ -100,23 +91,20 @@ Rules:
 # -------------------------------------------------------
 # Main Decomposer Agent
 # -------------------------------------------------------
-def query_decomposer_agent(question: str) -> ParsedQuery:
-    """Break a GOT question into structured retrieval instructions."""
-
+def _decomposer_messages(question: str) -> list:
     # SpaCy baseline entities
     spacy_entities = extract_spacy_entities(question)
 
-    # Prepare messages
-    messages = [
-        SystemMessage(content=DECOMPOSER_PROMPT),
-        HumanMessage(
-            content=f"Question: {question}\nDetected entities: {spacy_entities}"
-        ),
+    return [
+        {"role": "system", "content": DECOMPOSER_PROMPT},
+        {
+            "role": "user",
+            "content": f"Question: {question}\nDetected entities: {spacy_entities}",
+        },
     ]
 
-    # Execute LLM
-    out = QueryDecomposerLLM.invoke(messages).content
 
+def _parse_decomposition(question: str, out: str) -> ParsedQuery:
     # Parse JSON
     parsed = json.loads(out)
 
@@ -128,4 +116,19 @@ def query_decomposer_agent(question: str) -> ParsedQuery:
         subqueries=parsed["subqueries"],
         temporal_hints=parsed["temporal_hints"],
         retrieval_queries=parsed["retrieval_queries"],
-    )
\ No newline at end of file
+    )
+
+
+def query_decomposer_agent(question: str) -> ParsedQuery:
+    """Break a GOT question into structured retrieval instructions."""
+
+    # Execute LLM (shared pooled client, AGENT_CONFIG["decomposer"])
+    out = chat_complete(_decomposer_messages(question), agent="decomposer")
+    return _parse_decomposition(question, out)
+
+
+async def aquery_decomposer_agent(question: str) -> ParsedQuery:
+    """Async version of query_decomposer_agent (AsyncOpenAI)."""
+
+    out = await achat_complete(_decomposer_messages(question), agent="decomposer")
+    return _parse_decomposition(question, out)
@@ -0,0 +1,151 @@
+"""
+Rerank Cascade for Cosine of Thrones
+------------------------------------
+
+Two-stage reranking over a RetrievalResult, so CrossEncoder cost stays
+bounded no matter how many subqueries fed the candidate pool:
+
+1. Cheap stage: order every candidate by
+   - "hybrid": the hybrid (vector + BM25) score it was retrieved with, or
+   - "cosine": cosine between the question embedding and the chunk's
+     stored FAISS vector (one embedding call, no per-pair model cost).
+2. Only the top-N go through the CrossEncoder. N adapts to the cheap
+   score margins: candidates within RERANK_CASCADE_MARGIN (fraction of
+   the cheap score range) of the best one are scored, clamped to
+   [RERANK_CASCADE_MIN, RERANK_CASCADE_MAX].
+3. The prefix is scored in batches; once RERANK_CASCADE_BUDGET_MS is
+   spent, the remaining pairs are skipped (the first batch always runs).
+
+Rows that already carry a rerank score (speculative pre-scoring) are
+never re-encoded. Unscored rows stay NaN and sort after the scored ones,
+in cheap-stage order.
+
+Config:
+- RERANK_CASCADE            1 (default) | 0 = cross-encode every candidate
+- RERANK_CASCADE_CHEAP      hybrid (default) | cosine
+- RERANK_CASCADE_MIN        default 8
+- RERANK_CASCADE_MAX        default 40
+- RERANK_CASCADE_MARGIN     default 0.35
+- RERANK_CASCADE_BUDGET_MS  default 400 (0 = no time budget)
+"""
+
+import os
+import time
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from ragthrones.agents.rerank_engine import RERANKER_BATCH_SIZE
+from ragthrones.retrieval.retrieval_result import RetrievalResult
+
+
+RERANK_CASCADE = os.getenv("RERANK_CASCADE", "1") == "1"
+RERANK_CASCADE_CHEAP = os.getenv("RERANK_CASCADE_CHEAP", "hybrid")
+RERANK_CASCADE_MIN = int(os.getenv("RERANK_CASCADE_MIN", "8"))
+RERANK_CASCADE_MAX = int(os.getenv("RERANK_CASCADE_MAX", "40"))
+RERANK_CASCADE_MARGIN = float(os.getenv("RERANK_CASCADE_MARGIN", "0.35"))
+RERANK_CASCADE_BUDGET_MS = float(os.getenv("RERANK_CASCADE_BUDGET_MS", "400"))
+
+
+# ------------------------------------------------------------
+# Pair scoring
+# ------------------------------------------------------------
+def score_positions(question: str, hits: RetrievalResult, positions: Sequence[int], reranker) -> np.ndarray:
+    """CrossEncoder scores for hits at positions (via the pair cache when available)."""
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    texts = hits.texts(positions)
+    if hasattr(reranker, "score_chunks"):
+        # RerankEngine: skips (question, chunk id) pairs already cached
+        return reranker.score_chunks(question, hits.ids[positions].tolist(), texts)
+    return reranker.predict([[question, txt] for txt in texts])
+
+
+# ------------------------------------------------------------
+# Cheap stage
+# ------------------------------------------------------------
+def cheap_scores(question: str, hits: RetrievalResult, method: str = RERANK_CASCADE_CHEAP) -> np.ndarray:
+    """First-stage scores for every candidate (higher = better)."""
+    if method == "cosine":
+        try:
+            from ragthrones.retrieval.hybrid_search import embed_query, get_chunk_vectors
+
+            vecs = get_chunk_vectors(hits.ids)
+            norms = np.linalg.norm(vecs, axis=1)
+            norms[norms == 0] = 1.0
+            return (vecs @ embed_query(question)[0]) / norms
+        except Exception as e:
+            print(f"[WARN] Cosine cascade stage unavailable ({e}); using hybrid scores.")
+    return hits.scores.astype(np.float32)
+
+
+def prefix_size(
+    sorted_scores: np.ndarray,
+    min_n: int = RERANK_CASCADE_MIN,
+    max_n: int = RERANK_CASCADE_MAX,
+    margin: float = RERANK_CASCADE_MARGIN,
+) -> int:
+    """
+    How many of the (descending) cheap scores to cross-encode: all
+    candidates within `margin` of the top, as a fraction of the score
+    range. A clear leader gives a short prefix, a flat list a long one.
+    """
+    n = len(sorted_scores)
+    if n <= min_n:
+        return n
+
+    spread = float(sorted_scores[0] - sorted_scores[-1])
+    if not np.isfinite(spread) or spread <= 0:
+        close = n
+    else:
+        close = int(np.sum(sorted_scores >= sorted_scores[0] - margin * spread))
+
+    return int(min(n, max(min_n, min(max_n, close))))
+
+
+# ------------------------------------------------------------
+# Cascade
+# ------------------------------------------------------------
+def cascade_rerank(
+    question: str,
+    hits: RetrievalResult,
+    reranker,
+    budget_ms: float = RERANK_CASCADE_BUDGET_MS,
+) -> RetrievalResult:
+    """
+    Cheap ordering, then CrossEncoder scores for an adaptive prefix.
+    Returns a copy sorted by rerank score (unscored rows last);
+    attrs carry scored_pairs and the cascade decision for logging.
+    """
+    cheap = cheap_scores(question, hits)
+    order = np.argsort(-cheap, kind="stable")
+    hits = hits.take(order)
+    n = prefix_size(cheap[order])
+
+    todo = np.flatnonzero(np.isnan(hits.rerank_scores[:n]))
+    t0 = time.perf_counter()
+    done, values, budget_hit = 0, [], False
+
+    for start in range(0, len(todo), max(1, RERANKER_BATCH_SIZE)):
+        if start and budget_ms > 0 and (time.perf_counter() - t0) * 1000 > budget_ms:
+            budget_hit = True
+            break
+        batch = todo[start:start + RERANKER_BATCH_SIZE]
+        values.append(score_positions(question, hits, batch, reranker))
+        done += len(batch)
+
+    scored = todo[:done]
+    out = hits.with_rerank_scores(scored, np.concatenate(values) if values else [])
+
+    cascade: Dict[str, Any] = {
+        "cheap": RERANK_CASCADE_CHEAP,
+        "candidates": int(len(hits)),
+        "prefix": int(n),
+        "budget_hit": budget_hit,
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    out.attrs["scored_pairs"] = int(done)
+    out.attrs["cascade"] = cascade
+    return out
@@ -0,0 +1,248 @@
+"""
+Rerank Engine for Cosine of Thrones
+-----------------------------------
+
+Wraps the CrossEncoder with the CPU-side optimizations reranking needs
+when a request produces dozens of (question, chunk) pairs:
+
+- backend: "torch" (fp32), "int8" (dynamic int8 quantization of the
+  Linear layers) or "onnx" (ONNX Runtime via optimum, if installed)
+- pairs are sorted by length before batching, so each batch pads to a
+  similar length; scores are returned in the caller's order
+- max_length truncation (query + chunk tokens)
+- thread budget for intra-op parallelism
+- LRU score cache keyed by (question hash, chunk id), so pairs that were
+  already scored (repeat questions, speculative pre-scoring) are skipped
+
+Config:
+- RERANKER_BACKEND     torch (default) | int8 | onnx
+- RERANKER_MAX_LENGTH  default 256
+- RERANKER_BATCH_SIZE  default 32
+- RERANKER_THREADS     torch / onnxruntime threads (default 0 = thread budget,
+                       see shared/threads.py, or the library default)
+- RERANKER_CACHE_SIZE  cached pair scores (default 20000, 0 = off)
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ragthrones.shared.threads import applied_thread_budget
+
+
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")
+RERANKER_MAX_LENGTH = int(os.getenv("RERANKER_MAX_LENGTH", "256"))
+RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", "32"))
+RERANKER_THREADS = int(os.getenv("RERANKER_THREADS", "0"))
+RERANKER_CACHE_SIZE = int(os.getenv("RERANKER_CACHE_SIZE", "20000"))
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+# ------------------------------------------------------------
+# Pair score cache
+# ------------------------------------------------------------
+class PairScoreCache:
+    """Thread-safe LRU of rerank scores keyed by (question hash, chunk id)."""
+
+    def __init__(self, max_size: int = RERANKER_CACHE_SIZE):
+        self.max_size = max_size
+        self._data: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def question_key(question: str) -> str:
+        return hashlib.sha1(question.strip().lower().encode("utf-8")).hexdigest()
+
+    def get_many(self, qkey: str, chunk_ids: Sequence[int]) -> List[Optional[float]]:
+        out = []
+        with self._lock:
+            for cid in chunk_ids:
+                key = (qkey, int(cid))
+                val = self._data.get(key)
+                if val is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._data.move_to_end(key)
+                out.append(val)
+        return out
+
+    def set_many(self, qkey: str, chunk_ids: Sequence[int], scores: Sequence[float]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for cid, sc in zip(chunk_ids, scores):
+                self._data[(qkey, int(cid))] = float(sc)
+                self._data.move_to_end((qkey, int(cid)))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+# ------------------------------------------------------------
+# Engine
+# ------------------------------------------------------------
+class RerankEngine:
+    """
+    CrossEncoder-compatible reranker: predict(pairs) -> np.ndarray,
+    plus score_chunks(question, chunk_ids, texts) with the pair cache.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = RERANKER_BACKEND,
+        max_length: int = RERANKER_MAX_LENGTH,
+        batch_size: int = RERANKER_BATCH_SIZE,
+        num_threads: int = RERANKER_THREADS,
+        cache_size: int = RERANKER_CACHE_SIZE,
+        hf_token: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        if num_threads <= 0 and applied_thread_budget() is not None:
+            num_threads = applied_thread_budget().torch_threads
+        self.num_threads = num_threads
+        self.cache = PairScoreCache(cache_size) if cache_size > 0 else None
+        self._lock = threading.Lock()  # one forward pass at a time per engine
+
+        self._ort_model = None
+        self._tokenizer = None
+        self._cross_encoder = None
+
+        self.backend = backend
+        if backend == "onnx":
+            if not self._load_onnx(hf_token):
+                self.backend = "torch"
+        if self.backend in ("torch", "int8"):
+            self._load_torch(hf_token, quantize=self.backend == "int8")
+
+    # ----------------------------------------------------------
+    # Loading
+    # ----------------------------------------------------------
+    def _load_torch(self, hf_token: Optional[str], quantize: bool) -> None:
+        import torch
+        from sentence_transformers import CrossEncoder
+
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+
+        self._cross_encoder = CrossEncoder(
+            self.model_name,
+            max_length=self.max_length,
+            device="cpu" if quantize else None,
+            use_auth_token=hf_token,
+        )
+
+        if quantize:
+            self._cross_encoder.model = torch.quantization.quantize_dynamic(
+                self._cross_encoder.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            print("Reranker: int8 dynamic quantization enabled.")
+
+    def _load_onnx(self, hf_token: Optional[str]) -> bool:
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            from transformers import AutoTokenizer
+        except ImportError:
+            print("WARNING: RERANKER_BACKEND=onnx needs optimum[onnxruntime]; using torch.")
+            return False
+
+        session_options = ort.SessionOptions()
+        if self.num_threads > 0:
+            session_options.intra_op_num_threads = self.num_threads
+            session_options.inter_op_num_threads = 1
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, token=hf_token)
+        self._ort_model = ORTModelForSequenceClassification.from_pretrained(
+            self.model_name,
+            export=True,
+            session_options=session_options,
+            token=hf_token,
+        )
+        print("Reranker: ONNX Runtime backend enabled.")
+        return True
+
+    # ----------------------------------------------------------
+    # Inference
+    # ----------------------------------------------------------
+    def _predict_sorted(self, pairs: List[List[str]]) -> np.ndarray:
+        if self._ort_model is not None:
+            out = []
+            for i in range(0, len(pairs), self.batch_size):
+                batch = pairs[i:i + self.batch_size]
+                enc = self._tokenizer(
+                    [p[0] for p in batch],
+                    [p[1] for p in batch],
+                    padding=True,
+                    truncation="only_second",
+                    max_length=self.max_length,
+                    return_tensors="np",
+                )
+                logits = self._ort_model(**enc).logits
+                logits = np.asarray(logits, dtype=np.float32)
+                # Same activation as CrossEncoder for single-label models
+                out.append(_sigmoid(logits[:, 0]) if logits.shape[1] == 1 else logits)
+            return np.concatenate(out)
+
+        return np.asarray(
+            self._cross_encoder.predict(
+                pairs,
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            ),
+            dtype=np.float32,
+        )
+
+    def predict(self, pairs: Sequence[Sequence[str]], **_) -> np.ndarray:
+        """
+        Score (question, text) pairs. Pairs are length-sorted for
+        batching; results come back in input order.
+        """
+        if len(pairs) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        pairs = [[str(q), str(t)] for q, t in pairs]
+        order = np.argsort([len(q) + len(t) for q, t in pairs], kind="stable")
+
+        with self._lock:
+            sorted_scores = self._predict_sorted([pairs[i] for i in order])
+
+        scores = np.empty(len(pairs), dtype=np.float32)
+        scores[order] = sorted_scores
+        return scores
+
+    def score_chunks(
+        self,
+        question: str,
+        chunk_ids: Sequence[int],
+        texts: Sequence[str],
+    ) -> np.ndarray:
+        """
+        Scores for (question, chunk) pairs; cached pairs are not re-encoded.
+        """
+        if self.cache is None:
+            return self.predict([[question, t] for t in texts])
+
+        qkey = self.cache.question_key(question)
+        cached = self.cache.get_many(qkey, chunk_ids)
+        todo = [i for i, v in enumerate(cached) if v is None]
+
+        scores = np.array([np.nan if v is None else v for v in cached], dtype=np.float32)
+        if todo:
+            fresh = self.predict([[question, texts[i]] for i in todo])
+            scores[todo] = fresh
+            self.cache.set_many(qkey, [chunk_ids[i] for i in todo], fresh)
+
+        return scores
@@ -7,16 +7,27 @@ based on semantic similarity between the user question and each chunk.
 
 This is called inside node_reranker OR directly from pipeline code.
 
+The model is served through RerankEngine (agents/rerank_engine.py):
+int8 / ONNX backends, length-sorted batching, max_length truncation,
+a thread budget and a (question, chunk id) score cache.
+
+If the reranker service (agents/reranker_server.py) is running on this
+host, get_reranker() returns a client stub with the same interface and
+the model stays out of this process; otherwise it loads in-process.
+
 Exposes:
-- get_reranker(): loads model once, caches globally
+- get_reranker(): service client or in-process engine, cached globally
+- load_reranker_engine(): in-process RerankEngine (or None)
 - rerank(df, question): returns reranked DataFrame
 """
 
 import os
+import threading
 import pandas as pd
-from typing import Optional
+from typing import Optional, Union
 
-from sentence_transformers import CrossEncoder
+from ragthrones.agents.rerank_engine import RerankEngine
+from ragthrones.agents.reranker_server import RerankerClient, connect_reranker_service
 
 
 # -------------------------------------------------------
@@ -24,17 +35,28 @@ from sentence_transformers import CrossEncoder
 # -------------------------------------------------------
 
 _RERANKER = None
+_RERANKER_LOCK = threading.Lock()  # flows may ask for it concurrently
 
-def get_reranker() -> Optional[CrossEncoder]:
+def get_reranker() -> Optional[Union[RerankEngine, RerankerClient]]:
     """
-    Load reranker model if available.
-    Returns None if model cannot be loaded.
+    Reranker service client if the service answers, else load the model
+    in-process. Returns None if neither is available.
     """
     global _RERANKER
 
     if _RERANKER is not None:
         return _RERANKER
 
+    with _RERANKER_LOCK:
+        if _RERANKER is None:
+            _RERANKER = (
+                connect_reranker_service(fallback=load_reranker_engine)
+                or load_reranker_engine()
+            )
+    return _RERANKER
+
+
+def load_reranker_engine() -> Optional[RerankEngine]:
     model_name = os.getenv(
         "RERANKER_MODEL",
         "cross-encoder/ms-marco-MiniLM-L-6-v2"
@@ -46,12 +68,10 @@ def get_reranker() -> Optional[CrossEncoder]:
     try:
         print(f"Loading reranker model: {model_name}")
         # NEW: pass token if available
-        _RERANKER = CrossEncoder(model_name, use_auth_token=hf_token)
-        return _RERANKER
+        return RerankEngine(model_name, hf_token=hf_token)
 
     except Exception as e:
         print(f"WARNING: Could not load reranker model: {e}")
-        _RERANKER = None
         return None
 
 
@@ -78,11 +98,12 @@ def rerank(df: pd.DataFrame, question: str) -> pd.DataFrame:
         print("Reranker unavailable -> skipping rerank.")
         return df
 
-    # Build input pairs
-    pairs = [[question, t] for t in df["text"].tolist()]
-
-    # Predict scores
-    scores = reranker.predict(pairs)
+    # Predict scores (cached per chunk id when the frame carries one)
+    texts = df["text"].tolist()
+    if "chunk_id" in df.columns:
+        scores = reranker.score_chunks(question, df["chunk_id"].tolist(), texts)
+    else:
+        scores = reranker.predict([[question, t] for t in texts])
 
     # Create sorted output
     out = df.copy().reset_index(drop=True)
@@ -0,0 +1,397 @@
+"""
+Reranker Service for Cosine of Thrones
+--------------------------------------
+
+Optional out-of-process reranker, shared by every process on the host
+that reranks (the app server, eval / bench scripts):
+
+- ONE process loads the CrossEncoder (RerankEngine) and listens on a
+  unix socket, so callers do not each hold a model + PyTorch runtime
+  and reranking does not compete with the server's event loop for the GIL.
+- Requests from all callers go through a dynamic batcher: pairs that
+  arrive within RERANKER_SERVICE_MAX_WAIT_MS of each other (up to
+  RERANKER_SERVICE_MAX_PAIRS) are scored in one forward pass.
+- The (question, chunk id) score cache lives in the service, so it is
+  shared across those processes too.
+
+The app server itself runs a single uvicorn worker (cloudrun_start.sh):
+NSS results, single-flight, the warm cache and admission limits are
+process-local.
+
+Wire format: 4-byte big-endian length + UTF-8 JSON, one request /
+response per message:
+  {"op": "ping"}                                          -> {"ok": true}
+  {"op": "predict", "pairs": [[q, text], ...]}            -> {"scores": [...]}
+  {"op": "score_chunks", "question": q,
+   "chunk_ids": [...], "texts": [...]}                    -> {"scores": [...]}
+  errors                                                  -> {"error": "..."}
+
+Run:
+  python -m ragthrones.agents.reranker_server [--socket PATH]
+
+Client side, get_reranker() returns a RerankerClient (same predict /
+score_chunks interface as RerankEngine) when the socket answers a ping;
+otherwise, or if the service goes away, it falls back to in-process.
+
+Config:
+- RERANKER_SOCKET                  default $XDG_RUNTIME_DIR/cosine-reranker.sock, else
+                                   /tmp/cosine-reranker-<uid>/cosine-reranker.sock
+                                   (0700 directory owned by this user)
+- RERANKER_SERVICE                 auto (default: use it if it answers) | off
+- RERANKER_SERVICE_TIMEOUT         client request timeout, seconds (default 30)
+- RERANKER_SERVICE_RETRY_S         seconds before retrying after a failure (default 30)
+- RERANKER_SERVICE_MAX_PAIRS       pairs per batched forward pass (default 128)
+- RERANKER_SERVICE_MAX_WAIT_MS     batching window (default 5)
+"""
+
+import os
+import json
+import time
+import stat
+import socket
+import struct
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def _default_socket_path() -> str:
+    base = os.getenv("XDG_RUNTIME_DIR") or f"/tmp/cosine-reranker-{os.getuid()}"
+    return os.path.join(base, "cosine-reranker.sock")
+
+
+RERANKER_SOCKET = os.getenv("RERANKER_SOCKET") or _default_socket_path()
+RERANKER_SERVICE = os.getenv("RERANKER_SERVICE", "auto")
+RERANKER_SERVICE_TIMEOUT = float(os.getenv("RERANKER_SERVICE_TIMEOUT", "30"))
+RERANKER_SERVICE_RETRY_S = float(os.getenv("RERANKER_SERVICE_RETRY_S", "30"))
+RERANKER_SERVICE_MAX_PAIRS = int(os.getenv("RERANKER_SERVICE_MAX_PAIRS", "128"))
+RERANKER_SERVICE_MAX_WAIT_MS = float(os.getenv("RERANKER_SERVICE_MAX_WAIT_MS", "5"))
+
+_HEADER = struct.Struct(">I")
+
+
+# ============================================================
+# Framing
+# ============================================================
+
+def _encode(msg: Dict[str, Any]) -> bytes:
+    body = json.dumps(msg, ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("reranker service closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+async def _aread(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = _HEADER.unpack(header)
+    return json.loads((await reader.readexactly(size)).decode("utf-8"))
+
+
+# ============================================================
+# Server
+# ============================================================
+
+class DynamicBatcher:
+    """
+    Collects pair lists from concurrent callers and scores them in one
+    engine.predict() call per window. Inference runs on a single worker
+    thread so the socket loop stays responsive.
+    """
+
+    def __init__(
+        self,
+        engine,
+        max_pairs: int = RERANKER_SERVICE_MAX_PAIRS,
+        max_wait_ms: float = RERANKER_SERVICE_MAX_WAIT_MS,
+    ):
+        self.engine = engine
+        self.max_pairs = max_pairs
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: "asyncio.Queue" = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    async def submit(self, pairs: List[List[str]]) -> np.ndarray:
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((pairs, fut))
+        return await fut
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        n_pairs = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+
+        while n_pairs < self.max_pairs:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_pairs += len(item[0])
+        return batch
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            flat = [p for pairs, _ in batch for p in pairs]
+            try:
+                scores = await loop.run_in_executor(self._executor, self.engine.predict, flat)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            offset = 0
+            for pairs, fut in batch:
+                if not fut.done():
+                    fut.set_result(scores[offset:offset + len(pairs)])
+                offset += len(pairs)
+
+
+async def _score_chunks(batcher: DynamicBatcher, question: str, chunk_ids: Sequence[int], texts: Sequence[str]) -> np.ndarray:
+    """Service-side equivalent of RerankEngine.score_chunks (shared cache + batcher)."""
+    cache = batcher.engine.cache
+    if cache is None:
+        return await batcher.submit([[question, t] for t in texts])
+
+    qkey = cache.question_key(question)
+    cached = cache.get_many(qkey, chunk_ids)
+    todo = [i for i, v in enumerate(cached) if v is None]
+
+    scores = np.array([np.nan if v is None else v for v in cached], dtype=np.float32)
+    if todo:
+        fresh = await batcher.submit([[question, texts[i]] for i in todo])
+        scores[todo] = fresh
+        cache.set_many(qkey, [chunk_ids[i] for i in todo], fresh)
+    return scores
+
+
+async def _dispatch(batcher: DynamicBatcher, msg: Dict[str, Any]) -> Dict[str, Any]:
+    op = msg.get("op")
+    if op == "ping":
+        return {"ok": True, "backend": batcher.engine.backend}
+    if op == "predict":
+        scores = await batcher.submit([[str(q), str(t)] for q, t in msg.get("pairs", [])])
+        return {"scores": np.asarray(scores, dtype=float).tolist()}
+    if op == "score_chunks":
+        scores = await _score_chunks(
+            batcher, str(msg["question"]), list(msg["chunk_ids"]), list(msg["texts"])
+        )
+        return {"scores": np.asarray(scores, dtype=float).tolist()}
+    return {"error": f"unknown op: {op!r}"}
+
+
+def _ensure_private_dir(path: str) -> None:
+    """Create the socket directory (0700) or check that an existing one is ours and private."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a directory owned by uid {os.getuid()}")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} is writable by other users")
+
+
+def _trusted_socket(socket_path: str) -> bool:
+    """The path is a socket created by this user (not whoever got to /tmp first)."""
+    try:
+        st = os.lstat(socket_path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Unlink a leftover socket; refuse to touch anything else at that path."""
+    try:
+        st = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise RuntimeError(f"{socket_path} exists and is not a socket; check RERANKER_SOCKET")
+    os.unlink(socket_path)
+
+
+async def serve(socket_path: str = RERANKER_SOCKET) -> None:
+    from ragthrones.agents.reranker_agent import load_reranker_engine
+
+    engine = load_reranker_engine()
+    if engine is None:
+        raise SystemExit("Reranker service: model could not be loaded.")
+
+    batcher = DynamicBatcher(engine)
+    batcher_task = asyncio.ensure_future(batcher.run())
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                msg = await _aread(reader)
+                if msg is None:
+                    break
+                try:
+                    reply = await _dispatch(batcher, msg)
+                except Exception as e:
+                    reply = {"error": str(e)}
+                writer.write(_encode(reply))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    _ensure_private_dir(os.path.dirname(os.path.abspath(socket_path)))
+    _remove_stale_socket(socket_path)
+
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    os.chmod(socket_path, 0o600)
+    print(f"Reranker service listening on {socket_path} (backend={engine.backend})")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher_task.cancel()
+        _remove_stale_socket(socket_path)
+
+
+# ============================================================
+# Client
+# ============================================================
+
+class RerankerClient:
+    """
+    Same interface as RerankEngine (predict / score_chunks), served by
+    the reranker service. If a call fails, it switches to the in-process
+    fallback engine (loaded on first need) and retries the service after
+    RERANKER_SERVICE_RETRY_S.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = RERANKER_SOCKET,
+        fallback: Optional[Callable[[], Any]] = None,
+        timeout: float = RERANKER_SERVICE_TIMEOUT,
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.backend = "service"
+        self._fallback_factory = fallback
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self._down_until = 0.0
+
+    # ----------------------------------------------------------
+    # Transport
+    # ----------------------------------------------------------
+    def _call(self, msg: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout if timeout is None else timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(_encode(msg))
+            (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+            reply = json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+        if "error" in reply:
+            raise RuntimeError(f"reranker service: {reply['error']}")
+        return reply
+
+    def ping(self, timeout: float = 1.0) -> bool:
+        try:
+            return bool(self._call({"op": "ping"}, timeout=timeout).get("ok"))
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def _get_fallback(self):
+        if self._fallback is None and self._fallback_factory is not None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    self._fallback = self._fallback_factory()
+        return self._fallback
+
+    def _scores(self, msg: Dict[str, Any], local: Callable[[Any], np.ndarray]) -> np.ndarray:
+        if time.monotonic() >= self._down_until:
+            try:
+                return np.asarray(self._call(msg)["scores"], dtype=np.float32)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"[WARN] Reranker service unavailable ({e}); using in-process reranker.")
+                self._down_until = time.monotonic() + RERANKER_SERVICE_RETRY_S
+
+        engine = self._get_fallback()
+        if engine is None:
+            raise RuntimeError("reranker service down and no in-process reranker available")
+        return local(engine)
+
+    # ----------------------------------------------------------
+    # RerankEngine interface
+    # ----------------------------------------------------------
+    def predict(self, pairs: Sequence[Sequence[str]], **_) -> np.ndarray:
+        if len(pairs) == 0:
+            return np.zeros(0, dtype=np.float32)
+        pairs = [[str(q), str(t)] for q, t in pairs]
+        return self._scores(
+            {"op": "predict", "pairs": pairs},
+            lambda engine: engine.predict(pairs),
+        )
+
+    def score_chunks(self, question: str, chunk_ids: Sequence[int], texts: Sequence[str]) -> np.ndarray:
+        if len(chunk_ids) == 0:
+            return np.zeros(0, dtype=np.float32)
+        msg = {
+            "op": "score_chunks",
+            "question": question,
+            "chunk_ids": [int(c) for c in chunk_ids],
+            "texts": [str(t) for t in texts],
+        }
+        return self._scores(msg, lambda engine: engine.score_chunks(question, chunk_ids, texts))
+
+
+def connect_reranker_service(fallback: Optional[Callable[[], Any]] = None) -> Optional[RerankerClient]:
+    """A client if RERANKER_SERVICE is enabled and our own socket answers, else None."""
+    if RERANKER_SERVICE == "off" or not os.path.exists(RERANKER_SOCKET):
+        return None
+    if not _trusted_socket(RERANKER_SOCKET):
+        print(f"[WARN] Ignoring reranker socket {RERANKER_SOCKET}: not a socket owned by uid {os.getuid()}")
+        return None
+
+    client = RerankerClient(RERANKER_SOCKET, fallback=fallback)
+    if not client.ping():
+        return None
+
+    print(f"Using reranker service at {RERANKER_SOCKET}")
+    return client
+
+
+# ============================================================
+# Entrypoint
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cosine of Thrones reranker service")
+    parser.add_argument("--socket", default=RERANKER_SOCKET)
+    args = parser.parse_args()
+
+    # One inference thread: size FAISS / torch / tokenizers for a single
+    # request at a time, not the app server's request concurrency
+    from ragthrones.shared.threads import apply_thread_budget
+    apply_thread_budget(concurrency=1)
+
+    asyncio.run(serve(args.socket))
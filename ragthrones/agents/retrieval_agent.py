@@ -6,7 +6,6 @@ import os
 import json
 
 from langchain.tools import tool
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import AnyMessage, SystemMessage, ToolMessage
 from typing_extensions import TypedDict, Annotated
 import operator
@@ -17,12 +16,10 @@ load_dotenv()
 # ------------------------------------------------------------
 # MODEL CONFIG
 # ------------------------------------------------------------
-GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
+from ragthrones.llm.llm_client import get_chat_model
 
-model = init_chat_model(
-    GEN_MODEL,
-    temperature=0
-)
+# LangChain model on the shared connection pool (AGENT_CONFIG["retrieval"])
+model = get_chat_model("retrieval")
 
 # ------------------------------------------------------------
 # LOAD VECTORSTORE + SET GLOBALS FOR hybrid_search_aug
@@ -19,21 +19,10 @@ import re
 from dataclasses import dataclass
 from typing import List, Optional
 
-from openai import OpenAI
-import os
-
-
 # -------------------------------------------------------
-# OpenAI client (same model used across your project)
+# Shared pooled OpenAI client (model/temperature from AGENT_CONFIG)
 # -------------------------------------------------------
-
-GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
-
-def _get_llm_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    return OpenAI(api_key=api_key)
+from ragthrones.llm.llm_client import achat_complete, chat_complete
 
 
 # -------------------------------------------------------
@@ -83,25 +72,14 @@ Rules:
 # Agent Function
 # -------------------------------------------------------
 
-def temporal_agent(question: str) -> TemporalResult:
-    """
-    Sends question to LLM, extracts temporal reasoning as JSON,
-    returns TemporalResult.
-    """
-
-    client = _get_llm_client()
-
-    response = client.chat.completions.create(
-        model=GEN_MODEL,
-        temperature=0.1,
-        messages=[
-            {"role": "system", "content": TEMPORAL_PROMPT},
-            {"role": "user", "content": question},
-        ],
-    )
+def _temporal_messages(question: str) -> list:
+    return [
+        {"role": "system", "content": TEMPORAL_PROMPT},
+        {"role": "user", "content": question},
+    ]
 
-    raw = response.choices[0].message.content.strip()
 
+def _parse_temporal(raw: str) -> TemporalResult:
     # Try strict JSON first
     try:
         payload = json.loads(raw)
@@ -118,4 +96,21 @@ def temporal_agent(question: str) -> TemporalResult:
         season_range=payload.get("season_range"),
         episodes=payload.get("episodes", []),
         timeline_queries=payload.get("timeline_queries", []),
-    )
\ No newline at end of file
+    )
+
+
+def temporal_agent(question: str) -> TemporalResult:
+    """
+    Sends question to LLM, extracts temporal reasoning as JSON,
+    returns TemporalResult.
+    """
+
+    raw = chat_complete(_temporal_messages(question), agent="temporal")
+    return _parse_temporal(raw)
+
+
+async def atemporal_agent(question: str) -> TemporalResult:
+    """Async version of temporal_agent (AsyncOpenAI)."""
+
+    raw = await achat_complete(_temporal_messages(question), agent="temporal")
+    return _parse_temporal(raw)
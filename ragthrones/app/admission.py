@@ -0,0 +1,281 @@
+"""
+Admission control for the serving layer
+---------------------------------------
+
+Bounds how many questions run the graph at once, so a burst queues
+(or is turned away) instead of exhausting OpenAI rate limits and memory
+for everyone.
+
+- At most ADMISSION_MAX_CONCURRENCY graph runs in flight.
+- Everything else waits in a priority queue: "interactive" (Gradio UI)
+  ahead of "api" (single /api calls) ahead of "batch" (/api/answer/batch
+  items, warm-cache precompute); FIFO within a class. A finishing
+  request hands its slot straight to the best waiter.
+- When the queue (ADMISSION_MAX_QUEUE) is full, a request evicts the
+  newest waiter of a lower class (which gets Saturated) instead of being
+  rejected, so batch traffic can never lock interactive users out.
+  Only a full queue of same-or-higher-priority waiters rejects it.
+- A rejected / evicted request, or one that waited longer than its
+  class's max wait, raises Saturated -> HTTP 429 with Retry-After
+  (estimated from recent service times and the queue ahead).
+- Warm-cache hits do not take a slot; warm-cache precompute does
+  (pipelines/warm_cache.py, "batch" class).
+- metrics(): in flight, queue depth per class, admitted / rejected /
+  timed-out counts, recent wait and service times (GET /api/metrics).
+
+State is guarded by a lock and each waiter is woken on its own event
+loop, so the server loop and the background loop (warm cache) can
+share one controller. Limits are per process: cloudrun_start.sh runs
+one uvicorn worker, and the service scales out with Cloud Run instances.
+
+Config:
+- ADMISSION_MAX_CONCURRENCY   graph runs in flight (default 8)
+- ADMISSION_MAX_QUEUE         waiting requests, all classes (default 64)
+- ADMISSION_MAX_WAIT_S        max queue wait for interactive / api (default 20)
+- ADMISSION_BATCH_MAX_WAIT_S  max queue wait for batch items (default 60)
+"""
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+import statistics
+import threading
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT_S = float(os.getenv("ADMISSION_MAX_WAIT_S", "20"))
+ADMISSION_BATCH_MAX_WAIT_S = float(os.getenv("ADMISSION_BATCH_MAX_WAIT_S", "60"))
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "api": 1, "batch": 2}
+
+
+class Saturated(Exception):
+    """No slot within the allowed wait (or queue full); retry later."""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"server saturated ({reason}); retry after {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Waiter:
+    """One queued acquire(); state changes only under the controller lock."""
+
+    __slots__ = ("priority", "seq", "cls", "loop", "fut", "state")
+
+    def __init__(self, priority: int, seq: int, cls: str, loop: asyncio.AbstractEventLoop):
+        self.priority = priority
+        self.seq = seq
+        self.cls = cls
+        self.loop = loop
+        self.fut = loop.create_future()  # wake-up signal only
+        self.state = "waiting"           # waiting | granted | evicted | abandoned
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait or {
+            "interactive": ADMISSION_MAX_WAIT_S,
+            "api": ADMISSION_MAX_WAIT_S,
+            "batch": ADMISSION_BATCH_MAX_WAIT_S,
+        }
+
+        self.in_flight = 0
+        self._waiters: List[_Waiter] = []   # heap; may hold non-waiting entries
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+
+        self.admitted: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self.timed_out: Counter = Counter()
+        self._wait_s: deque = deque(maxlen=1000)
+        self._service_s: deque = deque(maxlen=200)
+
+    # ----------------------------------------------------------
+    # Queue state
+    # ----------------------------------------------------------
+    def _live_waiters(self) -> List[_Waiter]:
+        return [w for w in self._waiters if w.state == "waiting"]
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {cls: 0 for cls in PRIORITIES}
+        with self._lock:
+            for w in self._live_waiters():
+                depth[w.cls] += 1
+        return depth
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request."""
+        with self._lock:
+            avg = statistics.fmean(self._service_s) if self._service_s else 5.0
+            ahead = len(self._live_waiters()) + 1
+        return max(1, math.ceil(avg * ahead / self.max_concurrency))
+
+    # ----------------------------------------------------------
+    # Acquire / release
+    # ----------------------------------------------------------
+    async def acquire(self, priority: str = "api") -> float:
+        """Wait for a slot; returns the queue wait (s). Raises Saturated."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown priority class: {priority!r}")
+
+        t0 = time.monotonic()
+        victim: Optional[_Waiter] = None
+        with self._lock:
+            live = self._live_waiters()
+            if self.in_flight < self.max_concurrency and not live:
+                self.in_flight += 1
+                self._admit(priority, 0.0)
+                return 0.0
+
+            if len(live) >= self.max_queue:
+                # Lowest class, newest first
+                victim = max(live, key=lambda w: (w.priority, w.seq), default=None)
+                if victim is None or victim.priority <= PRIORITIES[priority]:
+                    self.rejected[priority] += 1
+                    raise Saturated(self.retry_after(), "queue full")
+                victim.state = "evicted"
+                self.rejected[victim.cls] += 1
+
+            if len(self._waiters) > 2 * max(self.max_queue, 1):
+                self._waiters = live if victim is None else [w for w in live if w is not victim]
+                heapq.heapify(self._waiters)
+
+            waiter = _Waiter(PRIORITIES[priority], next(self._seq), priority, asyncio.get_running_loop())
+            heapq.heappush(self._waiters, waiter)
+
+        if victim is not None:
+            self._wake(victim)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.fut), timeout=self.max_wait[priority])
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter.state == "waiting":
+                    waiter.state = "abandoned"
+                    self.timed_out[priority] += 1
+                    raise Saturated(self.retry_after(), "queue wait exceeded")
+            # granted (or evicted) just as the wait ran out: handled below
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.state == "granted"
+                if waiter.state == "waiting":
+                    waiter.state = "abandoned"
+            if granted:
+                self.release()  # slot was handed over; pass it on
+            raise
+
+        if waiter.state == "evicted":
+            raise Saturated(self.retry_after(), "evicted by a higher-priority request")
+
+        wait = time.monotonic() - t0
+        with self._lock:
+            self._admit(priority, wait)
+        return wait
+
+    def _admit(self, priority: str, wait: float) -> None:
+        self.admitted[priority] += 1
+        self._wait_s.append(wait)
+
+    def _wake(self, waiter: _Waiter) -> None:
+        try:
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.fut)
+        except RuntimeError:  # the waiter's loop is closed
+            with self._lock:
+                granted = waiter.state == "granted"
+                waiter.state = "abandoned"
+            if granted:
+                self.release()
+
+    def release(self, service_s: Optional[float] = None) -> None:
+        """Free a slot: hand it to the best live waiter, else give it back."""
+        with self._lock:
+            if service_s:
+                self._service_s.append(service_s)
+
+            while self._waiters:
+                waiter = heapq.heappop(self._waiters)
+                if waiter.state == "waiting":
+                    waiter.state = "granted"  # in_flight unchanged: slot transferred
+                    break
+            else:
+                self.in_flight -= 1
+                return
+
+        self._wake(waiter)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "api"):
+        await self.acquire(priority)
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - t0)
+
+    # ----------------------------------------------------------
+    # Metrics
+    # ----------------------------------------------------------
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = [w * 1000 for w in self._wait_s]
+            service = list(self._service_s)
+            snapshot = {
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": self.queue_depth(),
+                "max_queue": self.max_queue,
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+                "timed_out": dict(self.timed_out),
+            }
+        return {
+            **snapshot,
+            "wait_ms": {
+                "avg": round(statistics.fmean(waits), 1) if waits else 0.0,
+                "p95": round(_percentile(waits, 95), 1) if waits else 0.0,
+                "max": round(max(waits), 1) if waits else 0.0,
+            },
+            "service_ms_avg": round(statistics.fmean(service) * 1000, 1) if service else None,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+_CONTROLLER: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission() -> AdmissionController:
+    global _CONTROLLER
+    with _controller_lock:
+        if _CONTROLLER is None:
+            _CONTROLLER = AdmissionController()
+        return _CONTROLLER
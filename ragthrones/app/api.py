@@ -1,19 +1,228 @@
-from fastapi import APIRouter
-from ragthrones.retrieval.hybrid_search import hybrid_search_aug
-# from ragthrones.agents.synth import synth_answer
+import os
+import json
+import time
+import asyncio
+from typing import List, Literal, Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from ragthrones.app.admission import Saturated, get_admission
+
+from ragthrones.pipelines.multi_agent_graph import arun_graph, astream_graph
+from ragthrones.pipelines.nss_jobs import get_nss_result, wait_for_nss
+from ragthrones.pipelines.warm_cache import get_warm_state
+from ragthrones.retrieval.hybrid_search import hybrid_search_batch
+from ragthrones.shared.concurrency import run_blocking
+
+# Evidence rows returned per answer
+API_EVIDENCE_K = int(os.getenv("API_EVIDENCE_K", "5"))
+# /answer/batch limits
+API_BATCH_MAX = int(os.getenv("API_BATCH_MAX", "32"))
+API_BATCH_CONCURRENCY = int(os.getenv("API_BATCH_CONCURRENCY", "4"))
+# nss=inline: longest wait for the background score before answering without it
+API_NSS_TIMEOUT = float(os.getenv("API_NSS_TIMEOUT", "60"))
+
+# "background": answer now, poll /api/nss/{request_id} (same instance only:
+#               results live in process memory)
+# "inline":     wait for the score and return it with the answer
+NssMode = Literal["background", "inline"]
 
 router = APIRouter()
 
+
+class BatchRequest(BaseModel):
+    questions: List[str]
+    trivia_mode: Optional[bool] = None
+    nss: NssMode = "background"
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _evidence(hits, k: int = API_EVIDENCE_K) -> list:
+    """Compact evidence: chunk id, episode tag, hybrid + rerank scores."""
+    if hits is None or len(hits) == 0:
+        return []
+    top = hits.head(k)
+    return [
+        {
+            "id": int(cid),
+            "tag": str(tag),
+            "score": round(float(score), 4),
+            "rerank": None if np.isnan(rerank) else round(float(rerank), 4),
+        }
+        for cid, tag, score, rerank in zip(top.ids, top.column("tag"), top.scores, top.rerank_scores)
+    ]
+
+
+def _answer_payload(q: str, state, total_ms: float) -> dict:
+    return {
+        "query": q,
+        "answer": state.answer or "",
+        "route": state.route_decision,
+        "evidence": _evidence(state.reranked if state.reranked is not None else state.retrieved),
+        "timings_ms": {**state.logs.get("timings_ms", {}), "total": total_ms},
+        # nss=background: scored after the response; poll /api/nss/{request_id}
+        "request_id": state.request_id,
+        "nss": state.logs.get("nss"),
+        "nss_score": state.nss_score,
+        "cached": "warm_cache" in state.logs,
+        "coalesced": bool(state.logs.get("coalesced")),
+    }
+
+
+async def _await_nss(state) -> None:
+    """Fill in a pending background NSS score (up to API_NSS_TIMEOUT)."""
+    nss_log = state.logs.get("nss", {})
+    if nss_log.get("status") != "pending":
+        return
+    result = await wait_for_nss(nss_log["request_id"], timeout=API_NSS_TIMEOUT) or {}
+    state.nss_score = result.get("nss_score")
+    state.logs["nss"] = {**nss_log, "status": result.get("status", "expired")}
+
+
+async def _answer_one(
+    q: str,
+    trivia_mode: Optional[bool] = None,
+    priority: str = "api",
+    nss: NssMode = "background",
+) -> dict:
+    t0 = time.perf_counter()
+    state = get_warm_state(q, trivia_mode)
+    if state is None:
+        # Saturated -> 429 + Retry-After (handler in main.py)
+        async with get_admission().slot(priority):
+            state = await arun_graph(q, trivia_mode)
+    if nss == "inline":
+        await _await_nss(state)
+    return _answer_payload(q, state, _ms(t0))
+
 @router.get("/health")
 def health():
     return {"status": "ok"}
 
-@router.get("/answer")
-def answer(q: str):
-    reranked = hybrid_search_aug(q)
-    # answer = synth_answer(q, reranked)
-    return {
-        "query": q,
-        "answer": "Synthesis not implemented yet",
-        "top_chunks": reranked[:3]
-    }
\ No newline at end of file
+@router.get("/metrics", response_class=ORJSONResponse)
+def metrics():
+    # Admission queue depth / wait times, for dashboards and autoscaling
+    return ORJSONResponse({"admission": get_admission().metrics()})
+
+@router.get("/answer", response_class=ORJSONResponse)
+async def answer(q: str, trivia_mode: Optional[bool] = None, nss: NssMode = "background"):
+    # Full multi-agent graph, awaited on the server's event loop.
+    # Clients that cannot rely on reaching the same instance again
+    # (scale-out, scale-to-zero) should pass nss=inline instead of polling.
+    return ORJSONResponse(await _answer_one(q, trivia_mode, nss=nss))
+
+
+@router.post("/answer/batch", response_class=ORJSONResponse)
+async def answer_batch(req: BatchRequest):
+    """
+    Many questions in one call: the raw-question retrieval for all of
+    them is prefetched with one embedding call + one FAISS search, then
+    the graphs run with at most API_BATCH_CONCURRENCY in flight, each
+    admitted at "batch" priority (behind UI and single API requests).
+    A failing or rejected question gets {"query", "error"} instead of
+    failing the batch; if every question is rejected, the batch is a 429.
+    """
+    questions = [q for q in req.questions if q and q.strip()]
+    if len(questions) > API_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {API_BATCH_MAX} questions per batch")
+
+    t0 = time.perf_counter()
+    try:
+        # Same (query, topk) the flows' raw-question search uses -> cache hits
+        await run_blocking(hybrid_search_batch, questions, topk=15)
+    except Exception as e:
+        print(f"[WARN] Batch retrieval prefetch failed: {e}")
+    prefetch_ms = _ms(t0)
+
+    sem = asyncio.Semaphore(max(1, API_BATCH_CONCURRENCY))
+
+    rejected: List[Saturated] = []
+
+    async def one(q: str) -> dict:
+        async with sem:
+            try:
+                return await _answer_one(q, req.trivia_mode, priority="batch", nss=req.nss)
+            except Saturated as e:
+                rejected.append(e)
+                return {"query": q, "error": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                return {"query": q, "error": str(e)}
+
+    results = await asyncio.gather(*(one(q) for q in questions))
+    if questions and len(rejected) == len(questions):
+        raise rejected[0]
+    return ORJSONResponse({
+        "results": results,
+        "timings_ms": {"prefetch": prefetch_ms, "total": _ms(t0)},
+    })
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/answer/stream")
+async def answer_stream(q: str):
+    """
+    Server-Sent Events: "node" / "agent" events as graph nodes and
+    analysis agents finish, "token" events with answer deltas as they
+    are generated, and a final "done" event with the full answer.
+    The slot is taken before the response starts, so a saturated
+    server still answers 429 rather than an empty stream.
+    """
+    admission = get_admission()
+    await admission.acquire("api")
+    t0 = time.monotonic()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            admission.release(time.monotonic() - t0)
+
+    async def events():
+        try:
+            async for event in astream_graph(q):
+                kind = event["type"]
+                if kind == "token":
+                    yield _sse("token", {"text": event["text"]})
+                    continue
+                if kind == "node":
+                    yield _sse("node", {"node": event["node"]})
+                    continue
+                if kind == "agent":
+                    yield _sse("agent", {"agent": event["agent"], "result": event["result"]})
+                    continue
+                state = event["state"]
+                yield _sse("done", {
+                    "query": q,
+                    "answer": state.answer or "",
+                    "route": state.route_decision,
+                    "request_id": state.request_id,
+                    "nss": state.logs.get("nss"),
+                })
+        finally:
+            release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also runs if the client disconnects before the stream starts
+        background=BackgroundTask(release),
+    )
+
+
+@router.get("/nss/{request_id}")
+def nss(request_id: str):
+    result = get_nss_result(request_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired request_id")
+    return result
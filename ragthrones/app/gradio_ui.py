@@ -1,13 +1,35 @@
 # ragthrones/app/gradio_ui.py
+import os
 import json
 import gradio as gr
 import pandas as pd
 
-from ragthrones.pipelines.multi_agent_graph import app, AgentState
+from ragthrones.app.admission import Saturated, get_admission
+from ragthrones.pipelines.multi_agent_graph import astream_graph
+from ragthrones.pipelines.nss_jobs import wait_for_nss
+from ragthrones.pipelines.warm_cache import get_warm_state, start_warm_cache
+from ragthrones.retrieval.retrieval_result import as_frame
 from ragthrones.retrieval.load_vectorstore import load_all_vectorstore
 
 VS = load_all_vectorstore()
 
+# How long the UI keeps waiting for a background NSS score
+NSS_UI_TIMEOUT = float(os.getenv("NSS_UI_TIMEOUT", "90"))
+
+NSS_PENDING_HTML = "<p>⏳ Scoring narrative structure (NSS)…</p>"
+
+# Test prompt buttons; also the default hot questions for the warm cache
+TEST_PROMPTS = {
+    "Factual (Who/What)": "Who killed Tywin Lannister?",
+    "Causality Agent": "Why did Arya decide to leave Winterfell in Season 1?",
+    "Emotion Agent": "How did Jon Snow feel after killing Daenerys?",
+    "Temporal Agent": "When did Brienne get knighted?",
+    "Narrative Agent": "Why did the Red Wedding happen?",
+    "Alternate Ending (S1–7 only)": "Rewrite the ending of Season 8 based only on Seasons 1–7.",
+    "Hybrid Search Test": "What happened at Hardhome?",
+    "Deep Lore (Complex Retrieval)": "What were Littlefinger’s motives for starting the War of the Five Kings?"
+}
+
 def build_nss_panel(nss: dict) -> str:
     """Return a styled HTML panel for the Narrative Scoring System results."""
     if not nss or "scores" not in nss:
@@ -153,9 +175,68 @@ def build_evidence_html(df, k=10):
 # ------------------------------------------------------------
 # Pipeline runner
 # ------------------------------------------------------------
-def run_cosine(question: str):
+PENDING_TEXT = "⏳ Working…"
+
+
+def _answer_update(answer: str):
+    """Outputs tuple that only updates the answer box (streaming)."""
+    return (answer,) + tuple(gr.update() for _ in range(5))
+
+
+def _progress_update(answer=None, analysis=None, evidence=None, narrative=None, nss=None, logs=None):
+    """Outputs tuple for a partial update (None = leave that output as is)."""
+    return tuple(
+        gr.update() if v is None else v
+        for v in (answer, analysis, evidence, narrative, nss, logs)
+    )
+
+
+def render_agent_progress(results: dict, planned: list):
+    """Analysis cards + narrative summary from the agents finished so far."""
+    def info(name, key):
+        if name in results:
+            return results[name].get(key, []) if isinstance(results[name], dict) else []
+        return None if name in planned else []
+
+    narrative = results.get("narrative")
+    summary = narrative.get("narrative_summary", "") if isinstance(narrative, dict) else None
+
+    return _progress_update(
+        analysis=_analysis_cards(info("causal", "causal_links"), info("emotion", "character_entities")),
+        narrative=summary,
+    )
+
+
+def render_node_progress(node: str, state, answer: str):
+    """Partial outputs after a graph node finished."""
+    hits = state.reranked if state.reranked is not None else state.retrieved
+    evidence = build_evidence_html(as_frame(hits)) if hits is not None else None
+
+    pending = None
+    if node == "router" and state.plan.get("analysis"):
+        pending = _analysis_cards(
+            None if "causal" in state.plan["analysis"] else [],
+            None if "emotion" in state.plan["analysis"] else [],
+        )
+
+    return _progress_update(
+        answer=state.answer or (answer if answer else None),
+        analysis=pending,
+        evidence=evidence,
+        nss=NSS_PENDING_HTML if node == "nss_scoring" else None,
+        logs=_logs_text(state.logs),
+    )
+
+
+async def run_cosine(question: str):
+    """
+    Progressive updates while the graph runs: evidence right after
+    reranking, analysis cards as each agent finishes, the answer as it
+    is generated, then every panel once the graph finishes; when NSS
+    runs in the background, yields again once the score is ready.
+    """
     if not question.strip():
-        return (
+        yield (
             "Please enter a question.",
             "<p>No analysis.</p>",
             "<p>No evidence.</p>",
@@ -163,11 +244,58 @@ def run_cosine(question: str):
             "",
             ""
         )
+        return
+
+    # Hot questions (test prompts, ...) are precomputed at startup
+    final_state = get_warm_state(question)
+    if final_state is not None:
+        yield render_outputs(final_state, build_nss_panel(final_state.nss_score or {}))
+        return
+
+    # Runs on Gradio's event loop: concurrent users overlap their
+    # LLM / retrieval waits instead of each holding a worker thread.
+    # UI questions are admitted ahead of API / batch traffic.
+    answer = ""
+    agent_results: dict = {}
+    planned: list = []
+    try:
+        async with get_admission().slot("interactive"):
+            async for event in astream_graph(question):
+                kind = event["type"]
+                if kind == "token":
+                    answer += event["text"]
+                    yield _answer_update(answer)
+                elif kind == "agent":
+                    agent_results[event["agent"]] = event["result"]
+                    yield render_agent_progress(agent_results, planned)
+                elif kind == "node":
+                    if event["node"] == "router":
+                        planned = list(event["state"].plan.get("analysis", []))
+                    yield render_node_progress(event["node"], event["state"], answer)
+                else:
+                    final_state = event["state"]
+    except Saturated as e:
+        yield _answer_update(
+            f"The Citadel is busy answering other questions. "
+            f"Please try again in about {e.retry_after} s."
+        )
+        return
+
+    nss_log = final_state.logs.get("nss", {})
+    if nss_log.get("status") != "pending":
+        yield render_outputs(final_state, build_nss_panel(final_state.nss_score or {}))
+        return
+
+    yield render_outputs(final_state, NSS_PENDING_HTML)
+
+    result = await wait_for_nss(nss_log["request_id"], timeout=NSS_UI_TIMEOUT) or {}
+    final_state.nss_score = result.get("nss_score")
+    final_state.logs["nss"] = {**nss_log, "status": result.get("status", "expired")}
 
-    init_state = AgentState(question=question)
-    raw = app.invoke(init_state)
-    final_state = AgentState(**raw)
+    yield render_outputs(final_state, build_nss_panel(final_state.nss_score or {}))
 
+
+def render_outputs(final_state, nss_panel: str):
     # -------------------------------
     # Final Answer
     # -------------------------------
@@ -179,49 +307,52 @@ def run_cosine(question: str):
     causal_info = final_state.causal.get("causal_links", [])
     emotion_info = final_state.emotion.get("character_entities", [])
     narrative_summary = final_state.narrative.get("narrative_summary", "")
-    nss_score = final_state.nss_score or {}
+
+    analysis_cards = _analysis_cards(causal_info, emotion_info)
+
+    # Evidence
+    evidence_html = build_evidence_html(as_frame(final_state.reranked))
+
+    return (
+        answer,
+        analysis_cards,
+        evidence_html,
+        narrative_summary,
+        nss_panel,   # <-- updated to use the HTML panel
+        _logs_text(final_state.logs)
+    )
+
+
+def _analysis_cards(causal_info, emotion_info) -> str:
+    """Causality + emotion cards (None = agent still running)."""
+    def body(items, empty):
+        if items is None:
+            return PENDING_TEXT
+        return '<br>'.join(items) if items else empty
 
     causal_html = f"""
     <div style='padding:16px; border:1px solid #ddd; border-radius:8px; background:#fff8e8;'>
         <h3 style='margin:0;'>🧠 Causality Agent Report</h3>
-        <p style='margin-top:8px; font-size:15px;'>{'<br>'.join(causal_info) if causal_info else 'No causal links found.'}</p>
+        <p style='margin-top:8px; font-size:15px;'>{body(causal_info, 'No causal links found.')}</p>
     </div>
     """
 
     emotion_html = f"""
     <div style='padding:16px; border:1px solid #ddeaff; border-radius:8px; background:#f5faff;'>
         <h3 style='margin:0;'>🔥 Emotion Agent Report</h3>
-        <p style='margin-top:8px; font-size:15px;'>{'<br>'.join(emotion_info) if emotion_info else 'No emotional indicators found.'}</p>
+        <p style='margin-top:8px; font-size:15px;'>{body(emotion_info, 'No emotional indicators found.')}</p>
     </div>
     """
 
-    analysis_cards = causal_html + "<br>" + emotion_html
+    return causal_html + "<br>" + emotion_html
 
-    # Evidence
-    evidence_html = build_evidence_html(final_state.reranked)
 
+def _logs_text(logs: dict) -> str:
     # Debug logs
     try:
-        logs = json.dumps(final_state.logs, indent=2)
-    except Exception:
-        logs = str(final_state.logs)
-
-    # NSS Scoring (proper JSON)
-    try:
-        nss_json = json.dumps(nss_score, indent=2)
+        return json.dumps(logs, indent=2)
     except Exception:
-        nss_json = str(nss_score)
-
-    nss_panel = build_nss_panel(nss_score)
-
-    return (
-        answer,
-        analysis_cards,
-        evidence_html,
-        narrative_summary,
-        nss_panel,   # <-- updated to use the HTML panel
-        logs        # <-- correct
-    )
+        return str(logs)
 
 def build_nss_panel(nss: dict) -> str:
     if not nss or "scores" not in nss:
@@ -276,16 +407,8 @@ def build_ui():
         Ask a Game of Thrones question and watch the agents work.
         """)
 
-        TEST_PROMPTS = {
-            "Factual (Who/What)": "Who killed Tywin Lannister?",
-            "Causality Agent": "Why did Arya decide to leave Winterfell in Season 1?",
-            "Emotion Agent": "How did Jon Snow feel after killing Daenerys?",
-            "Temporal Agent": "When did Brienne get knighted?",
-            "Narrative Agent": "Why did the Red Wedding happen?",
-            "Alternate Ending (S1–7 only)": "Rewrite the ending of Season 8 based only on Seasons 1–7.",
-            "Hybrid Search Test": "What happened at Hardhome?",
-            "Deep Lore (Complex Retrieval)": "What were Littlefinger’s motives for starting the War of the Five Kings?"
-        }
+        # Precompute the test prompts in the background (or load the snapshot)
+        start_warm_cache(TEST_PROMPTS.values())
 
         with gr.Row():
 
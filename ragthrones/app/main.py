@@ -1,9 +1,15 @@
 import os
+
+# Size FAISS / torch / tokenizer threads before those libraries load
+from ragthrones.shared.threads import apply_thread_budget
+apply_thread_budget()
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 
+from ragthrones.app.admission import Saturated
 from ragthrones.app.api import router as api_router
 from ragthrones.app.gradio_ui import build_ui
 
@@ -24,6 +30,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------------------------------------------------
+# Admission control: saturated -> 429 + Retry-After
+# ---------------------------------------------------------
+@app.exception_handler(Saturated)
+async def saturated_handler(request: Request, exc: Saturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # ---------------------------------------------------------
 # API routes
 # ---------------------------------------------------------
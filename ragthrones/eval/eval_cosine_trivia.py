@@ -20,8 +20,16 @@
 #
 # Output:
 #   eval/funtrivia_cosine_eval.csv
+#
+# LLM responses at temperature 0 are cached on disk (SQLite), so
+# reruns only pay for questions/prompts that changed.
+# Set LLM_CACHE=off to force fresh calls.
+#
+# EVAL_NSS=1 also NSS-scores every answer after the loop, using the
+# batch scorer (several answers per LLM call, batches in parallel).
 # =============================================
 
+import os
 import re
 import time
 from collections import Counter
@@ -33,8 +41,16 @@ from tqdm import tqdm
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from ragthrones.llm.llm_client import configure_llm_cache
+from ragthrones.agents.nss_batch_agent import score_batch
 from ragthrones.pipelines.multi_agent_graph import app, AgentState
 
+# Persistent response cache so eval reruns are (nearly) free
+llm_cache = configure_llm_cache(os.getenv("LLM_CACHE", "sqlite"))
+
+# Batch NSS scoring of all answers after the eval loop
+EVAL_NSS = os.getenv("EVAL_NSS", "0") == "1"
+
 
 # -------------------------------------------
 # Helper: run_graph (evaluation-friendly)
@@ -121,6 +137,7 @@ def semantic_sim(pred: str, gold: str) -> float:
 # Evaluation Loop
 # -------------------------------------------
 results = []
+finals = {}  # results index -> final AgentState (for batch NSS)
 error_count = 0
 
 for i, row in tqdm(dfg.iterrows(), total=len(dfg), desc="Evaluating Cosine of Thrones on Trivia"):
@@ -144,6 +161,7 @@ for i, row in tqdm(dfg.iterrows(), total=len(dfg), desc="Evaluating Cosine of Th
         nss_score = getattr(final, "nss_score", None) or {}
         nss_total = nss_score.get("total_weighted_score", None)
 
+        finals[len(results)] = final
         results.append({
             "qnum": row.get("qnum", i + 1),
             "question": q,
@@ -175,6 +193,18 @@ for i, row in tqdm(dfg.iterrows(), total=len(dfg), desc="Evaluating Cosine of Th
     time.sleep(0.25)
 
 
+# -------------------------------------------
+# Batch NSS (optional)
+# -------------------------------------------
+if EVAL_NSS and finals:
+    t0 = time.time()
+    idxs = list(finals)
+    nss_scores = score_batch([finals[j] for j in idxs])
+    for j, nss in zip(idxs, nss_scores):
+        results[j]["nss_total_weighted"] = nss.get("total_weighted_score")
+    print(f"NSS scored {len(idxs)} answers in {time.time() - t0:.1f}s (batch mode)")
+
+
 # -------------------------------------------
 # Aggregate Metrics & Save CSV
 # -------------------------------------------
@@ -191,6 +221,11 @@ print(f"Semantic Similarity:    {avg_sem:.3f}")
 print(f"Total questions:        {len(df_eval)}")
 print(f"Errors:                 {error_count}")
 
+if llm_cache is not None:
+    cache_stats = llm_cache.stats()
+    print(f"LLM cache hit rate:     {cache_stats['hit_rate']:.3f} "
+          f"({cache_stats['hits']} hits / {cache_stats['misses']} misses)")
+
 OUT_DIR = Path("eval")
 OUT_DIR.mkdir(exist_ok=True)
 OUT_PATH = OUT_DIR / "funtrivia_cosine_eval.csv"
@@ -0,0 +1,316 @@
+"""
+Deterministic LLM response cache
+--------------------------------
+
+Caches chat completions that were made at temperature 0, keyed by
+(model, messages hash, temperature, extra params). Identical agent
+inputs (UI repeats, eval reruns) are then served without calling OpenAI.
+
+Backends:
+- MemoryCacheBackend: in-process LRU, evicts by total size in bytes
+- SQLiteCacheBackend: on-disk LRU shared across runs/processes
+
+Exports:
+- make_cache_key(...)
+- LLMResponseCache
+- configure_llm_cache(backend, path, max_bytes)
+- get_llm_cache()
+
+Env config:
+- LLM_CACHE            "memory" (default) | "sqlite" | "off"
+- LLM_CACHE_PATH       SQLite file (default ragthrones/data/llm_cache.sqlite)
+- LLM_CACHE_MAX_BYTES  size cap before LRU eviction
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_ROOT = os.path.abspath(os.path.join(BASE_DIR, ".."))
+DEFAULT_SQLITE_PATH = os.path.join(PACKAGE_ROOT, "data", "llm_cache.sqlite")
+
+DEFAULT_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SQLITE_MAX_BYTES = 512 * 1024 * 1024
+
+
+# ------------------------------------------------------------
+# Cache key
+# ------------------------------------------------------------
+def make_cache_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Stable sha256 key over everything that determines the completion.
+    """
+    messages_hash = hashlib.sha256(
+        json.dumps(messages, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+    blob = json.dumps(
+        {
+            "model": model,
+            "messages": messages_hash,
+            "temperature": float(temperature),
+            "params": params or {},
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------
+# Backends
+# ------------------------------------------------------------
+class MemoryCacheBackend:
+    """In-process LRU bounded by total value size (bytes)."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.encode("utf-8"))
+
+            self._data[key] = value
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and self._data:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted.encode("utf-8"))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk LRU (by last access time) bounded by total value size.
+
+    The byte total is summed once on open and then kept as a running
+    count (updated on insert / delete), so a set() does not scan the
+    table. Entries written by other processes are counted the next time
+    the cache is opened.
+    """
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH,
+                 max_bytes: int = DEFAULT_SQLITE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)"
+        )
+        self._conn.commit()
+        self._bytes = self._sum_sizes()
+
+    def _sum_sizes(self) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        while self._bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (row[0],))
+            self._bytes -= row[1]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._bytes = 0
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+# ------------------------------------------------------------
+# Cache front-end with hit-rate stats
+# ------------------------------------------------------------
+class LLMResponseCache:
+    """
+    Thin wrapper over a backend that tracks hits / misses / stores.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(key, value)
+        with self._lock:
+            self.stores += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, stores = self.hits, self.misses, self.stores
+        lookups = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "size_bytes": self.backend.size_bytes(),
+            "hits": hits,
+            "misses": misses,
+            "stores": stores,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# ------------------------------------------------------------
+# Process-wide cache (configured from env, overridable)
+# ------------------------------------------------------------
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_CONFIGURED = False
+_cache_lock = threading.Lock()
+
+
+def configure_llm_cache(
+    backend: Optional[str] = None,
+    path: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+) -> Optional[LLMResponseCache]:
+    """
+    (Re)configure the process-wide cache.
+    backend: "memory" | "sqlite" | "off" (default from LLM_CACHE env)
+    """
+    global _CACHE, _CACHE_CONFIGURED
+
+    backend = (backend or os.getenv("LLM_CACHE", "memory")).lower()
+    if max_bytes is None and os.getenv("LLM_CACHE_MAX_BYTES"):
+        max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES"))
+
+    with _cache_lock:
+        if backend in ("off", "none", "0", "false"):
+            _CACHE = None
+        elif backend == "sqlite":
+            _CACHE = LLMResponseCache(SQLiteCacheBackend(
+                path=path or os.getenv("LLM_CACHE_PATH", DEFAULT_SQLITE_PATH),
+                max_bytes=max_bytes or DEFAULT_SQLITE_MAX_BYTES,
+            ))
+        elif backend == "memory":
+            _CACHE = LLMResponseCache(MemoryCacheBackend(
+                max_bytes=max_bytes or DEFAULT_MEMORY_MAX_BYTES,
+            ))
+        else:
+            raise ValueError(f"Unknown LLM_CACHE backend: {backend!r}")
+
+        _CACHE_CONFIGURED = True
+
+    return _CACHE
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the active cache (None when disabled)."""
+    if not _CACHE_CONFIGURED:
+        configure_llm_cache()
+    return _CACHE
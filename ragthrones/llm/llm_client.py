@@ -2,15 +2,38 @@
 Unified LLM client for all Cosine of Thrones agents.
 Exports:
 - GEN_MODEL
-- get_llm_client()
+- AGENT_CONFIG / get_agent_config(agent)
+- get_http_client()   (shared keep-alive connection pool)
+- get_llm_client()    (pooled singleton OpenAI client)
+- get_async_llm_client() (AsyncOpenAI, one pool per event loop)
+- get_chat_model(agent)  (LangChain model on the same pool)
+- chat_complete(messages, agent=..., use_cache=True)
+- achat_complete(messages, agent=..., use_cache=True)  (async)
+- astream_chat_complete(messages, agent=..., on_delta=...)  (async, streamed)
+- get_llm_cache() / configure_llm_cache()  (re-exported from llm_cache)
 - llm_client   (singleton OpenAI client)
 - llm_chat(prompt)
 """
 
 import os
-from openai import OpenAI
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
 
+from ragthrones.llm.llm_cache import (
+    SQLiteCacheBackend,
+    configure_llm_cache,
+    get_llm_cache,
+    make_cache_key,
+)
+from ragthrones.shared.concurrency import run_blocking
+
 load_dotenv()
 
 # ----------------------------------------------------------
@@ -20,23 +43,337 @@ GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
 
 
 # ----------------------------------------------------------
-# Constructor for fresh OpenAI client
+# Per-agent model / temperature config
+# ----------------------------------------------------------
+# Override any entry with LLM_MODEL_<AGENT> / LLM_TEMPERATURE_<AGENT>,
+# e.g. LLM_MODEL_NSS=gpt-4o or LLM_TEMPERATURE_SYNTHESIZER=0.3
+AGENT_CONFIG: Dict[str, Dict[str, Any]] = {
+    "default":          {"model": GEN_MODEL,     "temperature": 0.1},
+    "decomposer":       {"model": "gpt-4o-mini", "temperature": 0.0},
+    "temporal":         {"model": GEN_MODEL,     "temperature": 0.1},
+    "narrative":        {"model": GEN_MODEL,     "temperature": 0.0},
+    "causal":           {"model": GEN_MODEL,     "temperature": 0.0},
+    "emotion":          {"model": GEN_MODEL,     "temperature": 0.0},
+    "analysis":         {"model": GEN_MODEL,     "temperature": 0.0},
+    "synthesizer":      {"model": GEN_MODEL,     "temperature": 0.1},
+    "alternate_ending": {"model": GEN_MODEL,     "temperature": 0.1},
+    "nss":              {"model": "gpt-4o-mini", "temperature": 0.0},
+    "cosine_pipeline":  {"model": GEN_MODEL,     "temperature": 0.2},
+    "retrieval":        {"model": GEN_MODEL,     "temperature": 0.0},
+}
+
+
+def get_agent_config(agent: str = "default") -> Dict[str, Any]:
+    """
+    Return {"model", "temperature"} for an agent,
+    applying LLM_MODEL_<AGENT> / LLM_TEMPERATURE_<AGENT> env overrides.
+    """
+    cfg = dict(AGENT_CONFIG.get(agent, AGENT_CONFIG["default"]))
+
+    key = agent.upper()
+    model = os.getenv(f"LLM_MODEL_{key}")
+    temperature = os.getenv(f"LLM_TEMPERATURE_{key}")
+
+    if model:
+        cfg["model"] = model
+    if temperature is not None and temperature != "":
+        cfg["temperature"] = float(temperature)
+
+    return cfg
+
+
+# ----------------------------------------------------------
+# Shared HTTP connection pool
+# ----------------------------------------------------------
+# One keep-alive pool for every agent, so TLS + connection setup
+# is paid once per process instead of once per call.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_llm_instance: Optional[OpenAI] = None
+_chat_models: Dict[str, Any] = {}
+
+# AsyncOpenAI clients are bound to the loop their connections live on,
+# so keep one per running event loop (dropped when the loop goes away).
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Shared httpx client (keep-alive, HTTP/2 when h2 is installed).
+    """
+    global _http_client
+
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    http2=HTTP2_AVAILABLE,
+                    limits=_pool_limits(),
+                    timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+                )
+    return _http_client
+
+
+# ----------------------------------------------------------
+# Pooled OpenAI client (singleton)
 # ----------------------------------------------------------
-def get_llm_client():
+def get_llm_client() -> OpenAI:
+    """
+    Return the process-wide OpenAI client.
+    All agents share it (and its connection pool).
+    """
+    global _llm_instance
+
+    if _llm_instance is None:
+        api_key = _require_api_key()
+
+        http_client = get_http_client()
+        with _lock:
+            if _llm_instance is None:
+                _llm_instance = OpenAI(api_key=api_key, http_client=http_client)
+    return _llm_instance
+
+
+def _require_api_key() -> str:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set in environment.")
-    return OpenAI(api_key=api_key)
+    return api_key
+
+
+def get_async_llm_client() -> AsyncOpenAI:
+    """
+    Return the AsyncOpenAI client for the running event loop.
+    Each loop gets its own keep-alive pool; all agents on that loop share it.
+    """
+    loop = asyncio.get_running_loop()
+
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=_require_api_key(),
+                http_client=httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    limits=_pool_limits(),
+                    timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+                ),
+            )
+            _async_clients[loop] = client
+    return client
+
+
+def get_chat_model(agent: str = "default"):
+    """
+    LangChain chat model for an agent, wired to the shared pool.
+    Cached per agent so repeated calls reuse one instance.
+    """
+    if agent in _chat_models:
+        return _chat_models[agent]
+
+    from langchain.chat_models import init_chat_model
+
+    cfg = get_agent_config(agent)
+    model = init_chat_model(
+        cfg["model"],
+        temperature=cfg["temperature"],
+        http_client=get_http_client(),
+    )
+
+    with _lock:
+        _chat_models.setdefault(agent, model)
+    return _chat_models[agent]
 
 
 # ----------------------------------------------------------
-# Singleton OpenAI client instance
+# Chat completion helper used by every agent
 # ----------------------------------------------------------
-_llm_instance = get_llm_client()
+def _resolve_call(
+    messages: List[Dict[str, str]],
+    agent: str,
+    model: Optional[str],
+    temperature: Optional[float],
+    use_cache: bool,
+    params: Dict[str, Any],
+) -> Tuple[str, float, Any, Optional[str]]:
+    """
+    Resolve model/temperature from AGENT_CONFIG and pick the cache.
+    Only temperature-0 calls are cacheable (deterministic).
+    Returns (model, temperature, cache_or_None, cache_key_or_None).
+    """
+    cfg = get_agent_config(agent)
+    if model is None:
+        model = cfg["model"]
+    if temperature is None:
+        temperature = cfg["temperature"]
+
+    cache = get_llm_cache() if use_cache and float(temperature) == 0.0 else None
+    key = make_cache_key(model, messages, temperature, params) if cache is not None else None
+    return model, temperature, cache, key
 
+
+def chat_complete(
+    messages: List[Dict[str, str]],
+    agent: str = "default",
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    use_cache: bool = True,
+    **params,
+) -> str:
+    """
+    Run a chat completion with the agent's configured model/temperature
+    (explicit model/temperature arguments win). Returns stripped text.
+
+    Temperature-0 calls are deterministic, so they are served from /
+    stored in the response cache. Pass use_cache=False to force a fresh call.
+    """
+    model, temperature, cache, key = _resolve_call(
+        messages, agent, model, temperature, use_cache, params
+    )
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    response = get_llm_client().chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=messages,
+        **params,
+    )
+
+    text = (response.choices[0].message.content or "").strip()
+
+    if cache is not None and text:
+        cache.set(key, text)
+
+    return text
+
+
+async def _acache_get(cache, key: str) -> Optional[str]:
+    """Cache lookup from a coroutine; SQLite I/O runs off the event loop."""
+    if isinstance(cache.backend, SQLiteCacheBackend):
+        return await run_blocking(cache.get, key)
+    return cache.get(key)
+
+
+async def _acache_set(cache, key: str, text: str) -> None:
+    if isinstance(cache.backend, SQLiteCacheBackend):
+        await run_blocking(cache.set, key, text)
+    else:
+        cache.set(key, text)
+
+
+async def achat_complete(
+    messages: List[Dict[str, str]],
+    agent: str = "default",
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    use_cache: bool = True,
+    **params,
+) -> str:
+    """
+    Async twin of chat_complete() on the loop's AsyncOpenAI client.
+    Shares the same agent config and response cache.
+    """
+    model, temperature, cache, key = _resolve_call(
+        messages, agent, model, temperature, use_cache, params
+    )
+
+    if cache is not None:
+        cached = await _acache_get(cache, key)
+        if cached is not None:
+            return cached
+
+    response = await get_async_llm_client().chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=messages,
+        **params,
+    )
+
+    text = (response.choices[0].message.content or "").strip()
+
+    if cache is not None and text:
+        await _acache_set(cache, key, text)
+
+    return text
+
+
+async def astream_chat_complete(
+    messages: List[Dict[str, str]],
+    on_delta: Callable[[str], None],
+    agent: str = "default",
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    use_cache: bool = True,
+    **params,
+) -> str:
+    """
+    Streamed achat_complete(): on_delta(text) is called for every content
+    delta as it arrives; returns the full stripped text.
+    A cache hit is delivered as a single delta.
+    """
+    model, temperature, cache, key = _resolve_call(
+        messages, agent, model, temperature, use_cache, params
+    )
+
+    if cache is not None:
+        cached = await _acache_get(cache, key)
+        if cached is not None:
+            on_delta(cached)
+            return cached
+
+    stream = await get_async_llm_client().chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=messages,
+        stream=True,
+        **params,
+    )
+
+    parts: List[str] = []
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            on_delta(delta)
+
+    text = "".join(parts).strip()
+
+    if cache is not None and text:
+        await _acache_set(cache, key, text)
+
+    return text
+
+
+# ----------------------------------------------------------
+# Singleton OpenAI client instance
+# ----------------------------------------------------------
 # IMPORTANT:
 # llm_client is NOW a real OpenAI client, NOT a function.
-llm_client = _llm_instance
+llm_client = get_llm_client()
 
 
 # ----------------------------------------------------------
@@ -50,13 +387,8 @@ def llm_chat(prompt: str,
     llm_chat("Hello") → returns just text.
     """
 
-    if model is None:
-        model = GEN_MODEL
-
-    response = llm_client.chat.completions.create(
+    return chat_complete(
+        [{"role": "user", "content": prompt}],
         model=model,
         temperature=temperature,
-        messages=[{"role": "user", "content": prompt}]
     )
-
-    return response.choices[0].message.content.strip()
\ No newline at end of file
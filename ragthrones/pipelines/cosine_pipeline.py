@@ -8,29 +8,13 @@ This module:
 - Returns answer + retrieved evidence
 """
 
-import os
 import pandas as pd
 
-from openai import OpenAI
-
+from ragthrones.llm.llm_client import chat_complete
 from ragthrones.retrieval.hybrid_search import hybrid_search
 from ragthrones.retrieval.evidence_builder import build_evidence_html
 
 
-# -----------------------------
-# LLM client setup
-# -----------------------------
-
-GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
-
-
-def _get_llm_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY not set in environment.")
-    return OpenAI(api_key=api_key)
-
-
 # -----------------------------
 # Helper: build context string
 # -----------------------------
@@ -55,8 +39,6 @@ def _generate_answer(query: str, context: str) -> str:
     """
     Call the LLM with the query and retrieved context.
     """
-    client = _get_llm_client()
-
     system_prompt = (
         "You are an expert assistant for Game of Thrones lore. "
         "Use ONLY the provided context to answer the question. "
@@ -69,17 +51,14 @@ def _generate_answer(query: str, context: str) -> str:
         "Answer concisely in 3–5 sentences."
     )
 
-    resp = client.chat.completions.create(
-        model=GEN_MODEL,
-        messages=[
+    return chat_complete(
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        temperature=0.2,
+        agent="cosine_pipeline",
     )
 
-    return resp.choices[0].message.content.strip()
-
 
 # -----------------------------
 # Public pipeline function
@@ -0,0 +1,136 @@
+"""
+Route-aware execution plans for the multi-agent graph
+-----------------------------------------------------
+
+The router picks a flow; the execution plan decides which of the
+expensive downstream stages that flow actually needs:
+
+- analysis:   subset of ["narrative", "causal", "emotion"]
+- synthesize: run the synthesizer (False when the flow writes its own answer)
+- nss:        run Narrative Scoring System on the final answer
+
+Defaults (EXECUTION_PLAN=adaptive):
+- trivia (trivia_mode=True) and factual lookups -> no analysis, no NSS
+- "why" questions (narrative_flow)                -> causal + narrative
+- temporal / basic                               -> narrative
+- emotion agent                                  -> only when emotional cues appear
+- alternate endings                              -> no analysis, NSS on the scene
+
+Config:
+- EXECUTION_PLAN            "adaptive" (default) | "full" (every agent + NSS)
+- EXECUTION_PLAN_OVERRIDES  JSON per route (or "trivia"), e.g. '{"temporal_flow": {"nss": false}}'
+"""
+
+import os
+import re
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+
+ANALYSIS_AGENTS = ["narrative", "causal", "emotion"]
+
+EXECUTION_PLAN = os.getenv("EXECUTION_PLAN", "adaptive")
+
+
+# ------------------------------------------------------------
+# Per-route defaults
+# ------------------------------------------------------------
+ROUTE_PLANS: Dict[str, Dict[str, Any]] = {
+    "factual_flow":          {"analysis": [],                       "synthesize": True,  "nss": False},
+    "temporal_flow":         {"analysis": ["narrative"],            "synthesize": True,  "nss": True},
+    "narrative_flow":        {"analysis": ["causal", "narrative"],  "synthesize": True,  "nss": True},
+    "basic_rag_flow":        {"analysis": ["narrative"],            "synthesize": True,  "nss": True},
+    "alternate_ending_flow": {"analysis": [],                       "synthesize": False, "nss": True},
+}
+
+TRIVIA_PLAN: Dict[str, Any] = {"analysis": [], "synthesize": True, "nss": False}
+
+# Words that suggest the answer needs the emotion agent
+EMOTION_CUES = [
+    "feel", "feels", "felt", "feeling", "emotion", "emotional",
+    "grief", "grieve", "mourn", "sad", "sorrow", "angry", "anger", "rage",
+    "fear", "afraid", "scared", "love", "loved", "hate", "hatred",
+    "jealous", "jealousy", "guilt", "guilty", "shame", "regret",
+    "revenge", "vengeance", "betray", "betrayed", "betrayal",
+    "happy", "joy", "despair", "react", "reaction", "mental",
+]
+
+_EMOTION_RE = re.compile(r"\b(" + "|".join(map(re.escape, EMOTION_CUES)) + r")\b")
+
+
+@dataclass
+class ExecutionPlan:
+    route: str
+    analysis: List[str] = field(default_factory=list)
+    synthesize: bool = True
+    nss: bool = True
+    reason: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def has_emotion_cues(question: str) -> bool:
+    return bool(_EMOTION_RE.search(question.lower()))
+
+
+def _load_overrides() -> Dict[str, Dict[str, Any]]:
+    raw = os.getenv("EXECUTION_PLAN_OVERRIDES", "")
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except Exception:
+        print("[WARN] EXECUTION_PLAN_OVERRIDES is not valid JSON; ignoring.")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def build_execution_plan(
+    route: str,
+    question: str,
+    trivia_mode: Optional[bool] = None,
+    mode: Optional[str] = None,
+) -> ExecutionPlan:
+    """
+    Decide which downstream stages to run for a routed question.
+    """
+    mode = mode or EXECUTION_PLAN
+    is_alternate = route == "alternate_ending_flow"
+
+    # Legacy behaviour: every agent, always scored
+    if mode == "full":
+        return ExecutionPlan(
+            route=route,
+            analysis=[] if is_alternate else list(ANALYSIS_AGENTS),
+            synthesize=not is_alternate,
+            nss=True,
+            reason="full",
+        )
+
+    if trivia_mode and not is_alternate:
+        base, reason = TRIVIA_PLAN, "trivia"
+    else:
+        base, reason = ROUTE_PLANS.get(route, ROUTE_PLANS["basic_rag_flow"]), route
+
+    cfg = {**base, **_load_overrides().get(reason, {})}
+    analysis = [a for a in ANALYSIS_AGENTS if a in cfg.get("analysis", [])]
+
+    # Emotion only when the question asks about feelings / reactions
+    if (
+        reason != "trivia"
+        and not is_alternate
+        and "emotion" not in analysis
+        and has_emotion_cues(question)
+    ):
+        analysis.append("emotion")
+        reason += "+emotion_cues"
+
+    return ExecutionPlan(
+        route=route,
+        analysis=analysis,
+        synthesize=bool(cfg.get("synthesize", True)),
+        nss=bool(cfg.get("nss", True)),
+        reason=reason,
+    )
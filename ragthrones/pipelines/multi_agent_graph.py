@@ -8,36 +8,87 @@ Coordinates:
 - Narrative Agent
 - Causality Agent
 - Emotion Agent
-- Basic RAG (now uses hybrid_search_aug directly)
+- Fused Analysis Agent (optional single-call narrative/causal/emotion)
+- Basic RAG (now uses hybrid search directly)
 - Alternate Ending Agent (creative, S1–S7 only)
 - Reranker
 - Synthesizer
 
 This version bypasses the tool-based RetrievalAgent and calls
-the proven-working hybrid_search_aug() directly for retrieval.
+the proven-working hybrid search directly for retrieval.
+Retrieval results travel through the state as RetrievalResult
+(chunk ids + scores); rows are only materialized where an agent or
+the UI needs text (as_frame).
+
+Every flow is implemented once, as a coroutine (AsyncOpenAI for LLM
+calls, the shared agent pool for FAISS / BM25 / CrossEncoder work).
+The compiled graph supports both:
+- await app.ainvoke(state)   (FastAPI / Gradio, many questions per process)
+- app.invoke(state)          (CLI / eval; runs the coroutines on a
+                              background event loop via run_sync)
+
+Graph shape:
+    router -> <flow> (retrieve + rerank)
+           -> analysis? -> synthesizer? -> nss_scoring? -> END
+The optional stages follow the per-route execution plan (state.plan).
+
+astream_graph() runs the graph with an event channel open: the graph
+is driven through app.astream() so every finished node is published,
+analysis agents are announced as each one finishes, and the answer is
+streamed (synthesizer / alternate-ending agent) while it is written.
+When streaming, synthesis starts alongside the analysis agents (it does
+not read their output), so the first token arrives right after reranking.
 """
 
-from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, Iterable, List
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, List, Tuple
 
 import pandas as pd
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 
 # --- Agents ---
-from ragthrones.agents.query_decomposer_agent import query_decomposer_agent
-from ragthrones.agents.temporal_agent import temporal_agent
-from ragthrones.agents.narrative_agent import narrative_agent
-from ragthrones.agents.causal_agent import causal_agent
-from ragthrones.agents.emotion_agent import emotion_agent
+from ragthrones.agents.query_decomposer_agent import aquery_decomposer_agent
+from ragthrones.agents.temporal_agent import atemporal_agent
+from ragthrones.agents.narrative_agent import anarrative_agent
+from ragthrones.agents.causal_agent import acausal_agent
+from ragthrones.agents.emotion_agent import aemotion_agent
+from ragthrones.agents.fused_analysis_agent import afused_analysis_agent
 from ragthrones.agents.basic_rag_agent import basic_rag_agent  # kept for flexibility
 from ragthrones.agents.reranker_agent import get_reranker
-from ragthrones.agents.alternate_ending_agent import alternate_ending_agent
-from ragthrones.agents.nss_agent import scoring_agent
+from ragthrones.agents.alternate_ending_agent import aalternate_ending_agent
+from ragthrones.agents.nss_agent import ascoring_agent, scoring_agent
 
 # --- Shared helpers / prompts / retrieval ---
-from ragthrones.shared.helpers import node_reranker, node_synthesizer
+from ragthrones.shared.helpers import (
+    anode_synthesizer,
+    node_reranker,
+    node_synthesizer,
+    score_rerank,
+)
+from ragthrones.shared.concurrency import gather_dict, run_blocking, run_sync
+from ragthrones.shared.token_stream import close_channel, get_channel, open_channel
 from ragthrones.prompts.answer_prompt import ANSWER_PROMPT
-from ragthrones.retrieval.hybrid_search import hybrid_search_aug
+from ragthrones.retrieval.hybrid_search import hybrid_search_ids
+from ragthrones.retrieval.retrieval_result import RetrievalResult, as_frame
+from ragthrones.retrieval.evidence_packer import pack_for_agent
+from ragthrones.retrieval.entity_matcher import contains_any_mask
+from ragthrones.retrieval.chunk_metadata import S8_KEYWORDS, evidence_tag
+from ragthrones.pipelines.execution_plan import ANALYSIS_AGENTS, build_execution_plan
+from ragthrones.pipelines.nss_jobs import NSS_MODE, new_request_id, should_score, submit_nss
+from ragthrones.pipelines.single_flight import SINGLE_FLIGHT, get_single_flight, request_key
+
+# Analysis stage mode (per deployment):
+#   "parallel" -> narrative / causal / emotion agents run concurrently
+#   "fused"    -> one LLM call returns all three results
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "parallel")
+
+# Speculative retrieval: search (and rerank) the raw question while the
+# decomposer LLM call is still running; subqueries are merged in later.
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") == "1"
 
 
 # ---------------------------------------------------------------
@@ -50,8 +101,8 @@ class AgentState:
     question: str
 
     # Retrieval + reranking
-    retrieved: Optional[pd.DataFrame] = None
-    reranked: Optional[pd.DataFrame] = None
+    retrieved: Optional[RetrievalResult] = None
+    reranked: Optional[RetrievalResult] = None
     evidence_text: str = ""
 
     # Final synthesized answer
@@ -71,51 +122,146 @@ class AgentState:
     # Router decision
     route_decision: Optional[str] = None
 
+    # Execution plan for the routed flow (see pipelines/execution_plan.py)
+    plan: Dict[str, Any] = field(default_factory=dict)
+
+    # Answer style override: True -> trivia prompt, False/None -> auto-detect
+    trivia_mode: Optional[bool] = None
+
+    # Per-request id (background NSS results are stored under it)
+    request_id: Optional[str] = None
+
 
 # ---------------------------------------------------------------
 #                    SHARED RETRIEVAL HELPERS
 # ---------------------------------------------------------------
 
-def _retrieve_with_hybrid(queries: Iterable[str], topk: int = 10) -> pd.DataFrame:
+def _retrieve_with_hybrid(queries: Iterable[str], topk: int = 10) -> RetrievalResult:
     """
-    Run hybrid_search_aug over one or more queries, merge and dedupe results.
+    Run hybrid search over one or more queries, merge and dedupe results.
     """
     if isinstance(queries, str):
         queries = [queries]
 
-    dfs = []
+    hits = []
     for q in queries:
         q = q.strip()
         if not q:
             continue
-        df = hybrid_search_aug(q, topk=topk)
-        if df is not None and len(df):
-            dfs.append(df)
+        hits.append(hybrid_search_ids(q, topk=topk))
+
+    return _merge_hits(hits)
+
+
+async def _aretrieve_with_hybrid(queries: Iterable[str], topk: int = 10) -> RetrievalResult:
+    """
+    Async version of _retrieve_with_hybrid: the per-query searches run
+    concurrently on the shared agent pool.
+    """
+    if isinstance(queries, str):
+        queries = [queries]
+
+    queries = [q.strip() for q in queries if q.strip()]
+    hits = await asyncio.gather(
+        *(run_blocking(hybrid_search_ids, q, topk=topk) for q in queries)
+    )
+    return _merge_hits(list(hits))
+
+
+def _merge_hits(hits: List[RetrievalResult]) -> RetrievalResult:
+    """
+    Merge results and dedupe on chunk id (first occurrence wins,
+    so already-scored rows keep their rerank score).
+    """
+    return RetrievalResult.merge(hits)
+
+
+def _search_raw_question(q: str, topk: int, prescore: bool) -> RetrievalResult:
+    """
+    Speculative branch: hybrid search on the raw question and, if a
+    reranker is available, score those hits right away.
+    """
+    hits = hybrid_search_ids(q, topk=topk)
+    if len(hits) == 0:
+        return hits
+
+    reranker = get_reranker() if prescore else None
+    if reranker is not None:
+        hits = score_rerank(q, hits, reranker)
+    return hits
+
+
+async def _plan_and_retrieve(
+    q: str,
+    run_llm: Callable[[], Awaitable[Any]],
+    queries_of: Callable[[Any], List[str]],
+    topk: int = 15,
+    prescore: bool = True,
+) -> Tuple[Any, List[str], RetrievalResult]:
+    """
+    Run the planning LLM call(s) and retrieval for a flow.
+
+    Returns (llm_result, queries, hits).
+
+    With SPECULATIVE_RETRIEVAL on, hybrid search (+ rerank scoring) on the
+    raw question starts immediately and overlaps the LLM call; subqueries
+    are searched concurrently once they arrive and merged into the pool.
+    node_reranker later only scores the rows that are still unscored.
+    """
+    if not SPECULATIVE_RETRIEVAL:
+        llm_result = await run_llm()
+        queries = queries_of(llm_result)
+        return llm_result, queries, await _aretrieve_with_hybrid(queries, topk=topk)
+
+    raw_task = asyncio.ensure_future(run_blocking(_search_raw_question, q, topk, prescore))
+
+    try:
+        llm_result = await run_llm()
+    except BaseException:
+        raw_task.cancel()
+        raise
+
+    queries = queries_of(llm_result)
+
+    extra = []
+    for sq in queries:
+        sq = sq.strip()
+        if sq and sq != q.strip() and sq not in extra:
+            extra.append(sq)
+
+    sub_tasks = [
+        asyncio.ensure_future(run_blocking(hybrid_search_ids, sq, topk=topk))
+        for sq in extra
+    ]
 
-    if not dfs:
-        return pd.DataFrame()
+    # Raw-question hits first, so their pre-computed scores survive dedupe;
+    # subqueries in submission order, so the merged pool is deterministic
+    pool = [await raw_task]
+    pool += await asyncio.gather(*sub_tasks)
 
-    merged = pd.concat(dfs, ignore_index=True)
-    merged = merged.drop_duplicates(subset=["text"]).reset_index(drop=True)
-    return merged
+    return llm_result, [q] + extra, _merge_hits(pool)
 
 
-def _make_evidence_lines(df: pd.DataFrame, max_lines: int = 12) -> List[str]:
+async def _arerank(state: AgentState) -> AgentState:
+    """CrossEncoder reranking off the event loop."""
+    return await run_blocking(lambda: node_reranker(state, reranker_model=get_reranker()))
+
+
+def _make_evidence_lines(df: pd.DataFrame, max_lines: Optional[int] = 12) -> List[str]:
     """
     Turn reranked rows into short evidence lines:
     [SxEy] text...
+    (max_lines=None keeps every row, e.g. after token-budget packing)
     """
     lines: List[str] = []
-    for _, r in df.head(max_lines).iterrows():
-        season = r.get("season", "?")
-        episode = r.get("episode", "?")
-        tag = f"S{season}E{episode}" if str(season).isdigit() else "S?E?"
+    rows = df if max_lines is None else df.head(max_lines)
+    for _, r in rows.iterrows():
         text = str(r.get("text", "")).strip()
-        lines.append(f"[{tag}] {text}")
+        lines.append(f"[{evidence_tag(r)}] {text}")
     return lines
 
 
-def _filter_to_pre_s8(df: pd.DataFrame) -> pd.DataFrame:
+def _filter_to_pre_s8(df):
     """
     Filter retrieval results to use only Seasons 1–7.
     Strategy:
@@ -126,6 +272,14 @@ def _filter_to_pre_s8(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or len(df) == 0:
         return df
 
+    # Chunk-id results: look the flag up in the store, no rows copied
+    if isinstance(df, RetrievalResult):
+        return df.filter(~df.column("is_post_s7").astype(bool))
+
+    # Precomputed at artifact build time (retrieval/chunk_metadata.py)
+    if "is_post_s7" in df.columns:
+        return df[~df["is_post_s7"].astype(bool)].reset_index(drop=True)
+
     df = df.copy()
 
     # Attempt to coerce season to numeric
@@ -140,26 +294,8 @@ def _filter_to_pre_s8(df: pd.DataFrame) -> pd.DataFrame:
     df_unknown = df[df["_season_num"].isna()]
 
     if len(df_unknown):
-        keywords = [
-            "season 8",
-            "eighth and final season",
-            "the iron throne",         # S8 finale title
-            "s8e",                     # any S8E?
-            "series finale",
-            "final season of the fantasy drama television series",
-        ]
-
-        def _looks_like_s8(text: str) -> bool:
-            t = text.lower()
-            return any(k in t for k in keywords)
-
-        keep_rows = []
-        for _, row in df_unknown.iterrows():
-            text = str(row.get("text", ""))
-            if not _looks_like_s8(text):
-                keep_rows.append(row)
-
-        df_unknown_filtered = pd.DataFrame(keep_rows) if keep_rows else pd.DataFrame()
+        looks_like_s8 = contains_any_mask(df_unknown, S8_KEYWORDS)
+        df_unknown_filtered = df_unknown[~looks_like_s8]
     else:
         df_unknown_filtered = pd.DataFrame()
 
@@ -169,50 +305,123 @@ def _filter_to_pre_s8(df: pd.DataFrame) -> pd.DataFrame:
     return filtered
 
 
-def _run_analysis_agents(state: AgentState, evidence_df: Optional[pd.DataFrame]) -> AgentState:
+async def _agent_result_dict(agent_coro, q: str, evidence_lines: List[str]) -> Dict[str, Any]:
+    """
+    Await one analysis agent and return its result as a dict.
+    Errors are isolated: a failing agent yields {"error": ...}.
+    """
+    try:
+        r = await agent_coro(q, evidence_lines)
+        return r.__dict__ if hasattr(r, "__dict__") else dict(r)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _publish_agent(state: AgentState, name: str, result: Dict[str, Any]) -> None:
+    """Announce a finished analysis agent on the request's channel (if any)."""
+    channel = get_channel(state.request_id)
+    if channel is not None:
+        channel.put_event({"type": "agent", "agent": name, "result": result})
+
+
+async def _announced(state: AgentState, name: str, result: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+    out = await result
+    _publish_agent(state, name, out)
+    return out
+
+
+async def _run_fused_analysis(q: str, evidence_lines: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    One LLM call for all three analyses. Raises on failure so the
+    caller can fall back to the standalone agents.
     """
-    Run Narrative, Causal, and Emotion agents using reranked evidence.
+    fused = await afused_analysis_agent(q, evidence_lines)
+    return {
+        "narrative": fused.narrative.__dict__,
+        "causal": fused.causal.__dict__,
+        "emotion": fused.emotion.__dict__,
+    }
+
+
+_ANALYSIS_AGENT_FNS = {
+    "narrative": anarrative_agent,
+    "causal": acausal_agent,
+    "emotion": aemotion_agent,
+}
+
+
+async def _run_analysis_agents(
+    state: AgentState,
+    evidence_df,
+    mode: Optional[str] = None,
+    agents: Optional[List[str]] = None,
+) -> AgentState:
+    """
+    Run the Narrative / Causal / Emotion agents selected by the
+    execution plan (default: all three) using reranked evidence.
+
+    mode (defaults to ANALYSIS_MODE):
+      - "parallel": the selected agents run concurrently
+        (the stage costs ~one LLM latency).
+      - "fused": a single structured call returns all three results
+        (evidence tokens paid once); only used when two or more agents
+        are selected. Falls back to "parallel" on failure.
+
     Writes outputs into state.narrative / state.causal / state.emotion
     and mirrors them under state.logs[...] for the Gradio UI.
     """
-    if evidence_df is None or len(evidence_df) == 0:
+    agents = ANALYSIS_AGENTS if agents is None else [a for a in ANALYSIS_AGENTS if a in agents]
+    if not agents or evidence_df is None or len(evidence_df) == 0:
         return state
+    evidence_df = as_frame(evidence_df)
 
     q = state.question
-    evidence_lines = _make_evidence_lines(evidence_df, max_lines=12)
+    # Token-budgeted evidence (EVIDENCE_TOKENS_ANALYSIS), shared by all agents
+    packed = pack_for_agent(evidence_df, "analysis")
+    evidence_lines = _make_evidence_lines(packed, max_lines=None)
+    state.logs["analysis_evidence"] = {
+        "rows": len(packed),
+        "tokens": packed.attrs.get("packed_tokens"),
+    }
+    mode = mode or ANALYSIS_MODE
+
+    results = None
+    if mode == "fused" and len(agents) > 1:
+        try:
+            results = await _run_fused_analysis(q, evidence_lines)
+            state.logs["analysis"] = {"mode": "fused"}
+            for name in agents:
+                _publish_agent(state, name, results[name])
+        except Exception as e:
+            state.logs["analysis"] = {"mode": "parallel", "fused_error": str(e)}
+
+    if results is None:
+        results = await gather_dict({
+            name: _announced(state, name, _agent_result_dict(_ANALYSIS_AGENT_FNS[name], q, evidence_lines))
+            for name in agents
+        })
+        state.logs.setdefault("analysis", {"mode": "parallel"})
+
+    state.logs["analysis"]["agents"] = list(agents)
 
     # --- Narrative Agent ---
-    try:
-        n = narrative_agent(q, evidence_lines)
-        narrative_dict = n.__dict__ if hasattr(n, "__dict__") else dict(n)
-    except Exception as e:
-        narrative_dict = {"error": str(e)}
-
-    state.narrative = narrative_dict
-    state.logs["narrative"] = narrative_dict
-    if isinstance(narrative_dict, dict):
-        # Use narrative summary as a high-level evidence text if present
-        state.evidence_text = narrative_dict.get("narrative_summary", "") or state.evidence_text
+    if "narrative" in agents:
+        narrative_dict = results["narrative"]
+        state.narrative = narrative_dict
+        state.logs["narrative"] = narrative_dict
+        if isinstance(narrative_dict, dict):
+            # Use narrative summary as a high-level evidence text if present
+            state.evidence_text = narrative_dict.get("narrative_summary", "") or state.evidence_text
 
     # --- Causality Agent ---
-    try:
-        c = causal_agent(q, evidence_lines)
-        causal_dict = c.__dict__ if hasattr(c, "__dict__") else dict(c)
-    except Exception as e:
-        causal_dict = {"error": str(e)}
-
-    state.causal = causal_dict
-    state.logs["causal"] = causal_dict
+    if "causal" in agents:
+        state.causal = results["causal"]
+        state.logs["causal"] = results["causal"]
 
     # --- Emotion Agent ---
-    try:
-        e = emotion_agent(q, evidence_lines)
-        emotion_dict = e.__dict__ if hasattr(e, "__dict__") else dict(e)
-    except Exception as e:
-        emotion_dict = {"error": str(e)}
-
-    state.emotion = emotion_dict
-    state.logs["emotion"] = emotion_dict
+    if "emotion" in agents:
+        state.emotion = results["emotion"]
+        state.logs["emotion"] = results["emotion"]
 
     return state
 
@@ -255,6 +464,12 @@ def router_node(state: AgentState) -> AgentState:
         decision = "basic_rag_flow"
 
     state.route_decision = decision
+
+    # Which analysis agents / synthesis / NSS this question needs
+    plan = build_execution_plan(decision, state.question, trivia_mode=state.trivia_mode)
+    state.plan = plan.to_dict()
+    state.logs["plan"] = state.plan
+
     return state
 
 
@@ -267,31 +482,26 @@ def router_route(state: AgentState) -> str:
 #                    FACTUAL FLOW
 # ---------------------------------------------------------------
 
-def factual_flow(state: AgentState) -> AgentState:
+async def afactual_flow(state: AgentState) -> AgentState:
     q = state.question
 
-    parsed = query_decomposer_agent(q)
+    parsed, queries, hits = await _plan_and_retrieve(
+        q,
+        lambda: aquery_decomposer_agent(q),
+        lambda p: p.retrieval_queries or [q],
+        topk=15,
+    )
     state.logs["decomposer"] = parsed.__dict__
 
-    queries = parsed.retrieval_queries or [q]
-
-    hits = _retrieve_with_hybrid(queries, topk=15)
     state.retrieved = hits
     state.logs["retrieval"] = {
         "flow": "factual_flow",
         "queries": queries,
         "hit_count": int(len(hits)),
+        "speculative": SPECULATIVE_RETRIEVAL,
     }
 
-    state = node_reranker(state, reranker_model=get_reranker())
-
-    # Analysis agents (Narrative / Causal / Emotion)
-    state = _run_analysis_agents(
-        state,
-        state.reranked if state.reranked is not None else state.retrieved,
-    )
-
-    state = node_synthesizer(state, answer_prompt_template=ANSWER_PROMPT)
+    state = await _arerank(state)
 
     return state
 
@@ -300,41 +510,42 @@ def factual_flow(state: AgentState) -> AgentState:
 #                    TEMPORAL FLOW
 # ---------------------------------------------------------------
 
-def temporal_flow(state: AgentState) -> AgentState:
+async def atemporal_flow(state: AgentState) -> AgentState:
     q = state.question
 
-    parsed = query_decomposer_agent(q)
-    temporal = temporal_agent(q)
+    # Both LLM calls depend only on the question -> run them concurrently
+    # and merge their retrieval queries once both return.
+    def _run_llms():
+        return gather_dict({
+            "decomposer": aquery_decomposer_agent(q),
+            "temporal": atemporal_agent(q),
+        })
 
-    state.logs["decomposer"] = parsed.__dict__
-    state.logs["temporal"] = temporal.__dict__
+    def _merge_queries(llm_out) -> List[str]:
+        parsed, temporal = llm_out["decomposer"], llm_out["temporal"]
 
-    queries = set(parsed.retrieval_queries or [q])
+        queries = set(parsed.retrieval_queries or [q])
+        for t in temporal.timeline_queries:
+            queries.add(t)
+        for ep in temporal.episodes:
+            queries.add(f"{q} (seen in {ep})")
 
-    for t in temporal.timeline_queries:
-        queries.add(t)
-    for ep in temporal.episodes:
-        queries.add(f"{q} (seen in {ep})")
+        return list(queries)
 
-    queries = list(queries)
+    llm_out, queries, hits = await _plan_and_retrieve(q, _run_llms, _merge_queries, topk=15)
+
+    state.logs["decomposer"] = llm_out["decomposer"].__dict__
+    state.logs["temporal"] = llm_out["temporal"].__dict__
 
-    hits = _retrieve_with_hybrid(queries, topk=15)
     state.retrieved = hits
     state.logs["retrieval"] = {
         "flow": "temporal_flow",
         "queries": queries,
         "hit_count": int(len(hits)),
+        "speculative": SPECULATIVE_RETRIEVAL,
     }
 
-    state = node_reranker(state, reranker_model=get_reranker())
-
-    # Analysis agents
-    state = _run_analysis_agents(
-        state,
-        state.reranked if state.reranked is not None else state.retrieved,
-    )
-
-    state = node_synthesizer(state, answer_prompt_template=ANSWER_PROMPT)
+    state = await _arerank(state)
 
     return state
 
@@ -343,32 +554,26 @@ def temporal_flow(state: AgentState) -> AgentState:
 #                    NARRATIVE FLOW
 # ---------------------------------------------------------------
 
-def narrative_flow(state: AgentState) -> AgentState:
+async def anarrative_flow(state: AgentState) -> AgentState:
     q = state.question
 
-    parsed = query_decomposer_agent(q)
+    parsed, queries, hits = await _plan_and_retrieve(
+        q,
+        lambda: aquery_decomposer_agent(q),
+        lambda p: p.retrieval_queries or [q],
+        topk=15,
+    )
     state.logs["decomposer"] = parsed.__dict__
 
-    queries = parsed.retrieval_queries or [q]
-
-    hits = _retrieve_with_hybrid(queries, topk=15)
     state.retrieved = hits
     state.logs["retrieval"] = {
         "flow": "narrative_flow",
         "queries": queries,
         "hit_count": int(len(hits)),
+        "speculative": SPECULATIVE_RETRIEVAL,
     }
 
-    state = node_reranker(state, reranker_model=get_reranker())
-
-    # Analysis agents
-    state = _run_analysis_agents(
-        state,
-        state.reranked if state.reranked is not None else state.retrieved,
-    )
-
-    # Correct synthesize call
-    state = node_synthesizer(state, answer_prompt_template=ANSWER_PROMPT)
+    state = await _arerank(state)
 
     return state
 
@@ -377,14 +582,14 @@ def narrative_flow(state: AgentState) -> AgentState:
 #                    BASIC FLOW
 # ---------------------------------------------------------------
 
-def basic_rag_flow(state: AgentState) -> AgentState:
+async def abasic_rag_flow(state: AgentState) -> AgentState:
     q = state.question
 
     # Option A: use original basic_rag_agent
     # df = basic_rag_agent(q)
 
     # Option B: basic flow uses hybrid retrieval for consistency
-    df = _retrieve_with_hybrid(q, topk=15)
+    df = await _aretrieve_with_hybrid(q, topk=15)
 
     state.retrieved = df
     state.logs["retrieval"] = {
@@ -393,15 +598,7 @@ def basic_rag_flow(state: AgentState) -> AgentState:
         "hit_count": int(len(df)),
     }
 
-    state = node_reranker(state, reranker_model=get_reranker())
-
-    # Analysis agents
-    state = _run_analysis_agents(
-        state,
-        state.reranked if state.reranked is not None else state.retrieved,
-    )
-
-    state = node_synthesizer(state, answer_prompt_template=ANSWER_PROMPT)
+    state = await _arerank(state)
 
     return state
 
@@ -410,20 +607,23 @@ def basic_rag_flow(state: AgentState) -> AgentState:
 #                    ALTERNATE ENDING FLOW
 # ---------------------------------------------------------------
 
-def alternate_ending_flow(state: AgentState) -> AgentState:
+async def aalternate_ending_flow(state: AgentState) -> AgentState:
     """
     Creative flow: generate an alternate Season 8 ending
     using ONLY Seasons 1–7 evidence.
     """
     q = state.question
 
-    parsed = query_decomposer_agent(q)
+    # Retrieve a fairly large pool (no reranker in this flow -> no pre-scoring)
+    parsed, queries, raw_hits = await _plan_and_retrieve(
+        q,
+        lambda: aquery_decomposer_agent(q),
+        lambda p: p.retrieval_queries or [q],
+        topk=40,
+        prescore=False,
+    )
     state.logs["decomposer"] = parsed.__dict__
 
-    queries = parsed.retrieval_queries or [q]
-
-    # Retrieve a fairly large pool
-    raw_hits = _retrieve_with_hybrid(queries, topk=40)
     raw_count = int(len(raw_hits))
 
     # Hard filter to S1–S7 only
@@ -436,10 +636,14 @@ def alternate_ending_flow(state: AgentState) -> AgentState:
         "queries": queries,
         "raw_hit_count": raw_count,
         "filtered_pre_s8_count": filtered_count,
+        "speculative": SPECULATIVE_RETRIEVAL,
     }
 
     # Hand off to alternate ending agent (it can also do its own internal filtering)
-    alt = alternate_ending_agent(q, filtered_hits)
+    channel = get_channel(state.request_id)
+    alt = await aalternate_ending_agent(
+        q, as_frame(filtered_hits), on_delta=channel.put if channel is not None else None
+    )
 
     state.answer = alt.scene
     state.logs["alternate_ending"] = {
@@ -449,23 +653,186 @@ def alternate_ending_flow(state: AgentState) -> AgentState:
 
     return state
 
+
+# ---------------------------------------------------------------
+#                    PLAN-DRIVEN STAGES
+# ---------------------------------------------------------------
+
+async def aanalysis_node(state: AgentState) -> AgentState:
+    """
+    Run only the analysis agents listed in the execution plan.
+    When the answer is being streamed, synthesis runs alongside them.
+    """
+    analysis = _run_analysis_agents(
+        state,
+        state.reranked if state.reranked is not None else state.retrieved,
+        agents=state.plan.get("analysis", ANALYSIS_AGENTS),
+    )
+    if not (state.plan.get("synthesize", True) and get_channel(state.request_id)):
+        return await analysis
+
+    # The synthesizer does not read analysis output; run it on a copy so
+    # its evidence_text wins, as when the stages run in order
+    synth_state = replace(state)
+    await asyncio.gather(
+        analysis,
+        anode_synthesizer(synth_state, answer_prompt_template=ANSWER_PROMPT),
+    )
+    state.answer = synth_state.answer
+    state.evidence_text = synth_state.evidence_text
+    state.logs["synthesizer"]["overlapped_analysis"] = True
+    return state
+
+
+async def asynthesizer_node(state: AgentState) -> AgentState:
+    if state.logs.get("synthesizer", {}).get("overlapped_analysis"):
+        return state  # already answered alongside the analysis stage
+    return await anode_synthesizer(state, answer_prompt_template=ANSWER_PROMPT)
+
+
+def _next_stage(state: AgentState, after: str) -> str:
+    """
+    Next node for a routed question, following state.plan:
+    flow -> analysis? -> synthesizer? -> nss_scoring? -> END
+    """
+    plan = state.plan or {}
+    stages = []
+    if plan.get("analysis", ANALYSIS_AGENTS):
+        stages.append("analysis")
+    if plan.get("synthesize", True):
+        stages.append("synthesizer")
+    if plan.get("nss", True):
+        stages.append("nss_scoring")
+
+    if after in stages:
+        stages = stages[stages.index(after) + 1:]
+    return stages[0] if stages else END
+
+
+def flow_route(state: AgentState) -> str:
+    return _next_stage(state, after="flow")
+
+
+def analysis_route(state: AgentState) -> str:
+    return _next_stage(state, after="analysis")
+
+
+def synthesizer_route(state: AgentState) -> str:
+    return _next_stage(state, after="synthesizer")
+
+
+# ---------------------------------------------------------------
+#                    SYNC WRAPPERS (app.invoke / scripts)
+# ---------------------------------------------------------------
+
+def factual_flow(state: AgentState) -> AgentState:
+    return run_sync(afactual_flow(state))
+
+
+def temporal_flow(state: AgentState) -> AgentState:
+    return run_sync(atemporal_flow(state))
+
+
+def narrative_flow(state: AgentState) -> AgentState:
+    return run_sync(anarrative_flow(state))
+
+
+def basic_rag_flow(state: AgentState) -> AgentState:
+    return run_sync(abasic_rag_flow(state))
+
+
+def alternate_ending_flow(state: AgentState) -> AgentState:
+    return run_sync(aalternate_ending_flow(state))
+
+
+def analysis_node(state: AgentState) -> AgentState:
+    return run_sync(aanalysis_node(state))
+
+
+def synthesizer_node(state: AgentState) -> AgentState:
+    return node_synthesizer(state, answer_prompt_template=ANSWER_PROMPT)
+
+
+def _dispatch_nss(state: AgentState) -> str:
+    """
+    Sampling + NSS_MODE decision for the nss_scoring node.
+    Returns "skip", "inline" (score now) or "background" (already submitted).
+    """
+    if not should_score():
+        state.logs["nss"] = {"mode": NSS_MODE, "sampled": False}
+        return "skip"
+
+    if NSS_MODE == "inline":
+        state.logs["nss"] = {"mode": "inline", "sampled": True}
+        return "inline"
+
+    state.request_id = submit_nss(state)
+    state.logs["nss"] = {
+        "mode": "background",
+        "sampled": True,
+        "request_id": state.request_id,
+        "status": "pending",
+    }
+    return "background"
+
+
 def nss_flow(state: AgentState) -> AgentState:
-    return scoring_agent(state)
+    if _dispatch_nss(state) == "inline":
+        return scoring_agent(state)
+    return state
+
+
+async def anss_flow(state: AgentState) -> AgentState:
+    if _dispatch_nss(state) == "inline":
+        return await ascoring_agent(state)
+    return state
 
 
 # ---------------------------------------------------------------
 #                    BUILD GRAPH
 # ---------------------------------------------------------------
 
+def _record_timing(state: AgentState, name: str, t0: float) -> AgentState:
+    state.logs.setdefault("timings_ms", {})[name] = round((time.perf_counter() - t0) * 1000, 1)
+    return state
+
+
+def _timed(func, name: str):
+    def run(state: AgentState) -> AgentState:
+        t0 = time.perf_counter()
+        return _record_timing(func(state), name, t0)
+    return run
+
+
+def _atimed(afunc, name: str):
+    async def run(state: AgentState) -> AgentState:
+        t0 = time.perf_counter()
+        return _record_timing(await afunc(state), name, t0)
+    return run
+
+
+def _node(func, afunc, name: str) -> RunnableLambda:
+    """
+    Graph node with a sync (invoke) and async (ainvoke) implementation;
+    wall time per node goes to state.logs["timings_ms"].
+    """
+    return RunnableLambda(_timed(func, name), afunc=_atimed(afunc, name), name=name)
+
+
 workflow = StateGraph(AgentState)
 
 workflow.add_node("router", router_node)
-workflow.add_node("factual_flow", factual_flow)
-workflow.add_node("temporal_flow", temporal_flow)
-workflow.add_node("narrative_flow", narrative_flow)
-workflow.add_node("basic_rag_flow", basic_rag_flow)
-workflow.add_node("alternate_ending_flow", alternate_ending_flow)
-workflow.add_node("nss_scoring", scoring_agent)  # <-- NEW
+workflow.add_node("factual_flow", _node(factual_flow, afactual_flow, "factual_flow"))
+workflow.add_node("temporal_flow", _node(temporal_flow, atemporal_flow, "temporal_flow"))
+workflow.add_node("narrative_flow", _node(narrative_flow, anarrative_flow, "narrative_flow"))
+workflow.add_node("basic_rag_flow", _node(basic_rag_flow, abasic_rag_flow, "basic_rag_flow"))
+workflow.add_node(
+    "alternate_ending_flow",
+    _node(alternate_ending_flow, aalternate_ending_flow, "alternate_ending_flow"),
+)
+workflow.add_node("analysis", _node(analysis_node, aanalysis_node, "analysis"))
+workflow.add_node("synthesizer", _node(synthesizer_node, asynthesizer_node, "synthesizer"))
+workflow.add_node("nss_scoring", _node(nss_flow, anss_flow, "nss_scoring"))  # <-- NEW
 
 
 workflow.add_edge(START, "router")
@@ -482,14 +849,147 @@ workflow.add_conditional_edges(
     },
 )
 
-workflow.add_edge("factual_flow", "nss_scoring")
-workflow.add_edge("temporal_flow", "nss_scoring")
-workflow.add_edge("narrative_flow", "nss_scoring")
-workflow.add_edge("basic_rag_flow", "nss_scoring")
-workflow.add_edge("alternate_ending_flow", "nss_scoring")
+# Each flow retrieves (+ reranks); the execution plan picks what runs next
+_STAGES = {
+    "analysis": "analysis",
+    "synthesizer": "synthesizer",
+    "nss_scoring": "nss_scoring",
+    END: END,
+}
 
-workflow.add_edge("nss_scoring", END) 
+for _flow in [
+    "factual_flow",
+    "temporal_flow",
+    "narrative_flow",
+    "basic_rag_flow",
+    "alternate_ending_flow",
+]:
+    workflow.add_conditional_edges(_flow, flow_route, _STAGES)
+
+workflow.add_conditional_edges("analysis", analysis_route, _STAGES)
+workflow.add_conditional_edges("synthesizer", synthesizer_route, _STAGES)
+
+workflow.add_edge("nss_scoring", END)
 
 app = workflow.compile()
 
-print("Cosine of Thrones multi-agent LangGraph orchestrator ready.")
\ No newline at end of file
+
+# ---------------------------------------------------------------
+#                    ENTRY POINTS
+# ---------------------------------------------------------------
+
+def _initial_state(
+    question: str,
+    trivia_mode: Optional[bool] = None,
+    request_id: Optional[str] = None,
+) -> AgentState:
+    state = AgentState(question=question, request_id=request_id or new_request_id())
+    if trivia_mode is not None:
+        state.trivia_mode = bool(trivia_mode)
+    return state
+
+
+def _coalesced_copy(state: AgentState) -> AgentState:
+    """Follower's view of a shared execution (own logs dict)."""
+    return replace(state, logs={**state.logs, "coalesced": True})
+
+
+def run_graph(question: str, trivia_mode: Optional[bool] = None) -> AgentState:
+    """
+    Run the graph synchronously and return the final AgentState.
+    Identical concurrent questions share one execution (single_flight.py).
+    """
+    def _run() -> AgentState:
+        return AgentState(**app.invoke(_initial_state(question, trivia_mode)))
+
+    if not SINGLE_FLIGHT:
+        return _run()
+
+    state, shared = get_single_flight().do(request_key(question, trivia_mode), _run)
+    return _coalesced_copy(state) if shared else state
+
+
+async def arun_graph(
+    question: str,
+    trivia_mode: Optional[bool] = None,
+    request_id: Optional[str] = None,
+) -> AgentState:
+    """
+    Run the graph on the caller's event loop (app.ainvoke).
+    Identical concurrent questions share one execution (single_flight.py).
+    """
+    async def _run() -> AgentState:
+        state = _initial_state(question, trivia_mode, request_id)
+        channel = get_channel(state.request_id)
+        if channel is not None:
+            return await _astream_into(channel, state)
+        return AgentState(**(await app.ainvoke(state)))
+
+    if not SINGLE_FLIGHT:
+        return await _run()
+
+    state, shared = await get_single_flight().ado(request_key(question, trivia_mode), _run)
+    return _coalesced_copy(state) if shared else state
+
+
+def _as_state(values) -> AgentState:
+    return values if isinstance(values, AgentState) else AgentState(**values)
+
+
+async def _astream_into(channel, state: AgentState) -> AgentState:
+    """
+    app.ainvoke() via LangGraph streaming: publishes a "node" event (with
+    the state so far) as each node finishes; returns the final state.
+    """
+    final = state
+    finished: List[str] = []
+    async for mode, chunk in app.astream(state, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            finished.extend(chunk.keys())
+            continue
+        final = _as_state(chunk)
+        for node in finished:
+            channel.put_event({"type": "node", "node": node, "state": final})
+        finished = []
+    return final
+
+
+async def astream_graph(
+    question: str,
+    trivia_mode: Optional[bool] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the graph and yield events as they happen:
+      {"type": "node", "node": <name>, "state": AgentState}   node finished
+      {"type": "agent", "agent": <name>, "result": dict}      analysis agent finished
+      {"type": "token", "text": <answer delta>}
+      {"type": "final", "state": AgentState}                  (last)
+    A request coalesced onto another in-flight run gets no progress
+    events, only the final state.
+    """
+    request_id = new_request_id()
+    channel = open_channel(request_id)
+    graph = asyncio.ensure_future(arun_graph(question, trivia_mode, request_id=request_id))
+
+    try:
+        while True:
+            getter = asyncio.ensure_future(channel.get())
+            done, _ = await asyncio.wait({getter, graph}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                for event in getter.result():
+                    yield event
+                continue
+            getter.cancel()
+            break
+
+        for event in channel.drain():
+            yield event
+
+        yield {"type": "final", "state": graph.result()}
+    finally:
+        close_channel(request_id)
+        if not graph.done():
+            graph.cancel()
+
+
+print("Cosine of Thrones multi-agent LangGraph orchestrator ready.")
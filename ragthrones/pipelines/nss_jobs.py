@@ -0,0 +1,152 @@
+"""
+Background NSS scoring
+----------------------
+
+NSS is an evaluation of the final answer, not part of it, so it does
+not need to hold up the response. With NSS_MODE=background the graph's
+nss_scoring node only snapshots the answer + evidence and schedules the
+scoring call on the background event loop; the result is stored under
+the request id and fetched later (Gradio panel / GET /api/nss/{id}).
+
+Results are kept in process memory, so /api/nss/{id} must be served by
+the process that answered the question: cloudrun_start.sh runs a single
+uvicorn worker and the Cloud Run deploy uses session affinity, but a
+poll can still land elsewhere (cookie-less client, scale-to-zero), so
+API clients that need the score should use /api/answer?nss=inline.
+
+Exports:
+- new_request_id()
+- should_score(rate=None)
+- submit_nss(state) -> request_id
+- get_nss_result(request_id)
+- wait_for_nss(request_id, timeout)   (async)
+
+Config:
+- NSS_MODE          "background" (default) | "inline"
+- NSS_SAMPLE_RATE   fraction of requests that get scored (default 1.0)
+- NSS_RESULTS_MAX   results kept in memory, oldest dropped first (default 1000)
+"""
+
+import os
+import time
+import uuid
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from ragthrones.agents.nss_agent import ascoring_agent
+from ragthrones.shared.concurrency import submit_background
+
+
+NSS_MODE = os.getenv("NSS_MODE", "background")
+NSS_SAMPLE_RATE = float(os.getenv("NSS_SAMPLE_RATE", "1.0"))
+NSS_RESULTS_MAX = int(os.getenv("NSS_RESULTS_MAX", "1000"))
+
+_results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_futures: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def should_score(rate: Optional[float] = None) -> bool:
+    """Sampling decision for one request."""
+    rate = NSS_SAMPLE_RATE if rate is None else rate
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    return random.random() < rate
+
+
+def _store(request_id: str, **fields) -> None:
+    with _lock:
+        entry = _results.setdefault(request_id, {"request_id": request_id})
+        entry.update(fields)
+        _results.move_to_end(request_id)
+
+        while len(_results) > NSS_RESULTS_MAX:
+            _results.popitem(last=False)
+
+
+def _snapshot(state) -> SimpleNamespace:
+    """Only what the scorer reads; the live state keeps moving on."""
+    return SimpleNamespace(
+        question=state.question,
+        answer=state.answer,
+        reranked=state.reranked,
+        retrieved=state.retrieved,
+        nss_score=None,
+        logs={},
+    )
+
+
+async def _score(request_id: str, snapshot: SimpleNamespace) -> None:
+    try:
+        scored = await ascoring_agent(snapshot)
+        _store(
+            request_id,
+            status="done",
+            nss_score=scored.nss_score,
+            payload=snapshot.logs.get("nss_payload"),
+            finished_at=time.time(),
+        )
+    except Exception as e:
+        _store(request_id, status="error", error=str(e), finished_at=time.time())
+
+
+def _forget_future(request_id: str) -> None:
+    with _lock:
+        _futures.pop(request_id, None)
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+def submit_nss(state) -> str:
+    """
+    Schedule NSS scoring for a finished state and return its request id
+    (state.request_id is reused when set).
+    """
+    request_id = getattr(state, "request_id", None) or new_request_id()
+    _store(request_id, status="pending", nss_score=None, submitted_at=time.time())
+
+    fut = submit_background(_score(request_id, _snapshot(state)))
+    with _lock:
+        _futures[request_id] = fut
+    fut.add_done_callback(lambda _: _forget_future(request_id))
+
+    return request_id
+
+
+def get_nss_result(request_id: str) -> Optional[Dict[str, Any]]:
+    """
+    {"request_id", "status": "pending" | "done" | "error", "nss_score", ...}
+    or None for an unknown / expired id.
+    """
+    with _lock:
+        entry = _results.get(request_id)
+        return dict(entry) if entry is not None else None
+
+
+async def wait_for_nss(request_id: str, timeout: float = 60.0) -> Optional[Dict[str, Any]]:
+    """Await a pending score (up to timeout) and return its current entry."""
+    with _lock:
+        fut = _futures.get(request_id)
+
+    if fut is not None:
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    return get_nss_result(request_id)
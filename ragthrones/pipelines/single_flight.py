@@ -0,0 +1,128 @@
+"""
+Single-flight request coalescing
+--------------------------------
+
+Concurrent requests for the same normalized question (+ options) attach
+to ONE in-flight graph execution instead of each running the whole
+graph: several users clicking the same Gradio test prompt, or a client
+retrying while its first request is still running.
+
+- The first caller (leader) runs the graph; followers wait on the same
+  concurrent.futures.Future, so sync (run_graph) and async (arun_graph)
+  callers on any thread / event loop can share one execution.
+- Async leaders run the graph as its own task: if the leader's caller
+  is cancelled (client disconnect), followers still get the result.
+  A cancelled async follower only stops waiting; the shared future (and
+  every other caller) is unaffected.
+- Errors propagate to every attached caller; nothing is cached once the
+  execution finishes (the key is released immediately).
+- Followers receive a shallow copy of the final state with
+  logs["coalesced"] = True (same request_id, so background NSS results
+  are shared too).
+
+Config:
+- SINGLE_FLIGHT   1 (default) | 0 = every request runs independently
+"""
+
+import os
+import re
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "1") == "1"
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case / whitespace / trailing punctuation-insensitive form of a question."""
+    return _WS.sub(" ", (question or "").strip().lower()).rstrip(" ?!.")
+
+
+def request_key(question: str, trivia_mode: Optional[bool] = None) -> Tuple[str, Optional[bool]]:
+    return (normalize_question(question), trivia_mode)
+
+
+class SingleFlight:
+    """In-flight executions keyed by request_key (one per process)."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """(future, is_leader)"""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, False
+            fut = Future()
+            self._inflight[key] = fut
+            return fut, True
+
+    def _finish(self, key: Hashable, fut: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+        if fut.done():
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    # ----------------------------------------------------------
+    # Sync
+    # ----------------------------------------------------------
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn() once per key among concurrent callers. Returns (result, shared)."""
+        fut, leader = self._join(key)
+        if not leader:
+            return fut.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            raise
+        self._finish(key, fut, result=result)
+        return result, False
+
+    # ----------------------------------------------------------
+    # Async
+    # ----------------------------------------------------------
+    async def ado(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async version of do(); factory() is only called by the leader."""
+        fut, leader = self._join(key)
+        if not leader:
+            # Shielded: cancelling this follower must not cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(fut)), True
+
+        async def _lead():
+            try:
+                result = await factory()
+            except BaseException as e:
+                self._finish(key, fut, error=e)
+                raise
+            self._finish(key, fut, result=result)
+            return result
+
+        # Own task, so a cancelled leader caller does not cancel the followers
+        task = asyncio.ensure_future(_lead())
+        return await asyncio.shield(task), False
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _SINGLE_FLIGHT
@@ -0,0 +1,250 @@
+"""
+Warm answer cache for hot questions
+-----------------------------------
+
+The Gradio test prompts (and any other configured hot questions) are
+asked far more often than anything else, and each click used to run
+the whole multi-agent graph. At startup their final states are either
+loaded from a snapshot file (WARM_CACHE_SNAPSHOT) or precomputed in the
+background, and run_cosine serves them instantly.
+
+- Entries are keyed like single-flight requests (normalized question +
+  trivia_mode), so "who killed tywin lannister" hits the same entry.
+- The snapshot is keyed by the artifact version (load_vectorstore.
+  artifact_version): after the artifacts are rebuilt the old snapshot is
+  ignored, the answers are recomputed and the snapshot is rewritten.
+- The snapshot is opt-in: container filesystems do not outlive the
+  instance, so a default path would only ever be written, never reused.
+  Point WARM_CACHE_SNAPSHOT at persistent storage owned by the app (a
+  mounted volume / bucket, or a private directory on a long-lived host).
+  Without it, each instance precomputes at startup.
+- The snapshot is a pickle, so it is only loaded when it is a regular
+  file owned by this process's user and not group/world-writable.
+- Precompute takes admission slots at "batch" priority (app/admission.py),
+  so warm-up and refreshes count against ADMISSION_MAX_CONCURRENCY and
+  queue behind real users' questions; a question that cannot get a slot
+  is skipped until the next refresh / restart.
+- Warm states include their NSS score (the warmer waits for it), so the
+  UI can render every panel at once.
+- Questions that are not warm yet simply run the graph as usual (and
+  coalesce with the warmer through single-flight).
+
+Exports:
+- start_warm_cache(questions)   load snapshot / precompute in the background
+- get_warm_state(question, trivia_mode=None) -> AgentState | None
+- refresh_warm_cache()          recompute all hot questions now
+
+Config:
+- WARM_CACHE                1 (default) | 0 = off
+- WARM_CACHE_QUESTIONS      extra hot questions, JSON list
+- WARM_CACHE_SNAPSHOT       snapshot path on persistent storage (default
+                            unset = no snapshot)
+- WARM_CACHE_CONCURRENCY    questions precomputed at once (default 2)
+- WARM_CACHE_REFRESH_S      recompute every N seconds (default 0 = only when
+                            the artifact version changes)
+"""
+
+import os
+import json
+import stat
+import time
+import pickle
+import asyncio
+import tempfile
+import threading
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ragthrones.app.admission import get_admission
+from ragthrones.shared.concurrency import run_blocking, submit_background
+from ragthrones.pipelines.nss_jobs import wait_for_nss
+from ragthrones.pipelines.single_flight import request_key
+
+
+WARM_CACHE = os.getenv("WARM_CACHE", "1") == "1"
+WARM_CACHE_QUESTIONS = json.loads(os.getenv("WARM_CACHE_QUESTIONS", "[]"))
+WARM_CACHE_SNAPSHOT = os.getenv("WARM_CACHE_SNAPSHOT", "")
+WARM_CACHE_CONCURRENCY = int(os.getenv("WARM_CACHE_CONCURRENCY", "2"))
+WARM_CACHE_REFRESH_S = float(os.getenv("WARM_CACHE_REFRESH_S", "0"))
+
+# Snapshot layout version (bump when the pickled payload changes)
+_SNAPSHOT_FORMAT = 1
+
+_entries: Dict[Tuple[str, Optional[bool]], Dict[str, Any]] = {}
+_questions: List[str] = []
+_version: Optional[str] = None
+_lock = threading.Lock()
+_started = False
+
+
+def _current_version() -> str:
+    from ragthrones.retrieval.hybrid_search import get_artifact_version
+    return get_artifact_version()
+
+
+# ------------------------------------------------------------
+# Snapshot file
+# ------------------------------------------------------------
+def _snapshot_path() -> Optional[str]:
+    return WARM_CACHE_SNAPSHOT or None
+
+
+def _open_trusted(path: str):
+    """Open the snapshot only if it is ours: regular file, our uid, not group/world-writable."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode):
+            raise PermissionError("not a regular file")
+        if st.st_uid != os.getuid():
+            raise PermissionError(f"owned by uid {st.st_uid}, not {os.getuid()}")
+        if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError("group/world-writable")
+    except BaseException:
+        os.close(fd)
+        raise
+    return os.fdopen(fd, "rb")
+
+
+def _load_snapshot(version: str) -> int:
+    """Load entries for this artifact version; returns how many were loaded."""
+    path = _snapshot_path()
+    if path is None or not os.path.exists(path):
+        return 0
+    try:
+        with _open_trusted(path) as f:
+            data = pickle.load(f)
+    except Exception as e:
+        print(f"[WARN] Warm cache: ignoring snapshot {path}: {e}")
+        return 0
+
+    if data.get("format") != _SNAPSHOT_FORMAT or data.get("version") != version:
+        print(f"[INFO] Warm cache: snapshot is for artifacts {data.get('version')}, "
+              f"current {version}; recomputing.")
+        return 0
+
+    with _lock:
+        _entries.update(data.get("entries", {}))
+    return len(data.get("entries", {}))
+
+
+def _save_snapshot(version: str) -> None:
+    path = _snapshot_path()
+    if path is None:
+        return
+    with _lock:
+        data = {"format": _SNAPSHOT_FORMAT, "version": version, "entries": dict(_entries)}
+    try:
+        os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+        # mkstemp: private (0600) file we own, never a pre-existing path
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=5)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except Exception as e:
+        print(f"[WARN] Warm cache: could not write snapshot: {e}")
+
+
+# ------------------------------------------------------------
+# Precompute
+# ------------------------------------------------------------
+async def _warm_one(question: str, version: str, sem: asyncio.Semaphore) -> bool:
+    from ragthrones.pipelines.multi_agent_graph import arun_graph
+
+    async with sem:
+        try:
+            async with get_admission().slot("batch"):
+                state = await arun_graph(question)
+
+            nss_log = state.logs.get("nss", {})
+            if nss_log.get("status") == "pending":
+                result = await wait_for_nss(nss_log["request_id"], timeout=300) or {}
+                state.nss_score = result.get("nss_score")
+                state.logs["nss"] = {**nss_log, "status": result.get("status", "expired")}
+        except Exception as e:
+            print(f"[WARN] Warm cache: could not precompute {question!r}: {e}")
+            return False
+
+    with _lock:
+        _entries[request_key(question)] = {
+            "state": state,
+            "version": version,
+            "computed_at": time.time(),
+        }
+    return True
+
+
+async def _warm(questions: List[str], force: bool = False) -> None:
+    global _version
+
+    version = await run_blocking(_current_version)
+    with _lock:
+        if _version != version:
+            _entries.clear()
+        _version = version
+
+    if not force:
+        await run_blocking(_load_snapshot, version)
+
+    with _lock:
+        todo = [q for q in questions if force or request_key(q) not in _entries]
+
+    if todo:
+        print(f"[INFO] Warm cache: precomputing {len(todo)} hot question(s)")
+        sem = asyncio.Semaphore(max(1, WARM_CACHE_CONCURRENCY))
+        done = await asyncio.gather(*(_warm_one(q, version, sem) for q in todo))
+        if any(done):
+            await run_blocking(_save_snapshot, version)
+
+    print(f"[INFO] Warm cache ready: {len(_entries)} entries (artifacts {version})")
+
+
+async def _warm_forever(questions: List[str]) -> None:
+    await _warm(questions)
+    while WARM_CACHE_REFRESH_S > 0:
+        await asyncio.sleep(WARM_CACHE_REFRESH_S)
+        await _warm(questions, force=True)
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+def start_warm_cache(questions: Iterable[str]) -> None:
+    """Load / precompute hot questions on the background loop (once per process)."""
+    global _started
+
+    with _lock:
+        if not WARM_CACHE or _started:
+            return
+        _started = True
+        for q in list(questions) + list(WARM_CACHE_QUESTIONS):
+            if q and q not in _questions:
+                _questions.append(q)
+
+    submit_background(_warm_forever(list(_questions)))
+
+
+def refresh_warm_cache():
+    """Recompute every hot question now (returns a concurrent Future)."""
+    return submit_background(_warm(list(_questions), force=True))
+
+
+def get_warm_state(question: str, trivia_mode: Optional[bool] = None):
+    """Precomputed final state for a hot question (a copy), or None."""
+    if not WARM_CACHE:
+        return None
+
+    with _lock:
+        entry = _entries.get(request_key(question, trivia_mode))
+        if entry is None or entry["version"] != _version:
+            return None
+
+    state = entry["state"]
+    return replace(
+        state,
+        logs={**state.logs, "warm_cache": {"computed_at": entry["computed_at"], "version": entry["version"]}},
+    )
@@ -0,0 +1,93 @@
+"""
+Precomputed per-chunk metadata
+------------------------------
+
+Fixed facts about each chunk, computed once when the artifacts are
+built (scripts/rebuild_artifacts.py) instead of on every request:
+
+- season_num / episode_num   nullable Int64 (None when not an episode chunk)
+- is_post_s7                 Season 8+, or unknown season whose text clearly
+                             refers to Season 8 / the finale
+- text_lc                    lowercased text (entity / keyword matching)
+- tag                        evidence tag, "S6E9" or "S?E?"
+- n_tokens                   tiktoken count (evidence packer budgets)
+
+load_df_aug() adds any missing columns for artifacts built before this.
+"""
+
+import pandas as pd
+
+from ragthrones.retrieval.entity_matcher import get_matcher
+from ragthrones.retrieval.evidence_packer import ensure_token_counts
+
+
+CHUNK_METADATA_COLUMNS = [
+    "season_num",
+    "episode_num",
+    "is_post_s7",
+    "text_lc",
+    "tag",
+    "n_tokens",
+]
+
+# Text markers of Season 8 / post-finale content (rows without a season)
+S8_KEYWORDS = [
+    "season 8",
+    "eighth and final season",
+    "the iron throne",         # S8 finale title
+    "s8e",                     # any S8E?
+    "series finale",
+    "final season of the fantasy drama television series",
+]
+
+
+def has_chunk_metadata(df: pd.DataFrame) -> bool:
+    return all(c in df.columns for c in CHUNK_METADATA_COLUMNS)
+
+
+def _to_int(series) -> pd.Series:
+    return pd.to_numeric(series, errors="coerce").round().astype("Int64")
+
+
+def format_tag(season, episode) -> str:
+    """Evidence tag for raw season / episode values."""
+    try:
+        return f"S{int(float(season))}E{int(float(episode))}"
+    except (TypeError, ValueError):
+        return "S?E?"
+
+
+def evidence_tag(row) -> str:
+    """Precomputed tag when available, otherwise built from season / episode."""
+    tag = row.get("tag")
+    if isinstance(tag, str) and tag:
+        return tag
+    return format_tag(row.get("season"), row.get("episode"))
+
+
+def add_chunk_metadata(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of df with every CHUNK_METADATA_COLUMNS column filled."""
+    df = df.copy()
+    n = len(df)
+
+    season = df["season"] if "season" in df.columns else pd.Series([None] * n, index=df.index)
+    episode = df["episode"] if "episode" in df.columns else pd.Series([None] * n, index=df.index)
+
+    df["season_num"] = _to_int(season)
+    df["episode_num"] = _to_int(episode)
+    df["text_lc"] = df["text"].fillna("").astype(str).str.lower()
+
+    s8_text = get_matcher(S8_KEYWORDS).mask(df["text_lc"])
+    df["is_post_s7"] = (
+        (df["season_num"].notna() & (df["season_num"] > 7)).to_numpy(dtype=bool)
+        | (df["season_num"].isna().to_numpy() & s8_text)
+    )
+
+    has_both = df["season_num"].notna() & df["episode_num"].notna()
+    df["tag"] = "S?E?"
+    df.loc[has_both, "tag"] = (
+        "S" + df.loc[has_both, "season_num"].astype(str)
+        + "E" + df.loc[has_both, "episode_num"].astype(str)
+    )
+
+    return ensure_token_counts(df)
@@ -0,0 +1,118 @@
+"""
+Multi-pattern entity / keyword matcher
+--------------------------------------
+
+Aho-Corasick automaton over a set of lowercase patterns, so checking a
+row for "any of these N names / keywords" is one pass over its text
+instead of N substring scans (plus N lowercasings).
+
+- Uses pyahocorasick (C extension, in requirements.txt) when installed,
+  otherwise one escaped regex alternation (Series.str.contains for
+  whole columns).
+- Matchers are compiled once per pattern set and cached (get_matcher).
+- Matching is plain substring semantics on lowercased text, same as
+  `name.lower() in text.lower()`.
+
+Exports:
+- get_matcher(patterns) -> Matcher
+- lowered_texts(df)                (uses the precomputed text_lc column if present)
+- contains_any_mask(df, patterns)  -> numpy bool mask
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# ------------------------------------------------------------
+# Public matcher
+# ------------------------------------------------------------
+class Matcher:
+    """Compiled matcher for one pattern set (lowercase substrings)."""
+
+    def __init__(self, patterns: Tuple[str, ...]):
+        self.patterns = patterns
+        self._auto = None
+        self._regex = None
+
+        if not patterns:
+            return
+        if ahocorasick is not None:
+            auto = ahocorasick.Automaton()
+            for pid, pat in enumerate(patterns):
+                auto.add_word(pat, pid)
+            auto.make_automaton()
+            self._auto = auto
+        else:
+            # Fallback: one escaped alternation, matched by the C regex engine
+            self._regex = re.compile("|".join(map(re.escape, patterns)))
+
+    def contains_any(self, text_lc: str) -> bool:
+        """True if the (already lowercased) text contains any pattern."""
+        if not self.patterns or not text_lc:
+            return False
+        if self._auto is not None:
+            for _ in self._auto.iter(text_lc):
+                return True
+            return False
+        return self._regex.search(text_lc) is not None
+
+    def find(self, text_lc: str) -> List[str]:
+        """Patterns that occur in the (already lowercased) text."""
+        if not self.patterns or not text_lc:
+            return []
+        if self._auto is not None:
+            ids = {pid for _, pid in self._auto.iter(text_lc)}
+            return [self.patterns[i] for i in sorted(ids)]
+        # Patterns can overlap, so check each rather than collecting regex matches
+        return [p for p in self.patterns if p in text_lc]
+
+    def mask(self, texts_lc: Iterable[str]) -> np.ndarray:
+        """Boolean mask: which (lowercased) texts contain any pattern."""
+        if self._auto is not None:
+            return np.fromiter(
+                (self.contains_any(t) for t in texts_lc),
+                dtype=bool,
+            )
+        texts = texts_lc if isinstance(texts_lc, pd.Series) else pd.Series(list(texts_lc), dtype=object)
+        if not self.patterns:
+            return np.zeros(len(texts), dtype=bool)
+        return texts.str.contains(self._regex.pattern, regex=True, na=False).to_numpy(dtype=bool)
+
+
+@lru_cache(maxsize=256)
+def _compiled(patterns: Tuple[str, ...]) -> Matcher:
+    return Matcher(patterns)
+
+
+def get_matcher(patterns: Iterable[str]) -> Matcher:
+    """
+    Cached matcher for a pattern set (order / case / duplicates ignored).
+    """
+    key = tuple(sorted({
+        p.strip().lower() for p in patterns
+        if isinstance(p, str) and p.strip()
+    }))
+    return _compiled(key)
+
+
+def lowered_texts(df: pd.DataFrame) -> pd.Series:
+    """Lowercased chunk texts, from the precomputed text_lc column when present."""
+    if "text_lc" in df.columns:
+        return df["text_lc"].fillna("")
+    return df["text"].fillna("").astype(str).str.lower()
+
+
+def contains_any_mask(df: pd.DataFrame, patterns: Iterable[str]) -> np.ndarray:
+    """Row mask: text mentions any of the patterns (case-insensitive substring)."""
+    if df is None or len(df) == 0:
+        return np.zeros(0, dtype=bool)
+    return get_matcher(patterns).mask(lowered_texts(df))
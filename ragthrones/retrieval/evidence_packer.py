@@ -0,0 +1,136 @@
+"""
+Token-budgeted evidence packing
+-------------------------------
+
+Every LLM-consuming agent gets its evidence through pack_evidence(),
+so prompt sizes are bounded by tokens instead of row counts:
+
+- rows are taken greedily in rerank order (rerank_score, then score)
+- rows that do not fit the remaining budget are skipped, smaller ones
+  further down may still fit
+- near-duplicate rows (word-set Jaccard >= EVIDENCE_DEDUP_THRESHOLD)
+  are suppressed
+- per-chunk token counts come from the precomputed "n_tokens" artifact
+  column (scripts/rebuild_artifacts.py); missing counts are computed on
+  the fly with tiktoken
+
+Budgets per agent (EVIDENCE_TOKENS_<AGENT> overrides):
+- analysis (narrative / causal / emotion / fused), synthesizer,
+  alternate_ending  (NSS keeps its own NSS_EVIDENCE_TOKENS budget)
+"""
+
+import os
+import re
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from ragthrones.shared.tokens import count_tokens
+
+
+EVIDENCE_BUDGETS: Dict[str, int] = {
+    "analysis": 1500,
+    "synthesizer": 2000,
+    "alternate_ending": 4000,
+}
+
+EVIDENCE_DEDUP_THRESHOLD = float(os.getenv("EVIDENCE_DEDUP_THRESHOLD", "0.8"))
+
+# "[S1E2] " prefix + newline per evidence line
+LINE_OVERHEAD_TOKENS = 8
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def get_evidence_budget(agent: str) -> int:
+    """Evidence token budget for an agent (EVIDENCE_TOKENS_<AGENT> env override)."""
+    env = os.getenv(f"EVIDENCE_TOKENS_{agent.upper()}")
+    if env:
+        return int(env)
+    return EVIDENCE_BUDGETS.get(agent, EVIDENCE_BUDGETS["analysis"])
+
+
+def ensure_token_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make sure df has an integer "n_tokens" column. Precomputed counts
+    (artifacts) are kept; only missing values are counted here.
+    """
+    if df is None or len(df) == 0:
+        return df
+
+    if "n_tokens" not in df.columns:
+        df = df.copy()
+        df["n_tokens"] = [count_tokens(str(t or "")) for t in df["text"]]
+        return df
+
+    missing = df["n_tokens"].isna()
+    if missing.any():
+        df = df.copy()
+        df.loc[missing, "n_tokens"] = [
+            count_tokens(str(t or "")) for t in df.loc[missing, "text"]
+        ]
+    return df
+
+
+def _rank_order(df: pd.DataFrame) -> pd.DataFrame:
+    for col in ("rerank_score", "score"):
+        if col in df.columns and df[col].notna().any():
+            return df.sort_values(col, ascending=False, na_position="last", kind="stable")
+    return df
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_evidence(
+    df: pd.DataFrame,
+    budget_tokens: int,
+    rank: bool = True,
+    dedup_threshold: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Greedily select rows that fit budget_tokens.
+
+    rank=True sorts by rerank_score / score first; rank=False keeps the
+    caller's order (e.g. top rows, then entity-matching rows).
+
+    Returns the selected rows in selection order, with
+    df.attrs["packed_tokens"] set to the tokens used.
+    """
+    if df is None or len(df) == 0:
+        return df
+
+    threshold = EVIDENCE_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+
+    df = ensure_token_counts(df)
+    if rank:
+        df = _rank_order(df)
+
+    keep = []
+    kept_words: List[frozenset] = []
+    used = 0
+
+    for pos, (text, n_tok) in enumerate(zip(df["text"], df["n_tokens"])):
+        cost = int(n_tok) + LINE_OVERHEAD_TOKENS
+        if used + cost > budget_tokens:
+            continue
+
+        words = frozenset(_WORD_RE.findall(str(text or "").lower()))
+        if any(_jaccard(words, w) >= threshold for w in kept_words):
+            continue
+
+        keep.append(pos)
+        kept_words.append(words)
+        used += cost
+
+    packed = df.iloc[keep]
+    packed.attrs["packed_tokens"] = used
+    return packed
+
+
+def pack_for_agent(df: pd.DataFrame, agent: str, rank: bool = True) -> pd.DataFrame:
+    """pack_evidence() with the agent's configured budget."""
+    return pack_evidence(df, get_evidence_budget(agent), rank=rank)
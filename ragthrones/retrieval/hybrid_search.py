@@ -3,28 +3,144 @@ Hybrid Search for RAGThrones
 ---------------------------
 Fixes: ensures hybrid_search_aug uses the same global vectorstore
 instance as the RetrievalAgent, avoiding stale globals.
+
+- hybrid_search_ids(): returns a RetrievalResult (chunk ids + scores);
+  this is what the multi-agent graph uses.
+- hybrid_search_aug(): same search, materialized as a DataFrame.
+- hybrid_search_batch(): many queries with one embedding call and one
+  FAISS search (batch API); results land in the result cache, so the
+  graph's own searches for the same queries are free.
+- embed_query() / get_chunk_vectors(): normalized query embedding
+  (cached per query string) and stored chunk vectors, for the
+  cosine stage of the rerank cascade.
+
+Config:
+- HYBRID_RESULT_CACHE_SIZE   cached search results (default 512, 0 = off)
 """
 
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Sequence
+
 import numpy as np
 import pandas as pd
 import faiss
 from rank_bm25 import BM25Okapi
 
 from ragthrones.retrieval.load_vectorstore import load_all_vectorstore
+from ragthrones.retrieval.retrieval_result import RetrievalResult
 
 # ------------------------------------------------------------
 # GLOBAL SINGLETON (REAL FIX)
 # ------------------------------------------------------------
 # ensure every agent call uses the SAME vectorstore instance
 _VSTORE = None
+_VSTORE_LOCK = threading.Lock()  # searches may run concurrently (speculative retrieval)
 
 def _get_store():
     global _VSTORE
     if _VSTORE is None:
-        _VSTORE = load_all_vectorstore()
+        with _VSTORE_LOCK:
+            if _VSTORE is None:
+                _VSTORE = load_all_vectorstore()
     return _VSTORE
 
 
+def get_chunk_table() -> pd.DataFrame:
+    """The shared df_aug (chunk id == row position)."""
+    return _get_store()["df_aug"]
+
+
+def get_artifact_version() -> str:
+    """Fingerprint of the artifacts behind the loaded vectorstore."""
+    return _get_store().get("version", "unknown")
+
+
+# ------------------------------------------------------------
+# Query embedding + result caches
+# ------------------------------------------------------------
+HYBRID_RESULT_CACHE_SIZE = int(os.getenv("HYBRID_RESULT_CACHE_SIZE", "512"))
+_EMBED_CACHE_SIZE = 512
+
+_embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_result_cache: "OrderedDict[tuple, RetrievalResult]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _lru_get(cache: OrderedDict, key):
+    with _cache_lock:
+        val = cache.get(key)
+        if val is not None:
+            cache.move_to_end(key)
+        return val
+
+
+def _lru_put(cache: OrderedDict, key, val, max_size: int) -> None:
+    if max_size <= 0:
+        return
+    with _cache_lock:
+        cache[key] = val
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def _embed_one(embed_client, query: str):
+    try:
+        return embed_client.embed(query)
+    except TypeError:
+        return embed_client.embed(query, model="text-embedding-3-large")
+
+
+def _normalized(vectors) -> np.ndarray:
+    qv = np.array(vectors, dtype="float32")
+    if qv.ndim == 1:
+        qv = qv.reshape(1, -1)
+    faiss.normalize_L2(qv)
+    return qv
+
+
+def embed_query(query: str) -> np.ndarray:
+    """L2-normalized (1, d) query embedding; repeat queries hit the cache."""
+    qv = _lru_get(_embed_cache, query)
+    if qv is None:
+        qv = _normalized(_embed_one(_get_store()["embed_client"], query))
+        _lru_put(_embed_cache, query, qv, _EMBED_CACHE_SIZE)
+    return qv.copy()
+
+
+def prefetch_query_embeddings(queries: Sequence[str]) -> None:
+    """
+    Embed every uncached query in ONE embedding call (EmbedClient.embed_batch;
+    falls back to one call per query if that call fails).
+    """
+    todo = [q for q in dict.fromkeys(queries) if _lru_get(_embed_cache, q) is None]
+    if not todo:
+        return
+
+    embed_client = _get_store()["embed_client"]
+    try:
+        vecs = np.array(embed_client.embed_batch(todo), dtype="float32")
+        if vecs.ndim != 2 or vecs.shape[0] != len(todo):
+            raise ValueError(f"expected {len(todo)} vectors, got shape {vecs.shape}")
+    except Exception as e:
+        print(f"[WARN] Batch query embedding failed ({e}); embedding one by one.")
+        for q in todo:
+            embed_query(q)
+        return
+
+    vecs = _normalized(vecs)
+    for q, v in zip(todo, vecs):
+        _lru_put(_embed_cache, q, v.reshape(1, -1), _EMBED_CACHE_SIZE)
+
+
+def get_chunk_vectors(ids) -> np.ndarray:
+    """Stored FAISS vectors for chunk ids (n, d)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    return _get_store()["faiss"].reconstruct_batch(ids)
+
+
 # ------------------------------------------------------------
 # Main Hybrid Retrieval Function
 # ------------------------------------------------------------
@@ -34,10 +150,28 @@ def hybrid_search_aug(
     alpha: float = 0.35,
     cand_mult: int = 20,
 ):
+    """
+    DataFrame version of hybrid_search_ids() (df_aug rows + score),
+    for scripts and the legacy UI.
+    """
+    return hybrid_search_ids(query, topk=topk, alpha=alpha, cand_mult=cand_mult).to_frame()
+
+
+def hybrid_search_ids(
+    query: str,
+    topk: int = 10,
+    alpha: float = 0.35,
+    cand_mult: int = 20,
+) -> RetrievalResult:
     """
     Runtime loads the ACTIVE vectorstore (FAISS + BM25 + df_aug).
     Fixes stale-global bug that caused zero-hit retrieval inside agents.
+    Repeat searches are served from the result cache.
     """
+    key = (query, topk, alpha, cand_mult)
+    cached = _lru_get(_result_cache, key)
+    if cached is not None:
+        return cached.copy()
 
     # Load store FIRST
     store = _get_store()
@@ -76,21 +210,29 @@ def hybrid_search_aug(
     # ------------------------------
     # 1. Embed query
     # ------------------------------
-    try:
-        q_emb = embed_client.embed(query)
-    except TypeError:
-        q_emb = embed_client.embed(query, model="text-embedding-3-large")
-
-    qv = np.asarray(q_emb, dtype="float32")[None, :]
-    faiss.normalize_L2(qv)
+    qv = embed_query(query)
 
     # ------------------------------
     # 2. FAISS vector search
     # ------------------------------
     D, I = faiss_index.search(qv, topk * cand_mult)
-    vec_scores = D[0].tolist()
-    vec_idx = I[0].tolist()
 
+    hits = _blend(len(df_aug), bm25, query, D[0].tolist(), I[0].tolist(), topk, alpha, cand_mult)
+    _lru_put(_result_cache, key, hits, HYBRID_RESULT_CACHE_SIZE)
+    return hits.copy()
+
+
+def _blend(
+    max_valid: int,
+    bm25,
+    query: str,
+    vec_scores: List[float],
+    vec_idx: List[int],
+    topk: int,
+    alpha: float,
+    cand_mult: int,
+) -> RetrievalResult:
+    """BM25 scoring + merge with the FAISS candidates for one query."""
     # ------------------------------
     # 3. BM25 lexical search
     # ------------------------------
@@ -102,7 +244,6 @@ def hybrid_search_aug(
     # ------------------------------
     # 4. Merge
     # ------------------------------
-    max_valid = len(df_aug)
     valid_vec_pairs = [
         (int(idx), float(score))
         for idx, score in zip(vec_idx, vec_scores)
@@ -115,7 +256,7 @@ def hybrid_search_aug(
 
     cand = list(vec_idx_valid | bm_top_valid)
     if not cand:
-        return pd.DataFrame([])
+        return RetrievalResult.empty_result()
 
     # ------------------------------
     # 5. Score blending
@@ -132,12 +273,41 @@ def hybrid_search_aug(
     scored.sort(key=lambda x: x[1], reverse=True)
 
     # ------------------------------
-    # 6. Build DF
+    # 6. Ids + scores (text / metadata stay in df_aug)
     # ------------------------------
-    rows = []
-    for i, sc in scored[:topk]:
-        row = df_aug.iloc[int(i)].to_dict()
-        row["score"] = float(sc)
-        rows.append(row)
+    top = scored[:topk]
+    return RetrievalResult(
+        ids=np.fromiter((i for i, _ in top), dtype=np.int64, count=len(top)),
+        scores=np.fromiter((sc for _, sc in top), dtype=np.float32, count=len(top)),
+    )
+
+
+def hybrid_search_batch(
+    queries: Sequence[str],
+    topk: int = 10,
+    alpha: float = 0.35,
+    cand_mult: int = 20,
+) -> List[RetrievalResult]:
+    """
+    hybrid_search_ids() for many queries: one embedding call and one
+    FAISS search for every uncached query. Results are cached, so the
+    graph's later searches for the same queries are cache hits.
+    """
+    unique = list(dict.fromkeys(q for q in queries if q and q.strip()))
+    todo = [q for q in unique if _lru_get(_result_cache, (q, topk, alpha, cand_mult)) is None]
+
+    if todo:
+        store = _get_store()
+        bm25_obj = store["bm25"]
+        bm25 = BM25Okapi(bm25_obj) if isinstance(bm25_obj, list) else bm25_obj
+
+        prefetch_query_embeddings(todo)
+        qv = np.vstack([embed_query(q) for q in todo])
+        D, I = store["faiss"].search(qv, topk * cand_mult)
+
+        max_valid = len(store["df_aug"])
+        for row, q in enumerate(todo):
+            hits = _blend(max_valid, bm25, q, D[row].tolist(), I[row].tolist(), topk, alpha, cand_mult)
+            _lru_put(_result_cache, (q, topk, alpha, cand_mult), hits, HYBRID_RESULT_CACHE_SIZE)
 
-    return pd.DataFrame(rows)
\ No newline at end of file
+    return [hybrid_search_ids(q, topk=topk, alpha=alpha, cand_mult=cand_mult) for q in queries]
@@ -1,10 +1,12 @@
 import os
+import hashlib
 import pickle
 import numpy as np
 import pandas as pd
 import faiss
 from rank_bm25 import BM25Okapi
 from ragthrones.embeddings.embed_client import EmbedClient
+from ragthrones.retrieval.chunk_metadata import add_chunk_metadata, has_chunk_metadata
 
 from google.cloud import storage
 
@@ -59,7 +61,13 @@ def load_df_aug(path=None):
         path = os.path.join(ensure_gcs_artifacts(), "df_aug.pkl")
     if not os.path.exists(path):
         raise FileNotFoundError(f"df_aug not found at {path}")
-    return pd.read_pickle(path)
+    df_aug = pd.read_pickle(path)
+
+    # Older artifacts lack the precomputed columns (see scripts/rebuild_artifacts.py)
+    if not has_chunk_metadata(df_aug):
+        print("[INFO] df_aug has no chunk metadata columns; computing them at load time.")
+        df_aug = add_chunk_metadata(df_aug)
+    return df_aug
 
 
 def load_faiss_index(path=None):
@@ -79,6 +87,30 @@ def load_bm25(path=None):
         return pickle.load(f)
 
 
+ARTIFACT_FILES = ["df_aug.pkl", "faiss.index", "bm25.pkl"]
+
+
+def artifact_version(art_dir=None) -> str:
+    """
+    Short fingerprint of the artifact files (size + first / last MiB of
+    each). Stable across re-downloads, changes when artifacts are rebuilt.
+    """
+    art_dir = art_dir or ensure_gcs_artifacts()
+    h = hashlib.sha1()
+    for fname in ARTIFACT_FILES:
+        path = os.path.join(art_dir, fname)
+        if not os.path.exists(path):
+            continue
+        size = os.path.getsize(path)
+        h.update(f"{fname}:{size}".encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read(1 << 20))
+            if size > (1 << 20):
+                f.seek(max(size - (1 << 20), 1 << 20))
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
 def load_all_vectorstore():
     """
     Minimal modified: now works with local OR GCS.
@@ -93,4 +125,5 @@ def load_all_vectorstore():
         "faiss": index,
         "bm25": bm25,
         "embed_client": embed_client,
+        "version": artifact_version(),
     }
\ No newline at end of file
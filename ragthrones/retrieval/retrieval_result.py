@@ -0,0 +1,163 @@
+"""
+Chunk-id retrieval results
+--------------------------
+
+RetrievalResult is what flows through AgentState.retrieved / .reranked:
+arrays of chunk ids (row positions in the shared df_aug) plus their
+scores. Text and metadata stay in the vectorstore and are only pulled
+in when an agent needs them; the DataFrame view is built lazily
+(to_frame) and cached on the result.
+
+- dedupe / merge by chunk id (first occurrence wins, so rows that were
+  already rerank-scored keep their score)
+- rerank_scores: NaN = not scored yet
+- cheap to copy / pickle (the cached frame is not pickled)
+
+Exports:
+- RetrievalResult
+- as_frame(hits)   DataFrame view of a RetrievalResult | DataFrame | None
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _chunk_table() -> pd.DataFrame:
+    # Imported lazily: hybrid_search owns the process-wide vectorstore
+    from ragthrones.retrieval.hybrid_search import get_chunk_table
+    return get_chunk_table()
+
+
+@dataclass
+class RetrievalResult:
+    ids: np.ndarray                                  # int64 chunk ids (df_aug positions)
+    scores: np.ndarray                               # hybrid (vector + BM25) scores
+    rerank_scores: Optional[np.ndarray] = None       # CrossEncoder scores, NaN = unscored
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    _frame: Optional[pd.DataFrame] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.ids = np.asarray(self.ids, dtype=np.int64)
+        self.scores = np.asarray(self.scores, dtype=np.float32)
+        if self.rerank_scores is None:
+            self.rerank_scores = np.full(len(self.ids), np.nan, dtype=np.float32)
+        else:
+            self.rerank_scores = np.asarray(self.rerank_scores, dtype=np.float32)
+
+    # ----------------------------------------------------------
+    # Construction
+    # ----------------------------------------------------------
+    @classmethod
+    def empty_result(cls) -> "RetrievalResult":
+        return cls(ids=np.zeros(0, dtype=np.int64), scores=np.zeros(0, dtype=np.float32))
+
+    @classmethod
+    def merge(cls, results: Iterable[Optional["RetrievalResult"]]) -> "RetrievalResult":
+        """Concatenate results and dedupe by chunk id (first occurrence wins)."""
+        parts = [r for r in results if r is not None and len(r)]
+        if not parts:
+            return cls.empty_result()
+        if len(parts) == 1:
+            return parts[0]
+
+        ids = np.concatenate([r.ids for r in parts])
+        _, first = np.unique(ids, return_index=True)
+        keep = np.sort(first)
+
+        return cls(
+            ids=ids[keep],
+            scores=np.concatenate([r.scores for r in parts])[keep],
+            rerank_scores=np.concatenate([r.rerank_scores for r in parts])[keep],
+        )
+
+    # ----------------------------------------------------------
+    # Basic container behaviour
+    # ----------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.ids) == 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_frame"] = None
+        return state
+
+    def take(self, positions: Sequence[int]) -> "RetrievalResult":
+        positions = np.asarray(positions, dtype=np.int64)
+        return RetrievalResult(
+            ids=self.ids[positions],
+            scores=self.scores[positions],
+            rerank_scores=self.rerank_scores[positions],
+        )
+
+    def copy(self) -> "RetrievalResult":
+        return self.take(np.arange(len(self)))
+
+    def head(self, k: int) -> "RetrievalResult":
+        return self.take(np.arange(min(k, len(self))))
+
+    def filter(self, mask: np.ndarray) -> "RetrievalResult":
+        return self.take(np.flatnonzero(np.asarray(mask, dtype=bool)))
+
+    # ----------------------------------------------------------
+    # Reranking
+    # ----------------------------------------------------------
+    def unscored(self) -> np.ndarray:
+        """Positions whose rerank score is still missing."""
+        return np.flatnonzero(np.isnan(self.rerank_scores))
+
+    def with_rerank_scores(self, positions: Sequence[int], values: Sequence[float]) -> "RetrievalResult":
+        """Copy with scores filled in at positions, sorted by rerank score (desc)."""
+        rerank = self.rerank_scores.copy()
+        rerank[np.asarray(positions, dtype=np.int64)] = np.asarray(values, dtype=np.float32)
+
+        # NaN last, stable for ties
+        order = np.argsort(np.where(np.isnan(rerank), np.inf, -rerank), kind="stable")
+        return RetrievalResult(
+            ids=self.ids[order],
+            scores=self.scores[order],
+            rerank_scores=rerank[order],
+        )
+
+    # ----------------------------------------------------------
+    # Lazy access to chunk text / metadata
+    # ----------------------------------------------------------
+    def column(self, name: str) -> np.ndarray:
+        """Values of a df_aug column for these chunks (in result order)."""
+        return _chunk_table()[name].to_numpy()[self.ids]
+
+    def texts(self, positions: Optional[Sequence[int]] = None) -> List[str]:
+        ids = self.ids if positions is None else self.ids[np.asarray(positions, dtype=np.int64)]
+        col = _chunk_table()["text"].to_numpy()
+        return [str(col[i]) for i in ids]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DataFrame view (df_aug columns + chunk_id, score, rerank_score).
+        Built on first use and cached on this result.
+        """
+        if self._frame is None:
+            if self.empty:
+                frame = pd.DataFrame()
+            else:
+                frame = _chunk_table().iloc[self.ids].reset_index(drop=True)
+                frame.insert(0, "chunk_id", self.ids)
+                frame["score"] = self.scores
+                frame["rerank_score"] = self.rerank_scores
+            self._frame = frame
+        return self._frame
+
+
+def as_frame(hits) -> Optional[pd.DataFrame]:
+    """DataFrame view for agents / UI code (accepts results, frames or None)."""
+    if hits is None:
+        return None
+    if isinstance(hits, RetrievalResult):
+        return hits.to_frame()
+    return hits
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: retrieval + rerank latency under concurrency, with library
+default threads vs the thread budget (shared/threads.py).
+
+Each "request" runs hybrid_search_ids + the rerank cascade for one
+question; requests are issued from a pool of --concurrency threads,
+the way the agent pool runs them in the app. Reports p50 / p95 / max
+per-request latency and throughput for both settings.
+
+Every request (across both modes) uses a distinct question string, so
+no mode is served from the query-embedding, retrieval or rerank pair
+caches warmed by the other.
+
+Usage:
+    python -m ragthrones.scripts.bench_thread_budget --concurrency 4 --requests 64
+
+Tokenizer parallelism is read once per process, so for a strict
+comparison also run the "default" mode alone with TOKENIZERS_PARALLELISM
+unset (--mode default) and the budget mode alone (--mode budget).
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from ragthrones.shared.threads import (
+    available_cores,
+    get_thread_budget,
+    set_library_threads,
+)
+
+
+QUESTIONS = [
+    "Why did Robb marry Talisa?",
+    "Who killed Joffrey?",
+    "What happened at the Red Wedding?",
+    "Why did Jaime push Bran from the tower?",
+    "How did Jon Snow become Lord Commander?",
+    "Who is Azor Ahai?",
+    "Why did Theon betray the Starks?",
+    "What did Littlefinger tell Ned about the Lannisters?",
+]
+
+
+def _one_request(question: str) -> float:
+    from ragthrones.agents.reranker_agent import get_reranker
+    from ragthrones.retrieval.hybrid_search import hybrid_search_ids
+    from ragthrones.shared.helpers import score_rerank
+
+    t0 = time.perf_counter()
+    hits = hybrid_search_ids(question, topk=15)
+    reranker = get_reranker()
+    if reranker is not None and len(hits):
+        score_rerank(question, hits, reranker)
+    return (time.perf_counter() - t0) * 1000
+
+
+def run(mode: str, concurrency: int, n_requests: int) -> dict:
+    # Mode-tagged so the second mode does not hit the first mode's caches
+    questions = [QUESTIONS[i % len(QUESTIONS)] + f" ({mode} {i})" for i in range(n_requests)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(_one_request, questions)))
+    wall = time.perf_counter() - t0
+
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "max": float(latencies.max()),
+        "rps": n_requests / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--mode", choices=["both", "default", "budget"], default="both")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    budget = get_thread_budget(concurrency=args.concurrency)
+    settings = {
+        "default": (cores, cores),
+        "budget": (budget.faiss_threads, budget.torch_threads),
+    }
+    modes = ["default", "budget"] if args.mode == "both" else [args.mode]
+
+    # Warm up: load vectorstore + reranker once, outside the timings
+    print("Warming up (vectorstore + reranker)...")
+    _one_request(QUESTIONS[0])
+
+    results = {}
+    for mode in modes:
+        faiss_threads, torch_threads = settings[mode]
+        set_library_threads(faiss_threads, torch_threads)
+        print(f"\n[{mode}] faiss={faiss_threads} torch={torch_threads} "
+              f"concurrency={args.concurrency} requests={args.requests}")
+        results[mode] = run(mode, args.concurrency, args.requests)
+
+    print("\n===================================")
+    print(f"{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'req/s':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['max']:>10.1f}{r['rps']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
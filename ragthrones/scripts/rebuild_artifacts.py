@@ -5,6 +5,8 @@ import pickle
 import faiss
 from pathlib import Path
 
+from ragthrones.retrieval.chunk_metadata import CHUNK_METADATA_COLUMNS, add_chunk_metadata
+
 # Path to original artifacts created during preprocessing
 ART_DIR = Path("ragthrones/data/artifacts")
 
@@ -29,7 +31,15 @@ def main():
     index = faiss.read_index(str(faiss_path))
 
     # ----------------------------------------------------
-    # 2. Re-save in Cloud Run–compatible formats
+    # 2. Precompute per-chunk metadata (season_num, tag, n_tokens, ...)
+    # ----------------------------------------------------
+    print(f"Adding chunk metadata columns: {', '.join(CHUNK_METADATA_COLUMNS)}")
+    df_aug = add_chunk_metadata(df_aug)
+    print(f"  total tokens: {int(df_aug['n_tokens'].sum()):,}")
+    print(f"  post-S7 chunks: {int(df_aug['is_post_s7'].sum()):,}")
+
+    # ----------------------------------------------------
+    # 3. Re-save in Cloud Run–compatible formats
     # ----------------------------------------------------
     print("Saving df_aug.pkl with protocol=5")
     df_aug.to_pickle("df_aug.pkl", protocol=5)
@@ -42,7 +52,7 @@ def main():
     faiss.write_index(index, "faiss.index")
 
     # ----------------------------------------------------
-    # 3. Done
+    # 4. Done
     # ----------------------------------------------------
     print("\n=== Finished! Upload these files to GCS ===")
     print("  • df_aug.pkl")
@@ -0,0 +1,138 @@
+"""
+Bounded concurrency helpers for Cosine of Thrones
+-------------------------------------------------
+
+Agents are mostly waiting on LLM / embedding I/O, so independent calls
+can overlap on a shared, bounded thread pool instead of running in series.
+
+Exports:
+- get_agent_executor(): process-wide ThreadPoolExecutor
+- run_concurrently(tasks): run {name: fn} concurrently, return {name: result}
+- run_blocking(fn, ...): await a blocking call on the agent pool
+- gather_dict(tasks): await {name: coroutine} concurrently
+- run_sync(coro): run a coroutine from sync code (background event loop)
+- submit_background(coro): fire-and-forget on the background loop
+"""
+
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+AGENT_MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", "16"))
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_agent_executor() -> ThreadPoolExecutor:
+    """
+    Shared pool for agent fan-out. Tasks submitted here must not block
+    on other tasks in the same pool (no nested waits).
+    """
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        with _lock:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=AGENT_MAX_WORKERS,
+                    thread_name_prefix="agent",
+                )
+    return _EXECUTOR
+
+
+def run_concurrently(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run zero-argument callables concurrently and return {name: result}.
+
+    Exceptions propagate to the caller (first one in task order);
+    wrap a task yourself if its failure should be isolated.
+    """
+    if not tasks:
+        return {}
+
+    if len(tasks) == 1:
+        name, fn = next(iter(tasks.items()))
+        return {name: fn()}
+
+    executor = get_agent_executor()
+    futures = {name: executor.submit(fn) for name, fn in tasks.items()}
+
+    return {name: fut.result() for name, fut in futures.items()}
+
+
+# ------------------------------------------------------------
+# Async helpers
+# ------------------------------------------------------------
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Await a blocking / CPU-bound call (FAISS, BM25, CrossEncoder, ...)
+    on the shared agent pool so it does not stall the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_agent_executor(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+async def gather_dict(tasks: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+    """
+    Await coroutines concurrently and return {name: result}.
+    Exceptions propagate; wrap a coroutine to isolate its failure.
+    """
+    names = list(tasks)
+    results = await asyncio.gather(*(tasks[n] for n in names))
+    return dict(zip(names, results))
+
+
+# ------------------------------------------------------------
+# Sync entry into async code
+# ------------------------------------------------------------
+# Sync callers (app.invoke, CLI scripts, eval) run coroutines on ONE
+# long-lived background loop, so per-loop async clients and their
+# connection pools are reused instead of rebuilt per call.
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_THREAD: Optional[threading.Thread] = None
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP, _LOOP_THREAD
+
+    if _LOOP is None:
+        with _lock:
+            if _LOOP is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="agent-loop",
+                    daemon=True,
+                )
+                thread.start()
+                _LOOP, _LOOP_THREAD = loop, thread
+    return _LOOP
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code and return its result.
+    Must not be called from inside a coroutine already running on the
+    background loop (that would deadlock).
+    """
+    loop = _get_background_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        raise RuntimeError("run_sync() called from the background event loop")
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def submit_background(coro: Awaitable[Any]) -> Future:
+    """
+    Schedule a coroutine on the background loop without waiting for it.
+    Safe from any thread (including the loop itself) and from inside
+    other event loops; returns a concurrent.futures.Future.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop())
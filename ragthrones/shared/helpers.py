@@ -5,7 +5,7 @@ Shared helper functions for Cosine of Thrones
 Includes:
 - Evidence formatting
 - Reranker node adapter
-- Synthesizer node adapter
+- Synthesizer node adapter (sync + async)
 - Lightweight entity extraction
 - Question type classification
 """
@@ -16,22 +16,15 @@ import re
 from typing import Optional
 
 import pandas as pd
-from openai import OpenAI
+from ragthrones.llm.llm_client import achat_complete, astream_chat_complete, chat_complete
 from ragthrones.prompts.answer_prompt import ANSWER_PROMPT
 from ragthrones.prompts.answer_prompt import TRIVIA_ANSWER_PROMPT
-
-
-# -------------------------------------------------------
-# OpenAI client helper
-# -------------------------------------------------------
-
-GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
-
-def _get_llm_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY must be set.")
-    return OpenAI(api_key=api_key)
+from ragthrones.retrieval.evidence_packer import pack_for_agent
+from ragthrones.retrieval.entity_matcher import contains_any_mask
+from ragthrones.retrieval.chunk_metadata import evidence_tag
+from ragthrones.retrieval.retrieval_result import RetrievalResult, as_frame
+from ragthrones.agents.rerank_cascade import RERANK_CASCADE, cascade_rerank, score_positions
+from ragthrones.shared.token_stream import get_channel
 
 
 # -------------------------------------------------------
@@ -47,16 +40,7 @@ def format_evidence_rows(df: pd.DataFrame, k: int = 5) -> str:
 
     lines = []
     for _, r in df.head(k).iterrows():
-        s, e = r.get("season"), r.get("episode")
-
-        # Safe season/episode formatter
-        if pd.notna(s) and pd.notna(e):
-            try:
-                tag = f"S{int(s)}E{int(e)}"
-            except Exception:
-                tag = "S?E?"
-        else:
-            tag = "S?E?"
+        tag = evidence_tag(r)
 
         txt = str(r.get("text", "")).replace("\n", " ").strip()
         spk = r.get("speaker")
@@ -71,6 +55,39 @@ def format_evidence_rows(df: pd.DataFrame, k: int = 5) -> str:
 # 2. Reranker node adapter
 # -------------------------------------------------------
 
+def score_rerank(question: str, df, reranker_model):
+    """
+    Add cross-encoder scores (RetrievalResult.rerank_scores, or a
+    'rerank_score' column for DataFrames).
+    Rows that already carry a score (e.g. speculatively pre-scored hits)
+    are not re-encoded; only the missing ones are sent to the model.
+    RetrievalResults go through the rerank cascade (agents/rerank_cascade.py)
+    unless RERANK_CASCADE=0, so only a bounded prefix is cross-encoded.
+    Returns a copy sorted by rerank score (descending).
+    """
+    if isinstance(df, RetrievalResult):
+        if RERANK_CASCADE:
+            return cascade_rerank(question, df, reranker_model)
+        todo = df.unscored()
+        hits = df.with_rerank_scores(todo, score_positions(question, df, todo, reranker_model))
+        hits.attrs["scored_pairs"] = int(len(todo))
+        return hits
+
+    df = df.copy().reset_index(drop=True)
+
+    if "rerank_score" not in df.columns:
+        df["rerank_score"] = float("nan")
+
+    todo = df["rerank_score"].isna()
+    if todo.any():
+        pairs = [[question, txt] for txt in df.loc[todo, "text"].tolist()]
+        df.loc[todo, "rerank_score"] = reranker_model.predict(pairs)
+
+    df = df.sort_values("rerank_score", ascending=False).reset_index(drop=True)
+    df.attrs["scored_pairs"] = int(todo.sum())
+    return df
+
+
 def node_reranker(state, reranker_model=None):
     """
     Insert reranked results into state.
@@ -86,18 +103,20 @@ def node_reranker(state, reranker_model=None):
         state.logs["reranker"] = {"used": False, "reason": "no-hits-or-no-model"}
         return state
 
-    pairs = [[state.question, txt] for txt in state.retrieved["text"].tolist()]
-    scores = reranker_model.predict(pairs)
-
-    df = state.retrieved.copy().reset_index(drop=True)
-    df["rerank_score"] = scores
-    df = df.sort_values("rerank_score", ascending=False).reset_index(drop=True)
+    hits = score_rerank(state.question, state.retrieved, reranker_model)
 
-    state.reranked = df
+    state.reranked = hits
+    top_score = (
+        hits.rerank_scores[0] if isinstance(hits, RetrievalResult)
+        else hits.iloc[0]["rerank_score"]
+    )
     state.logs["reranker"] = {
         "used": True,
-        "top_score": float(df.iloc[0]["rerank_score"])
+        "top_score": float(top_score),
+        "scored_pairs": hits.attrs.get("scored_pairs", len(hits)),
     }
+    if "cascade" in hits.attrs:
+        state.logs["reranker"]["cascade"] = hits.attrs["cascade"]
 
     return state
 
@@ -106,21 +125,17 @@ def node_reranker(state, reranker_model=None):
 # 3. Synthesizer node adapter (final LLM answer)
 # -------------------------------------------------------
 
-def node_synthesizer(
+def _prepare_synthesis(
     state,
     answer_prompt_template=None,
     k_evidence: int = 5,
     show_prompt: bool = False
-):
+) -> Optional[dict]:
     """
-    Synthesizer with Trivia Mode:
-    - Detects trivia-style questions (short factoid answers)
-    - Forces use of TRIVIA_ANSWER_PROMPT when needed
-    - Preserves canonical entity merging logic
+    Build the synthesizer prompt (shared by the sync and async nodes).
+    Returns None when there is no evidence to answer from.
     """
 
-    client = _get_llm_client()
-
     # -------------------------------------------------
     # Choose prompt template (auto-detect trivia)
     # -------------------------------------------------
@@ -149,8 +164,8 @@ def node_synthesizer(
     # -------------------------------------------------
     hits = state.reranked if state.reranked is not None else state.retrieved
     if hits is None or len(hits) == 0:
-        state.answer = "(no evidence)"
-        return state
+        return None
+    hits = as_frame(hits)
 
     canonical_entities = (
         state.logs
@@ -162,19 +177,20 @@ def node_synthesizer(
     top_rows = hits.head(k_evidence)
 
     if canonical_entities:
-        mask = hits["text"].apply(
-            lambda t: any(name.lower() in str(t).lower() for name in canonical_entities)
-        )
-        entity_rows = hits[mask]
-        merged = pd.concat([top_rows, entity_rows]).drop_duplicates()
+        # One pass per row over a cached automaton of all entity names
+        entity_rows = hits[contains_any_mask(hits, canonical_entities)]
+        merged = pd.concat([top_rows, entity_rows]).drop_duplicates(subset=["text"])
     else:
         merged = top_rows
 
+    # Token budget (EVIDENCE_TOKENS_SYNTHESIZER): top rows first, then entity rows
+    merged = pack_for_agent(merged, "synthesizer", rank=False)
+
     # -------------------------------------------------
     # Build evidence text
     # -------------------------------------------------
     ev_text = "\n".join(
-        f"[S{r.get('season')}E{r.get('episode')}] {r.get('text')}"
+        f"[{evidence_tag(r)}] {r.get('text')}"
         for _, r in merged.iterrows()
     )
 
@@ -193,28 +209,93 @@ def node_synthesizer(
         print(full_prompt)
         print("=======================\n")
 
-    # -------------------------------------------------
-    # Call LLM
-    # -------------------------------------------------
-    response = client.chat.completions.create(
-        model=GEN_MODEL,
-        temperature=0.1 if not is_trivia_question else 0.0,
-        messages=[{"role": "user", "content": full_prompt}]
-    )
+    return {
+        "prompt": full_prompt,
+        "is_trivia": is_trivia_question,
+        "evidence_count": len(merged),
+        "evidence_tokens": merged.attrs.get("packed_tokens"),
+    }
+
 
-    state.answer = response.choices[0].message.content.strip()
+def _record_synthesis(state, plan: dict, answer: str):
+    state.answer = answer
 
     # -------------------------------------------------
     # Logs
     # -------------------------------------------------
     state.logs["synthesizer"] = {
-        "prompt_used": "TRIVIA_ANSWER_PROMPT" if is_trivia_question else "ANSWER_PROMPT",
-        "prompt_length_chars": len(full_prompt),
-        "evidence_count": len(merged)
+        "prompt_used": "TRIVIA_ANSWER_PROMPT" if plan["is_trivia"] else "ANSWER_PROMPT",
+        "prompt_length_chars": len(plan["prompt"]),
+        "evidence_count": plan["evidence_count"],
+        "evidence_tokens": plan.get("evidence_tokens"),
     }
 
     return state
 
+
+def node_synthesizer(
+    state,
+    answer_prompt_template=None,
+    k_evidence: int = 5,
+    show_prompt: bool = False
+):
+    """
+    Synthesizer with Trivia Mode:
+    - Detects trivia-style questions (short factoid answers)
+    - Forces use of TRIVIA_ANSWER_PROMPT when needed
+    - Preserves canonical entity merging logic
+    """
+    plan = _prepare_synthesis(state, answer_prompt_template, k_evidence, show_prompt)
+    if plan is None:
+        state.answer = "(no evidence)"
+        return state
+
+    # -------------------------------------------------
+    # Call LLM
+    # -------------------------------------------------
+    answer = chat_complete(
+        [{"role": "user", "content": plan["prompt"]}],
+        agent="synthesizer",
+        temperature=0.0 if plan["is_trivia"] else None,
+    )
+
+    return _record_synthesis(state, plan, answer)
+
+
+async def anode_synthesizer(
+    state,
+    answer_prompt_template=None,
+    k_evidence: int = 5,
+    show_prompt: bool = False
+):
+    """
+    Async version of node_synthesizer (AsyncOpenAI).
+    If a token channel is open for state.request_id, the answer is
+    streamed into it as it is generated.
+    """
+    plan = _prepare_synthesis(state, answer_prompt_template, k_evidence, show_prompt)
+    if plan is None:
+        state.answer = "(no evidence)"
+        channel = get_channel(getattr(state, "request_id", None))
+        if channel is not None:
+            channel.put(state.answer)
+        return state
+
+    messages = [{"role": "user", "content": plan["prompt"]}]
+    temperature = 0.0 if plan["is_trivia"] else None
+
+    channel = get_channel(getattr(state, "request_id", None))
+    if channel is not None:
+        answer = await astream_chat_complete(
+            messages, channel.put, agent="synthesizer", temperature=temperature
+        )
+    else:
+        answer = await achat_complete(messages, agent="synthesizer", temperature=temperature)
+
+    state = _record_synthesis(state, plan, answer)
+    state.logs["synthesizer"]["streamed"] = channel is not None
+    return state
+
 # -------------------------------------------------------
 # 4. Heuristic entity extraction
 # -------------------------------------------------------
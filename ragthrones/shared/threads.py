@@ -0,0 +1,141 @@
+"""
+Thread budget for Cosine of Thrones
+-----------------------------------
+
+FAISS (OpenMP), PyTorch intra-op (CrossEncoder) and HuggingFace
+tokenizers each default to one thread per core. With several requests
+in flight in one process they oversubscribe the CPU and tail latency
+spikes. One policy, applied once at startup, sizes all of them from the
+expected request concurrency:
+
+- per-request threads = max(1, cores // THREAD_BUDGET_CONCURRENCY)
+- FAISS OpenMP threads      = per-request threads
+- torch intra-op threads    = all cores, inter-op = 1: the only torch
+  user is the RerankEngine, which runs one forward pass at a time (its
+  lock in-process, a single inference thread in the reranker service),
+  so splitting cores across requests would leave most of them idle
+- tokenizers parallelism    = off when more than one request is expected
+- OMP / MKL / OpenBLAS env defaults set to the per-request count (only
+  effective for libraries not yet initialized, hence "apply early")
+
+Explicit per-library settings win: FAISS_THREADS, TORCH_THREADS,
+TOKENIZERS_PARALLELISM, RERANKER_THREADS.
+
+Config:
+- THREAD_BUDGET               1 (default) | 0 = leave library defaults alone
+- THREAD_BUDGET_CORES         cores to share (default: CPUs this process may use)
+- THREAD_BUDGET_CONCURRENCY   expected concurrent requests (default 4)
+- FAISS_THREADS / TORCH_THREADS   per-library overrides
+"""
+
+import os
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+
+THREAD_BUDGET = os.getenv("THREAD_BUDGET", "1") == "1"
+THREAD_BUDGET_CONCURRENCY = int(os.getenv("THREAD_BUDGET_CONCURRENCY", "4"))
+
+_APPLIED: Optional["ThreadBudget"] = None
+
+
+def available_cores() -> int:
+    env = int(os.getenv("THREAD_BUDGET_CORES", "0"))
+    if env > 0:
+        return env
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        return os.cpu_count() or 1
+
+
+@dataclass
+class ThreadBudget:
+    cores: int
+    concurrency: int
+    faiss_threads: int
+    torch_threads: int
+    torch_interop_threads: int
+    tokenizers_parallel: bool
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def get_thread_budget(
+    concurrency: Optional[int] = None,
+    cores: Optional[int] = None,
+) -> ThreadBudget:
+    """Compute (but do not apply) the thread policy."""
+    cores = cores or available_cores()
+    concurrency = max(1, concurrency or THREAD_BUDGET_CONCURRENCY)
+    per_request = max(1, cores // concurrency)
+
+    tok_env = os.getenv("TOKENIZERS_PARALLELISM")
+    tokenizers_parallel = (
+        tok_env.lower() == "true" if tok_env is not None else concurrency == 1
+    )
+
+    return ThreadBudget(
+        cores=cores,
+        concurrency=concurrency,
+        faiss_threads=int(os.getenv("FAISS_THREADS", str(per_request))),
+        # Serialized reranker: one pass at a time gets every core
+        torch_threads=int(os.getenv("TORCH_THREADS", str(cores))),
+        torch_interop_threads=1,
+        tokenizers_parallel=tokenizers_parallel,
+    )
+
+
+def set_library_threads(faiss_threads: int, torch_threads: int, torch_interop_threads: int = 1) -> None:
+    """Set FAISS / torch thread counts directly (libraries that are installed)."""
+    try:
+        import faiss
+        faiss.omp_set_num_threads(faiss_threads)
+    except ImportError:
+        pass
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+        try:
+            torch.set_num_interop_threads(torch_interop_threads)
+        except RuntimeError:
+            pass  # only settable before the first parallel op
+    except ImportError:
+        pass
+
+
+def apply_thread_budget(concurrency: Optional[int] = None, force: bool = False) -> Optional[ThreadBudget]:
+    """
+    Apply the policy once per process (call before heavy imports when
+    possible). Returns the applied budget, or None when THREAD_BUDGET=0.
+    """
+    global _APPLIED
+
+    if not THREAD_BUDGET and not force:
+        return None
+    if _APPLIED is not None and not force:
+        return _APPLIED
+
+    budget = get_thread_budget(concurrency)
+    per_request = str(max(budget.faiss_threads, budget.torch_threads))
+
+    # Only effective for native libraries not yet initialized
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(var, per_request)
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if budget.tokenizers_parallel else "false"
+
+    set_library_threads(budget.faiss_threads, budget.torch_threads, budget.torch_interop_threads)
+
+    print(
+        f"Thread budget: {budget.cores} cores / {budget.concurrency} requests -> "
+        f"faiss={budget.faiss_threads}, torch={budget.torch_threads}, "
+        f"tokenizers_parallel={budget.tokenizers_parallel}"
+    )
+    _APPLIED = budget
+    return budget
+
+
+def applied_thread_budget() -> Optional[ThreadBudget]:
+    return _APPLIED
@@ -0,0 +1,99 @@
+"""
+Per-request event channels
+--------------------------
+
+Lets a caller watch a request while the graph is still running. The
+consumer opens a channel under the request id before starting the
+graph; producers look the channel up by state.request_id:
+
+- {"type": "token", "text": ...}        answer deltas (synthesizer /
+                                          alternate-ending agent)
+- {"type": "agent", "agent": ..., "result": ...}
+                                          one analysis agent finished
+- {"type": "node", "node": ..., "state": AgentState}
+                                          a graph node finished (LangGraph
+                                          stream, see multi_agent_graph)
+
+No channel -> nothing is published (CLI, eval, batch API).
+
+- put() / put_event() are thread-safe (call_soon_threadsafe onto the
+  consumer's loop when called from elsewhere).
+- get() waits for at least one event and returns everything queued so
+  far, with consecutive token deltas merged, so a slow consumer sees
+  fewer, larger updates.
+
+Exports:
+- TokenChannel
+- open_channel(request_id)   (from the consumer's event loop)
+- get_channel(request_id)
+- close_channel(request_id)
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class TokenChannel:
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.n_deltas = 0
+
+    def put_event(self, event: Dict[str, Any]) -> None:
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self._queue.put_nowait(event)  # visible before the producer returns
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def put(self, text: str) -> None:
+        """Publish an answer delta."""
+        if text:
+            self.n_deltas += 1
+            self.put_event({"type": "token", "text": text})
+
+    def _drain_into(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        while not self._queue.empty():
+            event = self._queue.get_nowait()
+            if event["type"] == "token" and events and events[-1]["type"] == "token":
+                events[-1] = {"type": "token", "text": events[-1]["text"] + event["text"]}
+            else:
+                events.append(event)
+        return events
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Everything queued right now (no waiting), tokens merged."""
+        return self._drain_into([])
+
+    async def get(self) -> List[Dict[str, Any]]:
+        """Wait for the next event(s) and return them."""
+        first = await self._queue.get()
+        return self._drain_into([first])
+
+
+_channels: Dict[str, TokenChannel] = {}
+_lock = threading.Lock()
+
+
+def open_channel(request_id: str) -> TokenChannel:
+    channel = TokenChannel(request_id)
+    with _lock:
+        _channels[request_id] = channel
+    return channel
+
+
+def get_channel(request_id: Optional[str]) -> Optional[TokenChannel]:
+    if not request_id:
+        return None
+    with _lock:
+        return _channels.get(request_id)
+
+
+def close_channel(request_id: str) -> None:
+    with _lock:
+        _channels.pop(request_id, None)
@@ -0,0 +1,60 @@
+"""
+Token counting helpers
+----------------------
+
+Prompt budgets across the agents are measured in tiktoken tokens.
+
+Exports:
+- get_encoding(model)          (cached tiktoken encoding)
+- count_tokens(text, model)    (falls back to ~4 chars/token without tiktoken)
+- truncate_to_tokens(text, max_tokens, model)
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional at runtime
+    tiktoken = None
+
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o / gpt-4o-mini
+
+
+@lru_cache(maxsize=16)
+def get_encoding(model: Optional[str] = None):
+    """tiktoken encoding for a model (None when tiktoken is unavailable)."""
+    if tiktoken is None:
+        return None
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    if not text:
+        return 0
+    enc = get_encoding(model)
+    if enc is None:
+        return max(1, len(text) // 4)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut text to at most max_tokens tokens."""
+    if max_tokens <= 0 or not text:
+        return ""
+    enc = get_encoding(model)
+    if enc is None:
+        return text[: max_tokens * 4]
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens])
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+import pytest
+
+from ragthrones.app.admission import AdmissionController, Saturated
+
+
+def _controller(max_concurrency=1, max_queue=8, wait=1.0):
+    return AdmissionController(
+        max_concurrency=max_concurrency,
+        max_queue=max_queue,
+        max_wait={"interactive": wait, "api": wait, "batch": wait},
+    )
+
+
+def test_waiters_admitted_in_priority_order():
+    async def scenario():
+        ac = _controller()
+        order = []
+        await ac.acquire("api")
+
+        async def waiter(cls, tag):
+            await ac.acquire(cls)
+            order.append(tag)
+            ac.release()
+
+        tasks = []
+        for cls, tag in [("batch", "b1"), ("api", "a1"), ("batch", "b2"), ("interactive", "i1")]:
+            tasks.append(asyncio.ensure_future(waiter(cls, tag)))
+            await asyncio.sleep(0)
+
+        ac.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["i1", "a1", "b1", "b2"]
+        assert ac.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_wait_longer_than_max_wait_is_rejected():
+    async def scenario():
+        ac = _controller(wait=0.05)
+        await ac.acquire("api")
+
+        with pytest.raises(Saturated) as exc:
+            await ac.acquire("batch")
+
+        assert exc.value.reason == "queue wait exceeded"
+        assert exc.value.retry_after >= 1
+        assert ac.timed_out["batch"] == 1
+        assert ac.queue_depth()["batch"] == 0
+
+        ac.release()
+        assert ac.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancel_after_handoff_passes_the_slot_on():
+    async def scenario():
+        ac = _controller()
+        await ac.acquire("api")
+
+        first = asyncio.ensure_future(ac.acquire("api"))
+        second = asyncio.ensure_future(ac.acquire("api"))
+        await asyncio.sleep(0)
+
+        # Hand the slot to `first`, then cancel it before it can run
+        ac.release()
+        first.cancel()
+        await asyncio.sleep(0)
+
+        await asyncio.wait_for(second, timeout=1)
+        assert first.cancelled()
+        assert ac.in_flight == 1
+
+        ac.release()
+        assert ac.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_evicts_lower_priority_waiter():
+    async def scenario():
+        ac = _controller(max_queue=2)
+        await ac.acquire("api")
+
+        batch = [asyncio.ensure_future(ac.acquire("batch")) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        # Same class as the queued waiters: rejected outright
+        with pytest.raises(Saturated) as exc:
+            await ac.acquire("batch")
+        assert exc.value.reason == "queue full"
+
+        # Higher priority: evicts the newest batch waiter
+        interactive = asyncio.ensure_future(ac.acquire("interactive"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        with pytest.raises(Saturated) as exc:
+            await batch[1]
+        assert "evicted" in exc.value.reason
+        assert ac.queue_depth() == {"interactive": 1, "api": 0, "batch": 1}
+
+        ac.release()
+        await asyncio.wait_for(interactive, timeout=1)
+        ac.release()
+        await asyncio.wait_for(batch[0], timeout=1)
+        ac.release()
+
+        assert ac.in_flight == 0
+        assert ac.rejected["batch"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_handoff_to_waiter_on_another_loop():
+    ac = _controller()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        async def holder():
+            await ac.acquire("api")
+
+        asyncio.run_coroutine_threadsafe(holder(), loop).result(timeout=1)
+
+        async def other_loop_waiter():
+            await ac.acquire("batch")
+            ac.release()
+            return "admitted"
+
+        async def scenario():
+            fut = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(other_loop_waiter(), loop))
+            while ac.queue_depth()["batch"] == 0:
+                await asyncio.sleep(0.01)
+            ac.release()
+            return await asyncio.wait_for(fut, timeout=1)
+
+        assert asyncio.run(scenario()) == "admitted"
+        assert ac.in_flight == 0
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=1)
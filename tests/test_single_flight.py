@@ -0,0 +1,30 @@
+import asyncio
+
+from ragthrones.pipelines.single_flight import SingleFlight
+
+
+def test_cancelled_follower_does_not_affect_others():
+    async def scenario():
+        sf = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "answer"
+
+        leader = asyncio.ensure_future(sf.ado("q", work))
+        await asyncio.sleep(0)
+        follower_a = asyncio.ensure_future(sf.ado("q", work))
+        follower_b = asyncio.ensure_future(sf.ado("q", work))
+        await asyncio.sleep(0)
+
+        follower_a.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await leader == ("answer", False)
+        assert await follower_b == ("answer", True)
+        assert follower_a.cancelled()
+        assert sf.inflight() == 0
+
+    asyncio.run(scenario())